@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合并/分割/提取后端对比基准测试
+在合成语料上比较各后端的耗时与输出大小，用于选择 pdf_backends.DEFAULT_BACKENDS
+"""
+
+import argparse
+import os
+import tempfile
+
+from common import make_sample_pdf, timed
+from pdf_backends import BACKENDS
+from pdf_merger import PDFMerger
+from pdf_splitter import PDFSplitter
+
+
+def directory_size(path: str) -> int:
+    """目录下所有文件的总大小"""
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="合并/分割/提取后端对比基准测试")
+    parser.add_argument("--files", type=int, default=20, help="合成输入文件数")
+    parser.add_argument("--pages", type=int, default=20, help="每个文件的页数")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), help="要测试的后端")
+    args = parser.parse_args()
+
+    merger = PDFMerger()
+    splitter = PDFSplitter()
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = [make_sample_pdf(os.path.join(tmp, f"input_{i:03d}.pdf"), args.pages)
+                  for i in range(args.files)]
+        print(f"输入: {args.files} 个文件 x {args.pages} 页")
+        print(f"{'后端':>8} {'操作':>6} {'耗时':>9} {'输出大小':>12}")
+
+        for name in args.backends:
+            merged = os.path.join(tmp, f"merged_{name}.pdf")
+            seconds, ok = timed(merger.merge_pdfs, inputs, merged, backend=name)
+            print(f"{name:>8} {'合并':>6} {seconds:8.2f}s {os.path.getsize(merged):12d}  {'成功' if ok else '失败'}")
+
+            split_dir = os.path.join(tmp, f"split_{name}")
+            seconds, ok = timed(splitter.split_by_pages, merged, split_dir, 1, backend=name)
+            print(f"{name:>8} {'分割':>6} {seconds:8.2f}s {directory_size(split_dir):12d}  {'成功' if ok else '失败'}")
+
+            extracted = os.path.join(tmp, f"extract_{name}.pdf")
+            page_numbers = list(range(1, args.files * args.pages + 1, 2))
+            seconds, ok = timed(splitter.extract_pages, merged, extracted, page_numbers, backend=name)
+            print(f"{name:>8} {'提取':>6} {seconds:8.2f}s {os.path.getsize(extracted):12d}  {'成功' if ok else '失败'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多分辨率渲染基准测试
+比较每个尺寸单独 load_page + get_pixmap 与显示列表复用的每页CPU时间
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from common import make_text_heavy_pdf
+from pdf_converter import PDFConverter
+
+RENDITIONS = [
+    {'name': 'thumb', 'dpi': 24},
+    {'name': 'preview', 'dpi': 72},
+    {'name': 'full', 'dpi': 96},
+]
+
+
+def render_separately(input_file: str):
+    """旧方式：每个尺寸都重新加载并解析页面"""
+    with fitz.open(input_file) as doc:
+        for page_num in range(len(doc)):
+            for rendition in RENDITIONS:
+                zoom = rendition['dpi'] / 72
+                page = doc.load_page(page_num)
+                page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes('jpeg')
+
+
+def render_with_display_list(input_file: str):
+    """新方式：每页解析一次，从显示列表渲染各尺寸"""
+    for _ in PDFConverter().iter_page_renditions(input_file, RENDITIONS, format='JPEG'):
+        pass
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="多分辨率渲染基准测试")
+    parser.add_argument("--pages", type=int, default=20, help="合成PDF页数")
+    parser.add_argument("--lines", type=int, default=400, help="每页文字行数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = make_text_heavy_pdf(os.path.join(tmp, "sample.pdf"), args.pages,
+                                         lines=args.lines)
+        print(f"页数: {args.pages}, 规格: {', '.join(r['name'] for r in RENDITIONS)}")
+        for label, func in (("逐尺寸解析", render_separately), ("显示列表", render_with_display_list)):
+            start = time.process_time()
+            func(input_file)
+            cpu = time.process_time() - start
+            print(f"{label:>8}: CPU {cpu:6.2f}s  每页 {cpu / args.pages * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
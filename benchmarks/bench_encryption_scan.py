@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+加密状态检查基准测试
+比较完整解析 (PdfReader) 与只读文件尾部的探测在一批文件上的耗时，并检查结果一致
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import fitz  # PyMuPDF
+from PyPDF2 import PdfReader
+
+from common import make_sample_pdf, timed
+from pdf_security import PDFSecurity
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="加密状态检查基准测试")
+    parser.add_argument("--files", type=int, default=200, help="文件数")
+    parser.add_argument("--pages", type=int, default=300, help="每个文件的页数")
+    parser.add_argument("--workers", type=int, default=None, help="扫描线程数")
+    args = parser.parse_args()
+
+    security = PDFSecurity()
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = make_sample_pdf(os.path.join(tmp, "plain.pdf"), args.pages)
+        with fitz.open(plain) as pdf_document:
+            encrypted = os.path.join(tmp, "encrypted.pdf")
+            pdf_document.save(encrypted, encryption=fitz.PDF_ENCRYPT_AES_128, owner_pw="owner")
+        corpus = os.path.join(tmp, "corpus")
+        os.makedirs(corpus)
+        for i in range(args.files):
+            shutil.copy(encrypted if i % 2 else plain, os.path.join(corpus, f"file_{i:05d}.pdf"))
+        files = sorted(os.path.join(corpus, name) for name in os.listdir(corpus))
+        print(f"输入: {args.files} 个文件, 每个 {args.pages} 页")
+
+        def full_parse():
+            results = []
+            for file_path in files:
+                with open(file_path, 'rb') as f:
+                    results.append(PdfReader(f).is_encrypted)
+            return results
+
+        full_seconds, expected = timed(full_parse)
+        probe_seconds, probed = timed(lambda: [security.is_encrypted(file_path) for file_path in files])
+        scan_seconds, scanned = timed(security.scan_directory, corpus, workers=args.workers)
+
+        print(f"{'方式':<12} {'耗时':>9} {'加速比':>8}")
+        print(f"{'PdfReader':<12} {full_seconds:8.3f}s {1:7.2f}x")
+        print(f"{'尾部探测':<12} {probe_seconds:8.3f}s {full_seconds / probe_seconds:7.2f}x")
+        print(f"{'并行扫描':<12} {scan_seconds:8.3f}s {full_seconds / scan_seconds:7.2f}x")
+        consistent = probed == expected and [info['encrypted'] for info in scanned] == expected
+        print(f"结果一致: {'是' if consistent else '否'}")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片转PDF吞吐量基准测试
+比较直接转换、串行预处理与多进程预处理的每秒页数
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from common import timed
+from pdf_converter import PDFConverter
+
+
+def make_sample_images(output_dir: str, count: int, width: int = 2480, height: int = 3508) -> list:
+    """生成合成图片：带EXIF旋转的高分辨率JPEG、PNG以及已满足要求的JPEG"""
+    rng = np.random.default_rng(0)
+    files = []
+    for i in range(count):
+        gradient = np.linspace(0, 255, width, dtype=np.float32)
+        pixels = np.empty((height, width, 3), dtype=np.uint8)
+        pixels[...] = (gradient[None, :, None] * 0.6 + 60).astype(np.uint8)
+        pixels[::40] = rng.integers(0, 80, size=(len(pixels[::40]), width, 3), dtype=np.uint8)
+        image = Image.fromarray(pixels)
+        kind = i % 3
+        if kind == 0:
+            exif = Image.Exif()
+            exif[0x0112] = 6
+            path = os.path.join(output_dir, f"img_{i:04d}.jpg")
+            image.save(path, quality=92, dpi=(600, 600), exif=exif)
+        elif kind == 1:
+            path = os.path.join(output_dir, f"img_{i:04d}.png")
+            image.save(path, dpi=(300, 300))
+        else:
+            path = os.path.join(output_dir, f"img_{i:04d}.jpg")
+            image.resize((width // 2, height // 2)).save(path, quality=85, dpi=(150, 150))
+        files.append(path)
+    return files
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="图片转PDF吞吐量基准测试")
+    parser.add_argument("--images", type=int, default=30, help="合成图片数量")
+    parser.add_argument("--max-dpi", type=int, default=200, help="预处理最大分辨率")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({2, 4, os.cpu_count() or 1}), help="要测试的进程数")
+    args = parser.parse_args()
+
+    converter = PDFConverter()
+    with tempfile.TemporaryDirectory() as tmp:
+        image_files = make_sample_images(tmp, args.images)
+        print(f"图片数: {args.images}, 最大DPI: {args.max_dpi}, CPU核心数: {os.cpu_count()}")
+
+        output_file = os.path.join(tmp, "plain.pdf")
+        seconds, ok = timed(converter.images_to_pdf, image_files, output_file)
+        print(f"{'直接转换':>8}: {seconds:7.2f}s  {args.images / seconds:8.1f} 页/秒  "
+              f"{os.path.getsize(output_file) / 1024 / 1024:8.1f} MB  {'成功' if ok else '失败'}")
+
+        for workers in [1] + [w for w in args.workers if w > 1]:
+            output_file = os.path.join(tmp, f"pre_{workers}.pdf")
+            seconds, ok = timed(converter.images_to_pdf, image_files, output_file,
+                                workers=workers, preprocess=True, max_dpi=args.max_dpi)
+            mode = "串行预处理" if workers == 1 else f"{workers}进程预处理"
+            print(f"{mode:>8}: {seconds:7.2f}s  {args.images / seconds:8.1f} 页/秒  "
+                  f"{os.path.getsize(output_file) / 1024 / 1024:8.1f} MB  {'成功' if ok else '失败'}")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
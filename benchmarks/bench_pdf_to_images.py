@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF转图片吞吐量基准测试
+比较串行渲染与多进程渲染的每秒页数
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+
+from common import make_sample_pdf, timed
+from pdf_converter import PDFConverter
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="PDF转图片吞吐量基准测试")
+    parser.add_argument("--pages", type=int, default=60, help="合成PDF页数")
+    parser.add_argument("--dpi", type=int, default=150, help="渲染分辨率")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({2, 4, os.cpu_count() or 1}), help="要测试的进程数")
+    args = parser.parse_args()
+
+    converter = PDFConverter()
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = make_sample_pdf(os.path.join(tmp, "sample.pdf"), args.pages)
+        print(f"页数: {args.pages}, DPI: {args.dpi}, CPU核心数: {os.cpu_count()}")
+
+        for workers in [1] + [w for w in args.workers if w > 1]:
+            output_dir = os.path.join(tmp, f"out_{workers}")
+            seconds, ok = timed(converter.pdf_to_images, input_file, output_dir,
+                                dpi=args.dpi, workers=workers)
+            mode = "串行" if workers == 1 else f"{workers}进程"
+            print(f"{mode:>8}: {seconds:7.2f}s  {args.pages / seconds:8.1f} 页/秒  {'成功' if ok else '失败'}")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按页分割的并行基准测试
+比较不同进程数下 split_by_pages 的耗时与加速比，并检查输出文件名一致
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+
+from common import make_sample_pdf, timed
+from parallel_utils import default_workers
+from pdf_backends import BACKENDS
+from pdf_splitter import PDFSplitter
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="按页分割的并行基准测试")
+    parser.add_argument("--pages", type=int, default=2000, help="合成文档页数")
+    parser.add_argument("--pages-per-file", type=int, default=1, help="每个输出文件的页数")
+    parser.add_argument("--backend", default="pymupdf", choices=list(BACKENDS), help="分割后端")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, default_workers()}), help="要测试的进程数")
+    args = parser.parse_args()
+
+    splitter = PDFSplitter()
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = make_sample_pdf(os.path.join(tmp, "input.pdf"), args.pages)
+        print(f"输入: {args.pages} 页, 每个文件 {args.pages_per_file} 页, "
+              f"后端 {args.backend}, CPU核心数 {default_workers()}")
+        print(f"{'进程数':>6} {'耗时':>9} {'加速比':>8} {'文件数':>8}")
+
+        baseline = None
+        reference = None
+        for workers in args.workers:
+            output_dir = os.path.join(tmp, f"split_{workers}")
+            seconds, ok = timed(splitter.split_by_pages, input_file, output_dir, args.pages_per_file,
+                                backend=args.backend, workers=workers)
+            names = sorted(os.listdir(output_dir))
+            if reference is None:
+                reference = names
+            baseline = baseline or seconds
+            status = '成功' if ok and names == reference else '失败'
+            print(f"{workers:>6} {seconds:8.2f}s {baseline / seconds:7.2f}x {len(names):>8}  {status}")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全文索引基准测试
+测量索引吞吐量（页/秒）、冷查询延迟（每次新建索引对象，以及每次启动命令行进程）与热查询延迟
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import make_sample_pdf
+from pdf_converter import PDFConverter
+from text_index import TextIndex
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="全文索引基准测试")
+    parser.add_argument("--files", type=int, default=20, help="合成PDF文件数")
+    parser.add_argument("--pages", type=int, default=50, help="每个文件页数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="文本提取进程数")
+    parser.add_argument("--queries", type=int, default=200, help="查询次数")
+    parser.add_argument("--cli-queries", type=int, default=10, help="命令行冷查询次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_files = [make_sample_pdf(os.path.join(tmp, f"doc_{i:04d}.pdf"), args.pages)
+                       for i in range(args.files)]
+        index = TextIndex(os.path.join(tmp, "index"))
+
+        start = time.perf_counter()
+        stats = index.update_files(input_files, PDFConverter(), args.workers)
+        seconds = time.perf_counter() - start
+        print(f"索引: {stats['pages']} 页, {seconds:.2f}s, {stats['pages'] / seconds:.1f} 页/秒")
+
+        start = time.perf_counter()
+        index.update_files(input_files, PDFConverter(), args.workers)
+        print(f"无变化重新索引: {time.perf_counter() - start:.3f}s")
+
+        queries = [f"page {random.randint(1, args.pages)} line {random.randint(1, 40)}"
+                   for _ in range(args.queries)] + ["quick brown fox"]
+
+        # 冷查询：每次查询都重新打开索引，和命令行单次查询一样不复用已读取的段
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            TextIndex(index.index_dir).search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+        report("冷查询", latencies)
+
+        # 命令行冷查询：包含解释器启动和模块导入
+        cli = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pdf_search.py")
+        latencies = []
+        for query in queries[:args.cli_queries]:
+            start = time.perf_counter()
+            subprocess.run([sys.executable, cli, "--index-dir", index.index_dir, "search", query],
+                           check=True, stdout=subprocess.DEVNULL)
+            latencies.append((time.perf_counter() - start) * 1000)
+        report("命令行查询", latencies)
+
+        index.search(queries[0])  # 预热，读入查询用到的词典桶
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+        report("热查询", latencies)
+
+
+def report(label, latencies):
+    """打印延迟分布"""
+    latencies.sort()
+    print(f"{label}: {len(latencies)} 次, 中位数 {latencies[len(latencies) // 2]:.2f} ms, "
+          f"P95 {latencies[int(len(latencies) * 0.95)]:.2f} ms, 最大 {latencies[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
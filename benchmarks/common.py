@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试公共工具
+负责设置导入路径并生成合成PDF语料
+"""
+
+import os
+import sys
+import time
+
+# 添加src目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+import fitz  # PyMuPDF
+
+
+def make_sample_pdf(output_file: str, pages: int = 50, width: float = 595, height: float = 842):
+    """生成包含文字和矢量图形的合成PDF"""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=width, height=height)
+        for line in range(40):
+            y = 40 + line * 18
+            page.insert_text((40, y), f"Page {page_num + 1} line {line + 1} "
+                                      f"the quick brown fox jumps over the lazy dog", fontsize=10)
+        for i in range(20):
+            rect = fitz.Rect(50 + i * 20, 600 + (i % 5) * 30, 120 + i * 20, 640 + (i % 5) * 30)
+            page.draw_rect(rect, color=(i / 20, 0.3, 1 - i / 20), fill=(0.9, i / 20, 0.5))
+    doc.save(output_file)
+    doc.close()
+    return output_file
+
+
+def make_text_heavy_pdf(output_file: str, pages: int = 20, lines: int = 400):
+    """生成每页包含大量小字号多字体文字的合成PDF，页面解析开销较大"""
+    fonts = ['helv', 'tiro', 'cour', 'times-bold']
+    text = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor " * 2
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        for line in range(lines):
+            page.insert_text((10, 2 + line * 2), text, fontsize=2, fontname=fonts[line % len(fonts)])
+    doc.save(output_file)
+    doc.close()
+    return output_file
+
+
+def timed(func, *args, **kwargs):
+    """执行函数并返回 (耗时秒数, 返回值)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
@@ -33,7 +33,7 @@ def build_exe():
         "--paths=src",  # 添加src到Python路径
         "--hidden-import=PyPDF2",
         "--hidden-import=PIL",
-        "--hidden-import=img2pdf",
+        "--hidden-import=numpy",
         "--hidden-import=fitz",
         "--hidden-import=reportlab",
         "main.py"
@@ -10,6 +10,7 @@ import os
 import tkinter as tk
 from tkinter import messagebox
 import logging
+import multiprocessing
 
 # 添加src目录到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -62,5 +63,7 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # 打包后的exe中使用多进程需要此调用
+    multiprocessing.freeze_support()
     main()
 
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF工具箱 - 全文检索命令行工具
+建立PDF页面文本索引并按关键词查询所在文件和页码
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+# 添加src目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(current_dir, 'src'))
+
+from text_index import TextIndex
+
+
+def collect_pdf_files(paths):
+    """展开命令行给出的文件和目录，返回PDF文件列表"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names)
+                             if name.lower().endswith('.pdf'))
+        else:
+            files.append(path)
+    return files
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="PDF全文检索")
+    parser.add_argument("--index-dir", default="./pdf_index", help="索引目录")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="添加或更新PDF文件（可指定目录）")
+    add_parser.add_argument("paths", nargs="+")
+    add_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="文本提取进程数")
+
+    remove_parser = subparsers.add_parser("remove", help="从索引中删除PDF文件")
+    remove_parser.add_argument("paths", nargs="+")
+
+    search_parser = subparsers.add_parser("search", help="查询关键词")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=50, help="最多显示的结果数")
+
+    subparsers.add_parser("compact", help="合并索引段并清除已删除的页面")
+    subparsers.add_parser("stats", help="显示索引统计信息")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+    index = TextIndex(args.index_dir)
+
+    if args.command == "add":
+        # 只有建索引需要 PDFConverter（连带导入 PyMuPDF 等），查询时不导入以缩短启动时间
+        from pdf_converter import PDFConverter
+        stats = index.update_files(collect_pdf_files(args.paths), PDFConverter(), args.workers)
+        print(f"新增 {stats['added']} 个文件，更新 {stats['updated']} 个，"
+              f"跳过 {stats['skipped']} 个，索引 {stats['pages']} 页")
+    elif args.command == "remove":
+        print(f"已删除 {index.remove_files(collect_pdf_files(args.paths))} 个文件")
+    elif args.command == "search":
+        start = time.perf_counter()
+        hits = index.search(args.query)
+        elapsed = (time.perf_counter() - start) * 1000
+        for file_path, page in hits[:args.limit]:
+            print(f"{file_path}:{page}")
+        print(f"共 {len(hits)} 个结果，用时 {elapsed:.1f} ms")
+    elif args.command == "compact":
+        print(f"合并完成，保留 {index.compact()} 页")
+    elif args.command == "stats":
+        for key, value in index.stats().items():
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,161 @@
+import io
+import os
+import tarfile
+import time
+import zipfile
+from typing import BinaryIO, Callable, List, Optional, Tuple, Union
+
+# 支持的归档格式及其扩展名
+ARCHIVE_FORMATS = {
+    'zip': ('.zip',),
+    'tar': ('.tar',),
+    'tar.gz': ('.tar.gz', '.tgz')
+}
+
+
+def archive_format(path: str) -> Optional[str]:
+    """按扩展名判断归档格式，不是归档文件时返回None"""
+    lower = path.lower()
+    for format, extensions in ARCHIVE_FORMATS.items():
+        if lower.endswith(extensions):
+            return format
+    return None
+
+
+class ArchiveSink:
+    """
+    把多个输出依次写入一个ZIP或TAR归档
+
+    每个条目产生后立即写出，内存只与单个条目的大小有关，不创建临时文件。
+    目标可以是文件路径，也可以是调用方提供的可写二进制流（包括不能定位的
+    管道或套接字，ZIP此时使用数据描述符）。PDF和图片本身已压缩，
+    ZIP条目默认只存储不压缩。
+    """
+
+    def __init__(self, target: Union[str, BinaryIO], format: Optional[str] = None,
+                 compression: int = zipfile.ZIP_STORED):
+        """
+        Args:
+            target: 归档文件路径或可写二进制流（流不会被关闭）
+            format: 归档格式 (zip, tar, tar.gz)，None表示按文件扩展名判断，流默认为zip
+            compression: ZIP条目的压缩方式
+
+        Raises:
+            ValueError: 不支持的归档格式
+        """
+        if format is None:
+            format = (archive_format(target) if isinstance(target, str) else None) or 'zip'
+        if format not in ARCHIVE_FORMATS:
+            raise ValueError(f"不支持的归档格式: {format}（可选: {', '.join(ARCHIVE_FORMATS)}）")
+        self.format = format
+        self.path = target if isinstance(target, str) else None
+        self.entries = 0
+        self.bytes_written = 0
+        self._names = set()
+        self._compression = compression
+        self._stream = open(target, 'wb') if self.path else target
+        self._zip = None
+        self._tar = None
+        if format == 'zip':
+            self._zip = zipfile.ZipFile(self._stream, 'w', compression=compression)
+        else:
+            self._tar = tarfile.open(fileobj=self._stream, mode='w|gz' if format == 'tar.gz' else 'w|')
+
+    def add(self, name: str, data: bytes):
+        """
+        写入一个条目
+
+        Args:
+            name: 条目名称（归档内路径）
+            data: 条目内容
+
+        Raises:
+            ValueError: 归档已关闭或条目名称重复
+        """
+        if self._zip is None and self._tar is None:
+            raise ValueError("归档已关闭")
+        if name in self._names:
+            raise ValueError(f"归档中已有同名条目: {name}")
+        self._names.add(name)
+        if self._zip is not None:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = self._compression
+            info.external_attr = 0o644 << 16
+            self._zip.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            info.mode = 0o644
+            self._tar.addfile(info, io.BytesIO(data))
+        self.entries += 1
+        self.bytes_written += len(data)
+
+    def close(self):
+        """写出归档目录（ZIP）或结束标记（TAR）；目标为路径时关闭文件"""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+        if self._tar is not None:
+            self._tar.close()
+            self._tar = None
+        if self.path and not self._stream.closed:
+            self._stream.close()
+
+    def __enter__(self) -> 'ArchiveSink':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        # 出错时不留下不完整的归档文件
+        if exc_type is not None and self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class MemorySink:
+    """在内存中收集条目，供工作进程把结果交回主进程后按顺序写入归档"""
+
+    def __init__(self):
+        self.entries: List[Tuple[str, bytes]] = []
+
+    def add(self, name: str, data: bytes):
+        """收集一个条目"""
+        self.entries.append((name, data))
+
+
+class FilteredSink:
+    """只把 accept 返回True的条目转交给下一级归档，其余条目丢弃"""
+
+    def __init__(self, sink, accept: Callable[[str, bytes], bool]):
+        """
+        Args:
+            sink: 下一级归档（ArchiveSink 或 MemorySink）
+            accept: 判断函数 (条目名称, 条目内容) -> 是否写入
+        """
+        self.sink = sink
+        self.accept = accept
+
+    def add(self, name: str, data: bytes):
+        """条目被接受时写入下一级归档"""
+        if self.accept(name, data):
+            self.sink.add(name, data)
+
+
+# 接受归档输出的参数类型：归档文件路径、可写二进制流或已打开的 ArchiveSink
+ArchiveTarget = Union[str, BinaryIO, ArchiveSink]
+
+
+def open_archive(target: ArchiveTarget) -> Tuple[ArchiveSink, bool]:
+    """
+    打开归档输出
+
+    Args:
+        target: 归档文件路径、可写二进制流或已打开的 ArchiveSink
+
+    Returns:
+        (归档, 用完后是否需要关闭): 传入 ArchiveSink 时原样返回，由其创建者关闭，
+        这样可以把多个操作的输出写进同一个归档
+    """
+    if isinstance(target, ArchiveSink):
+        return target, False
+    return ArchiveSink(target), True
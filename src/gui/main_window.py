@@ -182,6 +182,7 @@ class PDFToolboxGUI:
         self.split_method = tk.StringVar(value="pages")
         ttk.Radiobutton(options_frame, text="按页数分割", variable=self.split_method, value="pages", command=self.update_split_mode).grid(row=0, column=1, sticky=tk.W, pady=5)
         ttk.Radiobutton(options_frame, text="按页码范围分割", variable=self.split_method, value="range", command=self.update_split_mode).grid(row=0, column=2, sticky=tk.W, pady=5)
+        ttk.Radiobutton(options_frame, text="按文件大小分割", variable=self.split_method, value="size", command=self.update_split_mode).grid(row=0, column=3, sticky=tk.W, pady=5)
 
         # 每文件页数
         self.pages_per_file = tk.StringVar(value="1")
@@ -196,7 +197,13 @@ class PDFToolboxGUI:
         self.page_ranges = tk.StringVar(value="1-3,4-6,7-9")
         self.page_ranges_label = ttk.Label(options_frame, text="页码范围：")
         self.page_ranges_entry = ttk.Entry(options_frame, textvariable=self.page_ranges, width=30)
-        self.page_ranges_hint = ttk.Label(options_frame, text="如：1-3,5,7-9", foreground="#888")
+        self.page_ranges_hint = ttk.Label(options_frame, text="如：1-3,5,7-9,10-last", foreground="#888")
+
+        # 每文件大小上限
+        self.split_max_mb = tk.StringVar(value="10")
+        self.split_max_mb_label = ttk.Label(options_frame, text="每文件大小(MB)：")
+        self.split_max_mb_entry = ttk.Entry(options_frame, textvariable=self.split_max_mb, width=10)
+        self.split_max_mb_hint = ttk.Label(options_frame, text="如：9.5，每个文件不超过9.5MB", foreground="#888")
 
         # 说明Label
         self.split_mode_desc = ttk.Label(options_frame, text="将PDF每N页分割为一个新文件", foreground="#0078d4")
@@ -216,20 +223,25 @@ class PDFToolboxGUI:
 
     def update_split_mode(self):
         mode = self.split_method.get()
+        # 先隐藏所有模式的输入项，再显示当前模式的
+        for widget in (self.pages_per_file_label, self.pages_per_file_entry, self.pages_per_file_hint,
+                       self.page_ranges_label, self.page_ranges_entry, self.page_ranges_hint,
+                       self.split_max_mb_label, self.split_max_mb_entry, self.split_max_mb_hint):
+            widget.grid_remove()
         if mode == "pages":
-            # 显示每文件页数，隐藏页码范围
+            # 显示每文件页数
             self.pages_per_file_label.grid()
             self.pages_per_file_entry.grid()
             self.pages_per_file_hint.grid()
-            self.page_ranges_label.grid_remove()
-            self.page_ranges_entry.grid_remove()
-            self.page_ranges_hint.grid_remove()
             self.split_mode_desc.config(text="将PDF每N页分割为一个新文件")
+        elif mode == "size":
+            # 显示每文件大小上限
+            self.split_max_mb_label.grid(row=1, column=0, sticky=tk.W, pady=5)
+            self.split_max_mb_entry.grid(row=1, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+            self.split_max_mb_hint.grid(row=1, column=2, sticky=tk.W, padx=(10, 0), pady=5)
+            self.split_mode_desc.config(text="将PDF按顺序分割为多个不超过指定大小的文件")
         else:
-            # 显示页码范围，隐藏每文件页数
-            self.pages_per_file_label.grid_remove()
-            self.pages_per_file_entry.grid_remove()
-            self.pages_per_file_hint.grid_remove()
+            # 显示页码范围
             self.page_ranges_label.grid(row=1, column=0, sticky=tk.W, pady=5)
             self.page_ranges_entry.grid(row=1, column=1, sticky=(tk.W, tk.E), padx=(10, 0), pady=5)
             self.page_ranges_hint.grid(row=1, column=2, sticky=tk.W, padx=(10, 0), pady=5)
@@ -452,10 +464,41 @@ class PDFToolboxGUI:
             title="选择PDF文件",
             filetypes=[("PDF文件", "*.pdf")]
         )
+        new_files = []
         for file in files:
             if file not in self.merge_file_list:
                 self.merge_file_list.append(file)
                 self.merge_file_listbox.insert(tk.END, os.path.basename(file))
+                new_files.append(file)
+        # 连同已有文件一起检查，跨批次的重复文件也能发现
+        if new_files and self.pdf_merger:
+            threading.Thread(target=self.inspect_merge_files, args=(list(self.merge_file_list),),
+                             daemon=True).start()
+
+    def inspect_merge_files(self, files):
+        """并行检查合并文件（在工作线程中运行），结果交给界面线程显示"""
+        results = self.pdf_merger.inspect_inputs(files)
+        # Tk 控件只能在界面线程中操作
+        self.root.after(0, self.show_merge_inspection, results)
+
+    def show_merge_inspection(self, results):
+        """在合并文件列表中显示页数和大小，并提示重复的文件"""
+        if results is None:
+            self.log_message("部分文件无法读取，请检查后重新选择")
+            return
+        for info in results:
+            if info['file'] not in self.merge_file_list:
+                continue
+            index = self.merge_file_list.index(info['file'])
+            label = f"{os.path.basename(info['file'])}  ({info['pages']} 页, {info['file_size'] / 1024:.0f} KB"
+            if info['encrypted']:
+                label += ", 已加密"
+            label += ")"
+            self.merge_file_listbox.delete(index)
+            self.merge_file_listbox.insert(index, label)
+            if info['duplicate_of']:
+                self.log_message(f"重复的文件: {os.path.basename(info['file'])} "
+                                 f"与 {os.path.basename(info['duplicate_of'])} 内容相同")
 
     def remove_selected_merge_file(self):
         selection = self.merge_file_listbox.curselection()
@@ -482,7 +525,7 @@ class PDFToolboxGUI:
         def merge_thread():
             try:
                 self.log_message("开始PDF合并...")
-                success = self.pdf_merger.merge_pdfs(self.merge_file_list, output_file)
+                success = self.pdf_merger.merge_pdfs(self.merge_file_list, output_file, validate=True)
                 if success:
                     self.log_message("PDF合并成功完成")
                     messagebox.showinfo("成功", "PDF合并完成")
@@ -522,14 +565,24 @@ class PDFToolboxGUI:
                 if self.split_method.get() == "pages":
                     try:
                         pages_per_file = int(self.pages_per_file.get())
-                        success = self.pdf_splitter.split_by_pages(input_file, output_dir, pages_per_file)
+                        success = self.pdf_splitter.split_by_pages(
+                            input_file, output_dir, pages_per_file, workers=os.cpu_count() or 1,
+                            progress_callback=self.log_split_progress)
                     except ValueError:
                         messagebox.showerror("错误", "页数必须是数字")
                         return
+                elif self.split_method.get() == "size":
+                    try:
+                        max_bytes = int(float(self.split_max_mb.get()) * 1024 * 1024)
+                    except ValueError:
+                        messagebox.showerror("错误", "文件大小必须是数字")
+                        return
+                    success = self.pdf_splitter.split_by_size(input_file, output_dir, max_bytes)
                 else:
                     page_ranges = [r.strip() for r in self.page_ranges.get().split(',')]
                     success = self.pdf_splitter.split_by_page_ranges(input_file, output_dir, page_ranges)
                 if success:
+                    self.log_split_sizes()
                     self.log_message("PDF分割成功完成")
                     messagebox.showinfo("成功", "PDF分割完成")
                 else:
@@ -540,6 +593,24 @@ class PDFToolboxGUI:
                 messagebox.showerror("错误", f"PDF分割出错: {str(e)}")
         threading.Thread(target=split_thread, daemon=True).start()
 
+    def log_split_sizes(self):
+        """记录分割输出在资源裁剪前后的大小（文件较多时只记录总计）"""
+        reports = self.pdf_splitter.last_split_report
+        if len(reports) <= 20:
+            for report in reports:
+                self.log_message(f"{os.path.basename(report['file'])}: "
+                                 f"{report['size_before'] / 1024:.0f} KB -> {report['size_after'] / 1024:.0f} KB")
+        size_before = sum(report['size_before'] for report in reports)
+        size_after = sum(report['size_after'] for report in reports)
+        self.log_message(f"共 {len(reports)} 个文件，资源裁剪前约 {size_before / 1024:.0f} KB，"
+                         f"裁剪后 {size_after / 1024:.0f} KB")
+
+    def log_split_progress(self, completed, total):
+        """大约每10%记录一次分割进度"""
+        step = max(1, total // 10)
+        if completed == total or completed // step != (completed - 1) // step:
+            self.log_message(f"分割进度: {completed}/{total}")
+
     def select_convert_files(self):
         t = self.convert_type.get()
         if t == "图片转PDF":
@@ -0,0 +1,163 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# 与背景灰度相差超过该值的像素视为内容
+INK_CONTRAST = 48
+
+# 估计倾斜角度时的最大检测范围（度）
+MAX_SKEW_ANGLE = 5.0
+
+# 小于该角度（度）的倾斜不做校正
+MIN_SKEW_ANGLE = 0.5
+
+# 分析前把图片缩小到的最大边长
+_ANALYSIS_SIZE = 1200
+
+# 估计倾斜角度时最多采样的内容像素数
+_SKEW_SAMPLE_POINTS = 60000
+
+
+def _analysis_image(image: Image.Image) -> Tuple[np.ndarray, float]:
+    """缩小并转为灰度数组，返回 (灰度数组, 缩放比例)"""
+    gray = image.convert('L')
+    scale = min(1.0, _ANALYSIS_SIZE / max(gray.size))
+    if scale < 1.0:
+        gray = gray.resize((max(1, round(gray.width * scale)), max(1, round(gray.height * scale))),
+                           Image.BILINEAR)
+    return np.asarray(gray), scale
+
+
+def background_level(gray: np.ndarray) -> int:
+    """用四周边缘像素的中位数估计背景灰度"""
+    border = max(1, min(gray.shape) // 50)
+    edges = np.concatenate([gray[:border].ravel(), gray[-border:].ravel(),
+                            gray[:, :border].ravel(), gray[:, -border:].ravel()])
+    return int(np.median(edges))
+
+
+def ink_mask(gray: np.ndarray, background: Optional[int] = None) -> np.ndarray:
+    """与背景差异明显的像素掩码，去掉孤立的噪点"""
+    if background is None:
+        background = background_level(gray)
+    mask = np.abs(gray.astype(np.int16) - background) > INK_CONTRAST
+    # 统计3x3邻域内的内容像素数，少于2个邻居的视为扫描噪点
+    padded = np.pad(mask, 1).astype(np.uint8)
+    height, width = mask.shape
+    neighbours = sum(padded[dy:dy + height, dx:dx + width]
+                     for dy in range(3) for dx in range(3)) - mask
+    return mask & (neighbours >= 2)
+
+
+def content_bbox(gray: np.ndarray, noise: float = 0.002) -> Optional[Tuple[int, int, int, int]]:
+    """
+    检测内容边界框
+
+    按行、列统计内容像素数，少于 noise 比例的行列视为噪点。
+
+    Args:
+        gray: 灰度数组
+        noise: 行列内容像素占比低于该值时忽略
+
+    Returns:
+        (左, 上, 右, 下)，没有内容时返回None
+    """
+    mask = ink_mask(gray)
+    rows = np.flatnonzero(mask.sum(axis=1) > noise * mask.shape[1])
+    cols = np.flatnonzero(mask.sum(axis=0) > noise * mask.shape[0])
+    if rows.size == 0 or cols.size == 0:
+        return None
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def _profile_scores(ys: np.ndarray, xs: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    """
+    计算各角度下水平投影的能量（各行内容像素数的平方和）
+
+    所有角度一次完成：把点按各角度剪切后的行号与角度序号合并为一个下标，
+    用一次 bincount 得到全部投影。
+    """
+    shifts = np.tan(np.radians(angles))[:, None] * xs[None, :]
+    rows = np.rint(ys[None, :] + shifts).astype(np.int64)
+    rows -= rows.min()
+    span = int(rows.max()) + 1
+    flat = rows + np.arange(len(angles))[:, None] * span
+    counts = np.bincount(flat.ravel(), minlength=len(angles) * span).reshape(len(angles), span)
+    return (counts.astype(np.float64) ** 2).sum(axis=1)
+
+
+def estimate_skew(gray: np.ndarray, max_angle: float = MAX_SKEW_ANGLE) -> float:
+    """
+    用投影轮廓法估计倾斜角度
+
+    文字行对齐时水平投影最"尖锐"（平方和最大）。先以0.5度步长粗搜，
+    再在最佳角度附近以0.05度步长细搜。
+
+    Args:
+        gray: 灰度数组
+        max_angle: 检测范围（度）
+
+    Returns:
+        float: 倾斜角度（度），逆时针旋转该角度即可摆正
+    """
+    ys, xs = np.nonzero(ink_mask(gray))
+    if ys.size < 100:
+        return 0.0
+    if ys.size > _SKEW_SAMPLE_POINTS:
+        index = np.random.default_rng(0).choice(ys.size, _SKEW_SAMPLE_POINTS, replace=False)
+        ys, xs = ys[index], xs[index]
+    ys = ys.astype(np.float64)
+    xs = xs.astype(np.float64) - xs.mean()
+
+    coarse = np.arange(-max_angle, max_angle + 1e-9, 0.5)
+    best = coarse[np.argmax(_profile_scores(ys, xs, coarse))]
+    fine = np.arange(best - 0.5, best + 0.5 + 1e-9, 0.05)
+    return float(fine[np.argmax(_profile_scores(ys, xs, fine))])
+
+
+def _crop_to_content(image: Image.Image, gray: np.ndarray, scale: float, pad: float) -> Image.Image:
+    """按分析图上的内容边界框（四周加 pad 像素）裁剪原图"""
+    bbox = content_bbox(gray)
+    if bbox is None:
+        return image
+    left, top, right, bottom = (value / scale for value in bbox)
+    box = (max(0, int(left - pad)), max(0, int(top - pad)),
+           min(image.width, int(right + pad + 1)), min(image.height, int(bottom + pad + 1)))
+    if box == (0, 0, image.width, image.height):
+        return image
+    return image.crop(box)
+
+
+def clean_image(image: Image.Image, autocrop: bool = True, deskew: bool = True,
+                margin: float = 0.01) -> Image.Image:
+    """
+    摆正并裁掉图片四周的空白
+
+    分析在缩小的灰度图上进行；需要旋转时先裁到内容区域再旋转，
+    旋转的像素量只与内容面积有关。
+
+    Args:
+        image: L 或 RGB 模式的图片
+        autocrop: 是否裁剪空白边
+        deskew: 是否校正倾斜
+        margin: 裁剪后保留的边距（占较长边的比例）
+
+    Returns:
+        Image: 处理后的图片
+    """
+    gray, scale = _analysis_image(image)
+    background = background_level(gray)
+    angle = estimate_skew(gray) if deskew else 0.0
+    pad = margin * max(image.size)
+
+    if autocrop:
+        image = _crop_to_content(image, gray, scale, pad)
+
+    if abs(angle) >= MIN_SKEW_ANGLE:
+        fill = background if image.mode == 'L' else (background,) * 3
+        image = image.rotate(-angle, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+        if autocrop:
+            gray, scale = _analysis_image(image)
+            image = _crop_to_content(image, gray, scale, pad)
+    return image
@@ -0,0 +1,327 @@
+import io
+import math
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+# 支持的图片编码方式
+CODECS = ('JPEG', 'JPX', 'FLATE')
+
+# 小于该字节数的图片不值得重新编码
+MIN_IMAGE_BYTES = 2048
+
+# 压缩配置：bitonal 会把接近黑白的扫描图片二值化并用CCITT G4编码
+PROFILES = ('default', 'bitonal')
+
+# 深色与浅色像素合计占比达到该值时视为黑白图片
+BITONAL_FRACTION = 0.97
+
+# 二值化图片保留的最低分辨率，过低时文字笔画会断裂
+BITONAL_MIN_DPI = 300
+
+# 黑白检测时最多采样的像素数
+_BITONAL_SAMPLE_PIXELS = 1000000
+
+# 目标大小模式的 (目标DPI, JPEG质量) 阶梯，从损失最小到最大排列
+QUALITY_LADDER = [
+    (None, 90), (300, 85), (200, 80), (200, 70), (150, 70), (150, 60), (150, 50),
+    (120, 50), (100, 45), (96, 40), (72, 40), (72, 30), (60, 25), (50, 20)
+]
+
+# 解码图片缓存的总上限（字节），多次试算复用解码结果；多进程时由各工作进程平分
+DECODED_CACHE_BYTES = 512 * 1024 * 1024
+
+# 工作进程内打开的PDF文档
+_worker_document = None
+
+# 解码图片缓存 xref -> Pillow图像，按最近使用排序
+_decoded_cache = OrderedDict()
+_decoded_cache_bytes = 0
+# 本进程的缓存上限
+_decoded_cache_limit = DECODED_CACHE_BYTES
+
+
+def collect_images(pdf_document: fitz.Document) -> List[Dict]:
+    """
+    枚举文档中的图片XObject（按xref去重）
+
+    Returns:
+        List[Dict]: 每个图片的信息，包含 xref、尺寸、原始字节数、
+                    所在页面以及页面上最大显示尺寸（点）
+    """
+    images = {}
+    for page_num in range(len(pdf_document)):
+        page = pdf_document.load_page(page_num)
+        for item in page.get_images(full=True):
+            xref, smask, width, height = item[0], item[1], item[2], item[3]
+            info = images.get(xref)
+            if info is None:
+                definition = pdf_document.xref_object(xref, compressed=True)
+                info = images[xref] = {
+                    'xref': xref,
+                    'page': page_num,
+                    'width': width,
+                    'height': height,
+                    'smask': smask,
+                    'image_mask': '/ImageMask true' in definition,
+                    'original_bytes': len(pdf_document.xref_stream_raw(xref) or b''),
+                    'display_width': 0.0,
+                    'display_height': 0.0
+                }
+            for rect in page.get_image_rects(xref):
+                info['display_width'] = max(info['display_width'], abs(rect.width))
+                info['display_height'] = max(info['display_height'], abs(rect.height))
+    return list(images.values())
+
+
+def skip_reason(info: Dict) -> Optional[str]:
+    """返回图片不应重新编码的原因，可以处理时返回None"""
+    # 带透明蒙版或本身是蒙版的图片重新编码会丢失透明信息
+    if info['smask'] or info['image_mask']:
+        return '透明蒙版'
+    if info['original_bytes'] < MIN_IMAGE_BYTES:
+        return '图片过小'
+    return None
+
+
+def target_size(info: Dict, target_dpi: Optional[int]) -> tuple:
+    """
+    按目标DPI计算图片的目标像素尺寸
+
+    图片只会缩小，不会放大；未在页面上显示的图片保持原尺寸。
+    """
+    width, height = info['width'], info['height']
+    if not target_dpi or not info['display_width'] or not info['display_height']:
+        return width, height
+    scale = min(1.0, target_dpi * info['display_width'] / 72 / width,
+                target_dpi * info['display_height'] / 72 / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def bitonal_target_size(info: Dict, target_dpi: Optional[int]) -> tuple:
+    """二值化图片的目标像素尺寸，分辨率至少保留 BITONAL_MIN_DPI"""
+    return target_size(info, max(target_dpi, BITONAL_MIN_DPI) if target_dpi else None)
+
+
+def effective_dpi(info: Dict) -> float:
+    """图片在页面上按最大显示尺寸计算的实际分辨率"""
+    if not info['display_width']:
+        return 0.0
+    return info['width'] * 72 / info['display_width']
+
+
+def decode_image(pdf_document: fitz.Document, xref: int) -> Image.Image:
+    """将PDF中的图片解码为RGB或灰度的Pillow图像"""
+    pix = fitz.Pixmap(pdf_document, xref)
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    mode = 'L' if pix.n == 1 else 'RGB'
+    return Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+
+
+def decode_image_cached(pdf_document: fitz.Document, xref: int) -> Image.Image:
+    """带缓存的图片解码，缓存超过上限时淘汰最久未用的图片"""
+    global _decoded_cache_bytes
+    image = _decoded_cache.get(xref)
+    if image is not None:
+        _decoded_cache.move_to_end(xref)
+        return image
+    image = decode_image(pdf_document, xref)
+    size = image.width * image.height * len(image.getbands())
+    if size <= _decoded_cache_limit:
+        _decoded_cache[xref] = image
+        _decoded_cache_bytes += size
+        while _decoded_cache_bytes > _decoded_cache_limit:
+            _, old = _decoded_cache.popitem(last=False)
+            _decoded_cache_bytes -= old.width * old.height * len(old.getbands())
+    return image
+
+
+def clear_decoded_cache():
+    """清空解码图片缓存"""
+    global _decoded_cache_bytes
+    _decoded_cache.clear()
+    _decoded_cache_bytes = 0
+
+
+def is_bitonal(image: Image.Image, fraction: float = BITONAL_FRACTION) -> bool:
+    """
+    判断图片是否接近黑白（直方图检测）
+
+    彩色图片要求绝大多数像素接近灰色，灰度直方图中
+    最暗和最亮各四分之一区间的像素合计占比不低于 fraction。
+    """
+    factor = max(1, int(math.sqrt(image.width * image.height / _BITONAL_SAMPLE_PIXELS)))
+    if factor > 1:
+        image = image.reduce(factor)
+    if image.mode == 'RGB':
+        pixels = np.asarray(image)
+        spread = pixels.max(axis=2).astype(np.int16) - pixels.min(axis=2)
+        if np.count_nonzero(spread < 48) < fraction * spread.size:
+            return False
+        image = image.convert('L')
+    histogram = np.bincount(np.asarray(image).ravel(), minlength=256)
+    return histogram[:64].sum() + histogram[192:].sum() >= fraction * histogram.sum()
+
+
+def otsu_threshold(histogram: np.ndarray) -> int:
+    """按Otsu方法计算灰度阈值，不大于阈值的像素视为黑色"""
+    levels = np.arange(256)
+    weight = np.cumsum(histogram)[:-1].astype(np.float64)
+    cumulative = np.cumsum(histogram * levels).astype(np.float64)
+    total, total_mean = float(histogram.sum()), cumulative[-1]
+    background = total - weight
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = weight * background * (cumulative[:-1] / weight
+                                          - (total_mean - cumulative[:-1]) / background) ** 2
+    return int(np.argmax(np.nan_to_num(variance)))
+
+
+def to_bitonal(image: Image.Image, size: Optional[tuple] = None) -> Image.Image:
+    """缩放到目标尺寸后按Otsu阈值二值化，返回1位图像"""
+    gray = image.convert('L')
+    if size and gray.size != tuple(size):
+        gray = gray.resize(size, Image.LANCZOS)
+    pixels = np.asarray(gray)
+    threshold = otsu_threshold(np.bincount(pixels.ravel(), minlength=256))
+    return Image.fromarray(pixels > threshold)
+
+
+def encode_g4_tiff(bitonal: Image.Image, dpi: Optional[tuple] = None) -> bytes:
+    """将1位图像编码为单条带的CCITT G4 TIFF文件"""
+    buffer = io.BytesIO()
+    # 整幅图片写成一个条带，流数据可以直接嵌入PDF
+    options = {'compression': 'group4', 'tiffinfo': {278: bitonal.height}}
+    if dpi:
+        options['dpi'] = dpi
+    bitonal.save(buffer, 'TIFF', **options)
+    return buffer.getvalue()
+
+
+def encode_ccitt(bitonal: Image.Image) -> tuple:
+    """
+    将1位图像编码为CCITT G4数据
+
+    Returns:
+        (G4数据, 是否黑色为1)
+    """
+    tiff = encode_g4_tiff(bitonal)
+    parsed = Image.open(io.BytesIO(tiff))
+    offset, length = parsed.tag_v2[273][0], parsed.tag_v2[279][0]
+    # 光度解释为1（BlackIsZero）时编码位与PDF默认约定相反
+    return tiff[offset:offset + length], parsed.tag_v2.get(262) == 1
+
+
+def replace_with_ccitt(pdf_document: fitz.Document, xref: int, data: bytes,
+                       width: int, height: int, black_is_1: bool):
+    """用CCITT G4数据原地替换图片对象"""
+    pdf_document.update_stream(xref, data, compress=False)
+    params = f"<</K -1/Columns {width}/Rows {height}{'/BlackIs1 true' if black_is_1 else ''}>>"
+    for key, value in (('Filter', '/CCITTFaxDecode'), ('DecodeParms', params),
+                       ('Width', str(width)), ('Height', str(height)),
+                       ('ColorSpace', '/DeviceGray'), ('BitsPerComponent', '1')):
+        pdf_document.xref_set_key(xref, key, value)
+    for key in ('Decode', 'Mask'):
+        if pdf_document.xref_get_key(xref, key)[0] != 'null':
+            pdf_document.xref_set_key(xref, key, 'null')
+
+
+def estimate_image_bytes(pdf_document: fitz.Document, images: List[Dict],
+                         target_dpi: Optional[int], quality: int, codec: str,
+                         profile: str = 'default') -> int:
+    """
+    试算给定设置下全部图片编码后的总字节数（不修改文档）
+
+    与实际替换规则一致：无法处理或重新编码后未变小的图片按原大小计算；
+    profile 为 bitonal 时接近黑白的图片按CCITT G4编码计算。
+    """
+    total = 0
+    for info in images:
+        if skip_reason(info):
+            total += info['original_bytes']
+            continue
+        try:
+            image = decode_image_cached(pdf_document, info['xref'])
+            if profile == 'bitonal' and is_bitonal(image):
+                data = encode_ccitt(to_bitonal(image, bitonal_target_size(info, target_dpi)))[0]
+            else:
+                data = encode_image(image, target_size(info, target_dpi), codec, quality)
+        except Exception:
+            total += info['original_bytes']
+            continue
+        total += min(len(data), info['original_bytes'])
+    return total
+
+
+def estimate_worker(task: tuple) -> int:
+    """工作进程中试算一组设置，任务为 (图片列表, 目标DPI, 质量, 编码方式, 压缩配置)"""
+    images, target_dpi, quality, codec, profile = task
+    return estimate_image_bytes(_worker_document, images, target_dpi, quality, codec, profile)
+
+
+def encode_image(image: Image.Image, size: tuple, codec: str, quality: int) -> bytes:
+    """按目标尺寸和编码方式重新编码图片"""
+    if image.size != tuple(size):
+        image = image.resize(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    if codec == 'JPEG':
+        image.save(buffer, 'JPEG', quality=quality, optimize=True)
+    elif codec == 'JPX':
+        image.save(buffer, 'JPEG2000', quality_mode='rates',
+                   quality_layers=[max(1, (100 - quality) / 2)])
+    else:
+        # PNG数据由PyMuPDF转为Flate压缩的图片对象
+        image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def optimize_image(pdf_document: fitz.Document, task: tuple) -> tuple:
+    """
+    重新编码单个图片
+
+    Args:
+        pdf_document: 已打开的PDF文档
+        task: (xref, 目标宽度, 目标高度, 编码方式, 质量, 原始字节数, 二值化尺寸或None)
+              二值化尺寸不为None时，接近黑白的图片改用CCITT G4编码
+
+    Returns:
+        (xref, 新图片数据或None, 错误信息或None, CCITT参数或None)，
+        新数据不比原来小时返回None；CCITT参数为 (宽度, 高度, 是否黑色为1)
+    """
+    xref, width, height, codec, quality, original_bytes, bitonal_size = task
+    ccitt = None
+    try:
+        image = decode_image(pdf_document, xref)
+        if bitonal_size and is_bitonal(image):
+            data, black_is_1 = encode_ccitt(to_bitonal(image, bitonal_size))
+            ccitt = tuple(bitonal_size) + (black_is_1,)
+        else:
+            data = encode_image(image, (width, height), codec, quality)
+    except Exception as e:
+        return xref, None, str(e), None
+    if len(data) >= original_bytes:
+        return xref, None, None, None
+    return xref, data, None, ccitt
+
+
+def init_optimizer_worker(input_file: str, workers: int = 1):
+    """
+    图片优化工作进程初始化：在进程内打开一次PDF文档
+
+    Args:
+        input_file: PDF文件路径
+        workers: 工作进程总数，各进程的解码缓存上限为 DECODED_CACHE_BYTES 的 1/workers
+    """
+    global _worker_document, _decoded_cache_limit
+    _worker_document = fitz.open(input_file)
+    _decoded_cache_limit = DECODED_CACHE_BYTES // max(1, workers)
+
+
+def optimize_image_worker(task: tuple) -> tuple:
+    """工作进程中重新编码单个图片"""
+    return optimize_image(_worker_document, task)
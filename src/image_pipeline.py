@@ -0,0 +1,165 @@
+import io
+from typing import Dict, Iterable, Iterator, Tuple, Union
+
+from PIL import Image, ImageOps
+
+import image_cleanup
+import image_optimizer
+from pdf_stream_writer import image_dpi
+
+# EXIF方向标签
+_EXIF_ORIENTATION = 0x0112
+
+# 预处理默认选项
+DEFAULT_OPTIONS = {
+    'max_dpi': None,       # 超过该分辨率的图片按比例缩小，None表示不缩小
+    'jpeg_quality': 85,    # 重新编码时的JPEG质量
+    'reencode': True,      # 其余图片是否规范化并重新编码为JPEG，False表示原样写入
+    'bitonal': False,      # 接近黑白的图片是否二值化为CCITT G4
+    'autocrop': False,     # 是否裁掉四周空白
+    'deskew': False        # 是否校正倾斜
+}
+
+
+def make_options(**overrides) -> Dict:
+    """在默认选项基础上生成预处理选项"""
+    options = dict(DEFAULT_OPTIONS)
+    for key, value in overrides.items():
+        if key not in options:
+            raise ValueError(f"未知的预处理选项: {key}")
+        options[key] = value
+    return options
+
+
+def frame_count(image: Image.Image) -> int:
+    """写入PDF的帧数；MPO（手机拍摄的JPEG）的附加帧是预览图，只算第一帧"""
+    return 1 if image.format == 'MPO' else getattr(image, 'n_frames', 1)
+
+
+def bitonal_applies(image: Image.Image, options: Dict) -> bool:
+    """判断这一帧是否会被二值化为CCITT G4（已是1位图像或直方图接近黑白）"""
+    if not options['bitonal']:
+        return False
+    if image.mode == '1':
+        return True
+    return image_optimizer.is_bitonal(image if image.mode in ('L', 'RGB') else image.convert('RGB'))
+
+
+def needs_processing(image: Image.Image, options: Dict) -> bool:
+    """判断这一帧除重新编码外是否还需要处理（摆正、裁边、缩小或二值化）"""
+    if options['autocrop'] or options['deskew']:
+        return True
+    if options['max_dpi'] and image_dpi(image)[0] > options['max_dpi']:
+        return True
+    return bitonal_applies(image, options)
+
+
+def is_compliant(image: Image.Image, options: Dict) -> bool:
+    """
+    判断图片能否不经处理直接写入PDF
+
+    满足条件的JPEG原样嵌入，不会重新编码；二值化只排除确实接近黑白的图片。
+    不重新编码时（reencode 为False），任何不需要处理的图片都原样写入。
+    """
+    if not options['reencode']:
+        return not needs_processing(image, options)
+    if image.format not in ('JPEG', 'MPO') or image.mode not in ('L', 'RGB'):
+        return False
+    if image.getexif().get(_EXIF_ORIENTATION, 1) != 1:
+        return False
+    return not needs_processing(image, options)
+
+
+def process_frame(frame: Image.Image, options: Dict) -> bytes:
+    """
+    对单帧图片执行预处理并编码
+
+    依次执行 EXIF方向校正、颜色模式规范化、摆正与裁边、按最大DPI缩小，
+    最后编码为JPEG（黑白图片编码为CCITT G4 TIFF）。
+
+    Returns:
+        bytes: 编码后的图片文件数据
+    """
+    dpi = image_dpi(frame)[0]
+    image = ImageOps.exif_transpose(frame)
+
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        image = Image.new('RGB', image.size, 'white')
+        image.paste(rgba, mask=rgba.getchannel('A'))
+    elif image.mode.startswith('I'):
+        image = image.convert('I').point(lambda value: value / 256).convert('L')
+    elif image.mode not in ('1', 'L', 'RGB'):
+        image = image.convert('RGB')
+
+    if options['autocrop'] or options['deskew']:
+        bilevel = image.mode == '1'
+        image = image_cleanup.clean_image(image.convert('L') if bilevel else image,
+                                          autocrop=options['autocrop'], deskew=options['deskew'])
+        if bilevel:
+            image = image.convert('1', dither=Image.Dither.NONE)
+
+    max_dpi = options['max_dpi']
+    if max_dpi and dpi > max_dpi:
+        scale = max_dpi / dpi
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS)
+        dpi = max_dpi
+
+    if image.mode == '1':
+        return image_optimizer.encode_g4_tiff(image, (dpi, dpi))
+    if options['bitonal'] and image_optimizer.is_bitonal(image):
+        return image_optimizer.encode_g4_tiff(image_optimizer.to_bitonal(image), (dpi, dpi))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=options['jpeg_quality'], dpi=(dpi, dpi), optimize=True)
+    return buffer.getvalue()
+
+
+def frame_tasks(image_files: Iterable[str], options: Dict) -> Iterator[Tuple[str, int, Dict]]:
+    """
+    为每个图片文件的每一帧生成一个预处理任务
+
+    只读取文件头获得帧数，不解码像素。多帧TIFF拆成逐帧的任务，
+    结果按帧依次产出并写入PDF，不会一次持有整个文件的全部帧。
+
+    Args:
+        image_files: 图片文件路径
+        options: 预处理选项
+
+    Yields:
+        (图片文件路径, 帧序号, 预处理选项)
+    """
+    for image_file in image_files:
+        with Image.open(image_file) as image:
+            frames = frame_count(image)
+        for index in range(frames):
+            yield image_file, index, options
+
+
+def prepare_image(task: tuple) -> Union[str, bytes]:
+    """
+    预处理图片文件中的一帧（可在工作进程中执行）
+
+    Args:
+        task: (图片文件路径, 帧序号, 预处理选项)
+
+    Returns:
+        Union[str, bytes]: 写入PDF的图片来源；无需处理的单帧图片返回原文件路径，
+        多帧文件中无需处理的帧返回该帧的无损TIFF数据，否则返回编码后的图片数据
+    """
+    image_file, index, options = task
+    with Image.open(image_file) as image:
+        single = frame_count(image) == 1
+        image.seek(index)
+        if is_compliant(image, options):
+            # 多帧文件不能返回路径（会写入全部帧），只取出这一帧
+            return image_file if single else _lossless_frame(image)
+        return process_frame(image, options)
+
+
+def _lossless_frame(frame: Image.Image) -> bytes:
+    """把一帧无损保存为单帧TIFF（按EXIF摆正，保留颜色模式和分辨率）"""
+    dpi = image_dpi(frame)
+    buffer = io.BytesIO()
+    ImageOps.exif_transpose(frame).save(buffer, 'TIFF', compression='tiff_adobe_deflate', dpi=dpi)
+    return buffer.getvalue()
@@ -0,0 +1,83 @@
+import struct
+import zlib
+from typing import BinaryIO, Optional
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# 通道数对应的PNG颜色类型
+_PNG_COLOR_TYPES = {1: 0, 3: 2, 4: 6}
+
+
+class StreamingPNGWriter:
+    """逐条带写入的PNG编码器，内存占用只与单个条带大小有关"""
+
+    def __init__(self, stream: BinaryIO, width: int, height: int, channels: int = 3,
+                 dpi: Optional[int] = None, chunk_size: int = 1 << 16):
+        """
+        Args:
+            stream: 可写的二进制输出流
+            width: 图片宽度（像素）
+            height: 图片高度（像素）
+            channels: 通道数 (1=灰度, 3=RGB, 4=RGBA)
+            dpi: 写入pHYs块的分辨率，None表示不写
+            chunk_size: 每个IDAT块的目标字节数
+        """
+        if channels not in _PNG_COLOR_TYPES:
+            raise ValueError(f"不支持的通道数: {channels}")
+        self.stream = stream
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(6)
+        self._pending = bytearray()
+
+        stream.write(PNG_SIGNATURE)
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8,
+                                               _PNG_COLOR_TYPES[channels], 0, 0, 0))
+        if dpi:
+            ppm = int(round(dpi / 0.0254))
+            self._write_chunk(b'pHYs', struct.pack('>IIB', ppm, ppm, 1))
+
+    def write_rows(self, samples, stride: int):
+        """
+        写入若干行像素
+
+        Args:
+            samples: 连续存放的像素数据（bytes、memoryview等）
+            stride: 每行字节数
+        """
+        samples = memoryview(samples)
+        row_bytes = self.width * self.channels
+        rows = len(samples) // stride
+        # 每行前加滤波类型字节0（不滤波）
+        buffer = bytearray(rows * (row_bytes + 1))
+        for row in range(rows):
+            offset = row * (row_bytes + 1)
+            buffer[offset + 1:offset + 1 + row_bytes] = samples[row * stride:row * stride + row_bytes]
+        self.rows_written += rows
+        self._pending += self._compressor.compress(bytes(buffer))
+        self._flush_idat()
+
+    def close(self):
+        """结束压缩流并写入IEND块"""
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG行数不匹配: 已写入 {self.rows_written}, 应为 {self.height}")
+        self._pending += self._compressor.flush()
+        self._flush_idat(final=True)
+        self._write_chunk(b'IEND', b'')
+
+    def _flush_idat(self, final: bool = False):
+        """将累积的压缩数据写成IDAT块"""
+        while len(self._pending) >= self.chunk_size or (final and self._pending):
+            data = bytes(self._pending[:self.chunk_size])
+            del self._pending[:self.chunk_size]
+            self._write_chunk(b'IDAT', data)
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes):
+        """写入一个PNG块"""
+        self.stream.write(struct.pack('>I', len(data)))
+        self.stream.write(chunk_type)
+        self.stream.write(data)
+        self.stream.write(struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff))
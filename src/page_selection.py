@@ -0,0 +1,196 @@
+import bisect
+import itertools
+import re
+from collections.abc import Sequence
+from typing import Iterable, Iterator, List, Tuple, Union
+
+# 表示"最后一页"的端点
+LAST = -1
+
+# 接受页码的参数类型：从1开始的页码列表，或页码范围表达式
+PageRange = Union[List[int], str]
+
+# 单个范围项: 起始页、可选的"-"与结束页、可选的":步长"
+_ITEM_PATTERN = re.compile(r'^(\d+|last)?\s*(-)?\s*(\d+|last)?\s*(?::\s*(\d+))?$')
+
+
+class PageRanges(Sequence):
+    """
+    以 range 对象列表表示的页面选择（页面索引从0开始）
+
+    长度、包含判断、按位置取页和切分连续区段的开销都只与范围个数有关，
+    不会把 "1-100000" 展开成列表。
+    """
+
+    def __init__(self, ranges: Iterable[range]):
+        self.ranges = [r for r in ranges if len(r)]
+        # 各范围之前的页面总数，用于按位置二分查找
+        self._offsets = list(itertools.accumulate((len(r) for r in self.ranges), initial=0))
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[int]) -> 'PageRanges':
+        """把页面索引序列压缩为连续递增区段"""
+        if isinstance(pages, PageRanges):
+            return pages
+        if isinstance(pages, range):
+            return cls([pages])
+        runs = []
+        for page in pages:
+            if runs and page == runs[-1][1]:
+                runs[-1][1] = page + 1
+            else:
+                runs.append([page, page + 1])
+        return cls(range(start, stop) for start, stop in runs)
+
+    def __len__(self) -> int:
+        return self._offsets[-1]
+
+    def __iter__(self) -> Iterator[int]:
+        return itertools.chain.from_iterable(self.ranges)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('页面位置超出范围')
+        position = bisect.bisect_right(self._offsets, index) - 1
+        return self.ranges[position][index - self._offsets[position]]
+
+    def __contains__(self, page) -> bool:
+        return any(page in r for r in self.ranges)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PageRanges):
+            return self.runs() == other.runs()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PageRanges({self.ranges!r})"
+
+    def runs(self) -> List[Tuple[int, int]]:
+        """
+        切分为连续递增的区段 [(起始, 结束), ...]（含结束页）
+
+        步长为1的范围整体作为一个区段，相邻区段会合并；
+        带步长或倒序的范围只能逐页成段。
+        """
+        runs = []
+        for r in self.ranges:
+            pieces = [(r.start, r.stop - 1)] if r.step == 1 else [(page, page) for page in r]
+            for start, end in pieces:
+                if runs and start == runs[-1][1] + 1:
+                    runs[-1] = (runs[-1][0], end)
+                else:
+                    runs.append((start, end))
+        return runs
+
+
+class PageSpec:
+    """
+    编译后的页码范围表达式
+
+    语法（页码从1开始，逗号分隔多项，按书写顺序输出）:
+        5           单页
+        1-10        连续范围；10-1 为倒序
+        8-          第8页到最后一页；-3 为第1页到第3页
+        last        最后一页，可作为范围端点，如 last-1 为全部页面倒序
+        1-10:2      带步长的范围（1,3,5,7,9）
+        odd, even   所有奇数页、偶数页
+
+    解析只做一次；resolve 按文档页数检查所有页码并生成 PageRanges。
+    """
+
+    def __init__(self, spec: str):
+        """
+        Args:
+            spec: 页码范围表达式
+
+        Raises:
+            ValueError: 表达式格式错误
+        """
+        self.spec = spec
+        # (起始页, 结束页, 步长)，端点可为 LAST；odd/even 记为字符串
+        self.items = []
+        for part in spec.split(','):
+            part = part.strip().lower()
+            if not part:
+                continue
+            if part in ('odd', 'even'):
+                self.items.append(part)
+                continue
+            match = _ITEM_PATTERN.match(part)
+            if not match or not (match.group(1) or match.group(3)):
+                raise ValueError(f"无效的页码范围: {part}")
+            start, dash, end, step = match.groups()
+            if not dash and end:
+                raise ValueError(f"无效的页码范围: {part}")
+            step = int(step) if step else 1
+            if step < 1 or (step > 1 and not dash):
+                raise ValueError(f"无效的步长: {part}")
+            start = self._endpoint(start, 1)
+            end = self._endpoint(end, LAST) if dash else start
+            self.items.append((start, end, step))
+        if not self.items:
+            raise ValueError("页码范围为空")
+
+    @staticmethod
+    def _endpoint(token, default: int) -> int:
+        """解析范围端点"""
+        if not token:
+            return default
+        if token == 'last':
+            return LAST
+        page = int(token)
+        if page < 1:
+            raise ValueError(f"页码必须从1开始: {page}")
+        return page
+
+    def resolve(self, page_count: int) -> PageRanges:
+        """
+        按文档页数生成页面选择
+
+        Args:
+            page_count: 文档总页数
+
+        Returns:
+            PageRanges: 页面索引（从0开始）
+
+        Raises:
+            ValueError: 页码超出文档页数
+        """
+        ranges = []
+        for item in self.items:
+            if item == 'odd':
+                ranges.append(range(0, page_count, 2))
+                continue
+            if item == 'even':
+                ranges.append(range(1, page_count, 2))
+                continue
+            start, end, step = (page_count if value == LAST else value for value in item)
+            for page in (start, end):
+                if not 1 <= page <= page_count:
+                    raise ValueError(f"页码超出范围: {page}（共 {page_count} 页）")
+            if start <= end:
+                ranges.append(range(start - 1, end, step))
+            else:
+                ranges.append(range(start - 1, end - 2, -step))
+        return PageRanges(ranges)
+
+    def __repr__(self) -> str:
+        return f"PageSpec({self.spec!r})"
+
+
+def select_pages(spec: str, page_count: int) -> PageRanges:
+    """
+    解析页码范围表达式并按页数生成页面选择
+
+    Args:
+        spec: 页码范围表达式，如 "1-3,5,8-last:2"
+        page_count: 文档总页数
+
+    Returns:
+        PageRanges: 页面索引（从0开始）
+    """
+    return PageSpec(spec).resolve(page_count)
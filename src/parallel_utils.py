@@ -0,0 +1,74 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+
+def default_workers() -> int:
+    """返回默认的工作进程数（CPU核心数）"""
+    return os.cpu_count() or 1
+
+
+def split_into_shards(items: Sequence[Any], shard_count: int) -> List[List[Any]]:
+    """
+    将序列按顺序切分为若干连续分片
+
+    Args:
+        items: 待切分的序列
+        shard_count: 分片数量
+
+    Returns:
+        List[List]: 分片列表，保持原有顺序
+    """
+    items = list(items)
+    if not items:
+        return []
+    shard_count = max(1, min(shard_count, len(items)))
+    size, extra = divmod(len(items), shard_count)
+    shards = []
+    start = 0
+    for i in range(shard_count):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(items[start:end])
+        start = end
+    return shards
+
+
+def ordered_map(func: Callable[[Any], Any], tasks: Iterable[Any], workers: Optional[int] = None,
+                initializer: Optional[Callable] = None, initargs: tuple = (),
+                window: Optional[int] = None, use_threads: bool = False) -> Iterator[Any]:
+    """
+    并行执行任务，并按提交顺序逐个产出结果
+
+    同一时刻最多只有 window 个任务在执行或等待取走，
+    因此结果占用的内存是有界的。
+
+    Args:
+        func: 任务函数（进程池模式下必须是模块级函数）
+        tasks: 任务参数迭代器，每个元素作为 func 的唯一参数
+        workers: 工作进程/线程数，None表示CPU核心数
+        initializer: 每个工作进程启动时调用的初始化函数
+        initargs: 初始化函数参数
+        window: 同时在途的最大任务数，None表示 workers * 2
+        use_threads: 是否使用线程池代替进程池
+
+    Yields:
+        func 的返回值，顺序与 tasks 一致
+    """
+    workers = workers or default_workers()
+    window = max(1, window or workers * 2)
+    executor_class = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+
+    with executor_class(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        try:
+            for task in tasks:
+                pending.append(executor.submit(func, task))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # 提前退出时取消尚未开始的任务
+            for future in pending:
+                future.cancel()
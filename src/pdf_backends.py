@@ -0,0 +1,277 @@
+import io
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import fitz  # PyMuPDF
+from PyPDF2 import PdfMerger, PdfReader, PdfWriter
+
+from page_selection import PageRanges
+from pdf_prune import prune_data, prune_file, prune_resources
+from pdf_stream_merge import StreamingMerger, stream_merge
+
+# 各操作的默认后端，依据 benchmarks/bench_backends.py 的结果选择：
+# PyMuPDF 在合并、分割和提取上都比 PyPDF2 快一个数量级
+DEFAULT_BACKENDS = {
+    'merge': 'pymupdf',
+    'split': 'pymupdf',
+    'extract': 'pymupdf'
+}
+
+# 合并输入: (文件路径, 页面索引列表或None)
+MergeSource = Tuple[str, Optional[List[int]]]
+
+# 分割输出: (输出文件路径, 页面索引列表)
+PageGroup = Tuple[str, Sequence[int]]
+
+# 分割进度回调: (已写出的文件数, 文件总数)
+ProgressCallback = Callable[[int, int], None]
+
+
+class PyPDF2Backend:
+    """纯Python的PyPDF2后端，合并时保留书签"""
+
+    name = 'pypdf2'
+
+    def page_count(self, input_file: str) -> int:
+        """返回文件页数"""
+        with open(input_file, 'rb') as f:
+            return len(PdfReader(f).pages)
+
+    def merge(self, sources: List[MergeSource], output_file: str) -> int:
+        """按顺序合并输入文件的页面，返回总页数"""
+        merger = PdfMerger()
+        files = []
+        try:
+            for file_path, pages in sources:
+                f = open(file_path, 'rb')
+                files.append(f)
+                if pages is None:
+                    merger.append(f)
+                else:
+                    # PdfMerger 不能正确处理页码列表，按连续区段以元组追加
+                    for start, end in _runs(pages):
+                        merger.append(f, pages=(start, end + 1))
+            with open(output_file, 'wb') as output:
+                merger.write(output)
+            return len(merger.pages)
+        finally:
+            merger.close()
+            for f in files:
+                f.close()
+
+    def write_pages(self, input_file: str, groups: List[PageGroup],
+                    progress_callback: Optional[ProgressCallback] = None,
+                    prune: bool = False, sink=None) -> List[Dict]:
+        """从一个输入文件写出多个只含指定页面的文件（或归档条目），返回各文件的大小报告"""
+        reports = []
+        with open(input_file, 'rb') as f:
+            reader = PdfReader(f)
+            for index, (output_file, pages) in enumerate(groups):
+                writer = PdfWriter()
+                for page in pages:
+                    writer.add_page(reader.pages[page])
+                if sink is None:
+                    with open(output_file, 'wb') as output:
+                        writer.write(output)
+                    reports.append(_chunk_report(output_file, prune_file(output_file) if prune else None))
+                else:
+                    buffer = io.BytesIO()
+                    writer.write(buffer)
+                    reports.append(_add_entry(sink, output_file, buffer.getvalue(), prune))
+                if progress_callback:
+                    progress_callback(index + 1, len(groups))
+        return reports
+
+
+class PyMuPDFBackend:
+    """基于 PyMuPDF insert_pdf 的后端，合并时按页码映射保留书签"""
+
+    name = 'pymupdf'
+
+    # 保存选项：只清理未引用对象，不重新压缩数据流
+    SAVE_OPTIONS = {'garbage': 1, 'deflate': False}
+
+    def page_count(self, input_file: str) -> int:
+        """返回文件页数"""
+        with fitz.open(input_file) as pdf_document:
+            return len(pdf_document)
+
+    def merge(self, sources: List[MergeSource], output_file: str) -> int:
+        """按顺序合并输入文件的页面，返回总页数"""
+        with fitz.open() as output:
+            toc = []
+            for file_path, pages in sources:
+                with fitz.open(file_path) as pdf_document:
+                    start = len(output)
+                    self._insert(output, pdf_document, pages)
+                    # insert_pdf 不复制书签，按各输入在输出中的页码重新建立
+                    toc.extend(shift_toc(pdf_document.get_toc(simple=False), pages, start))
+            if toc:
+                output.set_toc(toc)
+            output.save(output_file, **self.SAVE_OPTIONS)
+            return len(output)
+
+    def write_pages(self, input_file: str, groups: List[PageGroup],
+                    progress_callback: Optional[ProgressCallback] = None,
+                    prune: bool = False, sink=None) -> List[Dict]:
+        """从一个输入文件写出多个只含指定页面的文件（或归档条目），返回各文件的大小报告"""
+        reports = []
+        with fitz.open(input_file) as pdf_document:
+            for index, (output_file, pages) in enumerate(groups):
+                removed = 0
+                with fitz.open() as output:
+                    self._insert(output, pdf_document, pages)
+                    # 在内存中裁剪后再保存，不需要重写文件
+                    if prune:
+                        removed = prune_resources(output)
+                    if sink is None:
+                        output.save(output_file, **self.SAVE_OPTIONS)
+                        reports.append(_chunk_report(output_file, os.path.getsize(output_file) + removed))
+                    else:
+                        data = output.tobytes(**self.SAVE_OPTIONS)
+                        reports.append(_add_entry(sink, output_file, data, False, len(data) + removed))
+                if progress_callback:
+                    progress_callback(index + 1, len(groups))
+        return reports
+
+    def _insert(self, output: fitz.Document, pdf_document: fitz.Document,
+                pages: Optional[Sequence[int]]):
+        """把页面按连续区段插入，减少 insert_pdf 调用次数"""
+        if pages is None:
+            output.insert_pdf(pdf_document)
+            return
+        for start, end in _runs(pages):
+            output.insert_pdf(pdf_document, from_page=start, to_page=end)
+
+
+class StreamBackend:
+    """流式后端：逐个输入写出并释放，内存与输入数量无关（不保留书签）"""
+
+    name = 'stream'
+
+    def page_count(self, input_file: str) -> int:
+        """返回文件页数"""
+        with open(input_file, 'rb') as f:
+            return len(PdfReader(f).pages)
+
+    def merge(self, sources: List[MergeSource], output_file: str) -> int:
+        """按顺序合并输入文件的页面，返回总页数"""
+        return stream_merge(sources, output_file)
+
+    def write_pages(self, input_file: str, groups: List[PageGroup],
+                    progress_callback: Optional[ProgressCallback] = None,
+                    prune: bool = False, sink=None) -> List[Dict]:
+        """从一个输入文件写出多个只含指定页面的文件（或归档条目），返回各文件的大小报告"""
+        reports = []
+        with open(input_file, 'rb') as source:
+            reader = PdfReader(source)
+            for index, (output_file, pages) in enumerate(groups):
+                if sink is None:
+                    with open(output_file, 'wb') as f:
+                        self._write_group(f, reader, input_file, pages)
+                    reports.append(_chunk_report(output_file, prune_file(output_file) if prune else None))
+                else:
+                    buffer = io.BytesIO()
+                    self._write_group(buffer, reader, input_file, pages)
+                    reports.append(_add_entry(sink, output_file, buffer.getvalue(), prune))
+                if progress_callback:
+                    progress_callback(index + 1, len(groups))
+        return reports
+
+    def _write_group(self, f, reader: PdfReader, input_file: str, pages: Sequence[int]):
+        """把一组页面流式写入已打开的输出"""
+        merger = StreamingMerger(f)
+        merger.append_reader(reader, input_file, list(pages))
+        merger.close()
+
+
+BACKENDS = {backend.name: backend for backend in (PyPDF2Backend, PyMuPDFBackend, StreamBackend)}
+
+
+def get_backend(name: Optional[str], operation: str):
+    """
+    获取后端实例
+
+    Args:
+        name: 后端名称 (pypdf2, pymupdf, stream)，None表示使用该操作的默认后端
+        operation: 操作名称 (merge, split, extract)
+
+    Returns:
+        后端实例
+    """
+    name = name or DEFAULT_BACKENDS[operation]
+    if name not in BACKENDS:
+        raise ValueError(f"不支持的后端: {name}（可选: {', '.join(BACKENDS)}）")
+    return BACKENDS[name]()
+
+
+def _chunk_report(output_file: str, size_before: Optional[int]) -> Dict:
+    """分割输出的大小报告；未裁剪时裁剪前后大小相同"""
+    size_after = os.path.getsize(output_file)
+    return {
+        'file': output_file,
+        'size_before': size_after if size_before is None else size_before,
+        'size_after': size_after
+    }
+
+
+def _add_entry(sink, name: str, data: bytes, prune: bool, size_before: Optional[int] = None) -> Dict:
+    """
+    把一个分割输出写入归档，返回与 _chunk_report 格式相同的大小报告
+
+    write_pages 的 sink 是提供 add(名称, 数据) 的归档输出（见 archive_sink），
+    给定时 PageGroup 中的路径用作条目名称，不创建文件。
+    """
+    if prune:
+        data, size_before = prune_data(data)
+    sink.add(name, data)
+    return {
+        'file': name,
+        'size_before': len(data) if size_before is None else size_before,
+        'size_after': len(data)
+    }
+
+
+def shift_toc(toc: List[list], pages: Optional[Sequence[int]], start: int) -> List[list]:
+    """
+    把一个输入的书签映射到合并输出中的页码
+
+    书签指向未选中的页面（或没有页面目标）时丢弃，其子书签提升一级；
+    同一页被选中多次时指向第一次出现的位置。
+
+    Args:
+        toc: 输入文档的 get_toc(simple=False)
+        pages: 选中的页面索引序列，None表示全部页面
+        start: 该输入的第一页在输出中的位置
+
+    Returns:
+        List[list]: 可直接传给 set_toc 的书签列表
+    """
+    positions = None
+    if pages is not None:
+        positions = {}
+        for index, page in enumerate(pages):
+            positions.setdefault(page, start + index)
+
+    result = []
+    # 保留下来的各级祖先书签的原始层级
+    ancestors = []
+    for level, title, page_number, *rest in toc:
+        page = page_number - 1
+        if positions is None:
+            target = start + page if page >= 0 else None
+        else:
+            target = positions.get(page)
+        while ancestors and ancestors[-1] >= level:
+            ancestors.pop()
+        if target is None:
+            continue
+        ancestors.append(level)
+        destination = {key: value for key, value in rest[0].items() if key not in ('xref', 'page')} if rest else {}
+        result.append([len(ancestors), title, target + 1, destination])
+    return result
+
+
+def _runs(pages: Sequence[int]) -> List[Tuple[int, int]]:
+    """把页面索引序列切成连续递增的区段 [(起始, 结束), ...]"""
+    return PageRanges.from_pages(pages).runs()
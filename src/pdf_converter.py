@@ -1,27 +1,301 @@
+import io
+import json
+import math
 import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 import fitz  # PyMuPDF
 from PIL import Image
-import img2pdf
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple, Union
 import logging
 
+import image_optimizer
+import image_pipeline
+import pdf_dedup
+from archive_sink import ArchiveTarget, open_archive
+from image_stream import StreamingPNGWriter
+from page_selection import PageRange, PageSpec
+from parallel_utils import ordered_map
+from pdf_stream_writer import PAGE_SIZES, PDFStreamWriter, write_image_pages
+from render_cache import RenderCache
+from text_cache import TextCache, page_content_hash
+
+# 工作进程内打开的PDF文档（每个进程各自持有一份）
+_worker_document = None
+
+
+def _init_render_worker(input_file: str):
+    """渲染工作进程初始化：在进程内打开一次PDF文档"""
+    global _worker_document
+    _worker_document = fitz.open(input_file)
+
+
+class _TextExtractor:
+    """
+    逐分片提取页面文本，保存当前打开的文档、对象摘要缓存和文本缓存连接
+
+    连续处理同一文件的分片时复用已打开的文档。给定文本缓存路径时，先计算页面内容摘要，
+    只对缓存中没有的页面调用 get_text。每个串行提取过程使用自己的实例，
+    同一进程中同时进行的多个提取互不影响。
+    """
+
+    def __init__(self):
+        self._input_file = None
+        self._document = None
+        self._object_digests = {}
+        self._cache_path = None
+        self._connection = None
+
+    def extract(self, task: tuple) -> tuple:
+        """
+        提取一个页面分片的文本
+
+        Args:
+            task: (文件路径, 页面索引列表, 文本缓存路径或None)
+
+        Returns:
+            (文件路径, [(页码, 文本, 页面摘要, 是否来自缓存), ...], 错误信息或None)
+        """
+        input_file, pages, cache_path = task
+        try:
+            if self._input_file != input_file:
+                self._close_document()
+                self._document = fitz.open(input_file)
+                self._input_file = input_file
+            if cache_path and self._cache_path != cache_path:
+                self._close_cache()
+                self._connection = sqlite3.connect(cache_path)
+                self._cache_path = cache_path
+
+            results = []
+            for page_num in pages:
+                page_hash = None
+                text = None
+                if cache_path:
+                    page_hash = page_content_hash(self._document, page_num, self._object_digests)
+                    row = self._connection.execute(
+                        'SELECT text FROM page_text WHERE hash = ?', (page_hash,)).fetchone()
+                    text = row[0] if row else None
+                reused = text is not None
+                if not reused:
+                    text = self._document.load_page(page_num).get_text()
+                results.append((page_num + 1, text, page_hash, reused))
+            return input_file, results, None
+        except Exception as e:
+            return input_file, [], str(e)
+
+    def close(self):
+        """关闭打开的文档和文本缓存连接"""
+        self._close_document()
+        self._close_cache()
+
+    def _close_document(self):
+        """关闭当前文档并清空对象摘要缓存"""
+        if self._document is not None:
+            self._document.close()
+        self._input_file = None
+        self._document = None
+        self._object_digests = {}
+
+    def _close_cache(self):
+        """关闭文本缓存连接"""
+        if self._connection is not None:
+            self._connection.close()
+        self._cache_path = None
+        self._connection = None
+
+
+# 文本提取工作进程内的提取器（只在进程池的工作进程中使用）
+_worker_text_extractor = None
+
+
+def _init_text_worker():
+    """文本提取工作进程初始化：创建进程内的提取器"""
+    global _worker_text_extractor
+    _worker_text_extractor = _TextExtractor()
+
+
+def _extract_text_worker(task: tuple) -> tuple:
+    """工作进程中提取一个页面分片的文本"""
+    return _worker_text_extractor.extract(task)
+
+
+def _encode_pixmap(pix: fitz.Pixmap, format: str, raw: bool = False):
+    """将渲染结果编码为图片字节，raw为True时返回原始像素缓冲区"""
+    if raw:
+        return {'width': pix.width, 'height': pix.height,
+                'channels': pix.n, 'samples': pix.samples}
+    format = format.lower()
+    if format in ('png', 'jpg', 'jpeg'):
+        return pix.tobytes(format)
+    # MuPDF不支持的格式（如TIFF）交给Pillow编码
+    return pix.pil_tobytes(format=format.upper())
+
+
+def _render_page(pdf_document: fitz.Document, page_num: int, format: str, dpi: int,
+                 raw: bool = False, max_pixels: Optional[int] = None, oversize: str = 'tile',
+                 output_file: Optional[str] = None):
+    """
+    渲染单页并编码
+    
+    页面像素数超过 max_pixels 时，按 oversize 分块渲染或降低分辨率。
+    给定 output_file 时直接写入文件并返回文件路径，否则返回图片数据。
+    """
+    page = pdf_document.load_page(page_num)
+    zoom = dpi / 72
+    
+    if max_pixels:
+        pixels = page.rect.width * zoom * page.rect.height * zoom
+        if pixels > max_pixels:
+            # 分块模式依赖逐行PNG编码器，其他格式或原始缓冲区只能降低分辨率
+            if oversize == 'tile' and format.lower() == 'png' and not raw:
+                return _render_page_tiled(page, zoom, max_pixels, dpi, output_file)
+            zoom *= math.sqrt(max_pixels / pixels)
+    
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+    data = _encode_pixmap(pix, format, raw)
+    if output_file is None:
+        return data
+    with open(output_file, 'wb') as f:
+        f.write(data)
+    return output_file
+
+
+def _render_page_tiled(page: fitz.Page, zoom: float, max_pixels: int, dpi: int,
+                       output_file: Optional[str] = None):
+    """按水平条带渲染页面并逐条写入PNG编码器，单条带像素数不超过 max_pixels"""
+    mat = fitz.Matrix(zoom, zoom)
+    full = (page.rect * mat).irect
+    band_height = max(1, max_pixels // full.width)
+    # 页面内容只解析一次，各条带从显示列表渲染
+    display_list = page.get_displaylist()
+    
+    target = open(output_file, 'wb') if output_file else io.BytesIO()
+    try:
+        writer = StreamingPNGWriter(target, full.width, full.height, channels=3, dpi=dpi)
+        for y0 in range(full.y0, full.y1, band_height):
+            y1 = min(y0 + band_height, full.y1)
+            band = fitz.Pixmap(fitz.csRGB, fitz.IRect(full.x0, y0, full.x1, y1), False)
+            # 裁剪区域上下各多取一行，避免取整造成缺行，再按精确范围复制
+            clip = fitz.Rect(full.x0, y0 - 1, full.x1, y1 + 1) * ~mat
+            band.copy(display_list.get_pixmap(matrix=mat, clip=clip, alpha=False), band.irect)
+            writer.write_rows(band.samples_mv, band.stride)
+        writer.close()
+    finally:
+        if output_file:
+            target.close()
+    return output_file if output_file else target.getvalue()
+
+
+def _render_shard_worker(task: tuple) -> List[tuple]:
+    """
+    渲染一个页面分片，返回按页码排序的 (页码, 结果) 列表
+    
+    任务中给定输出目录时结果为写入的文件路径，否则为图片数据。
+    """
+    pages, format, dpi, raw, max_pixels, oversize, output_dir, page_count = task
+    results = []
+    for page_num in pages:
+        output_file = None
+        if output_dir is not None:
+            output_file = os.path.join(output_dir, _page_file_name(page_num + 1, page_count, format))
+        results.append((page_num + 1, _render_page(_worker_document, page_num, format, dpi, raw,
+                                                   max_pixels, oversize, output_file)))
+    return results
+
+
+def _render_renditions(pdf_document: fitz.Document, page_num: int, renditions: List[dict],
+                       format: str) -> List[tuple]:
+    """将页面解析为显示列表，再按各规格渲染，返回 [(名称, 图片数据), ...]"""
+    page = pdf_document.load_page(page_num)
+    display_list = page.get_displaylist()
+    results = []
+    for rendition in renditions:
+        zoom = rendition['dpi'] / 72
+        clip = fitz.Rect(rendition['clip']) if rendition.get('clip') else None
+        pix = display_list.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, alpha=False)
+        results.append((rendition['name'], _encode_pixmap(pix, format)))
+    return results
+
+
+def _render_renditions_worker(task: tuple) -> List[tuple]:
+    """渲染一个页面分片的所有规格，返回 [(页码, 名称, 图片数据), ...]"""
+    pages, renditions, format = task
+    return [(page_num + 1, name, data)
+            for page_num in pages
+            for name, data in _render_renditions(_worker_document, page_num, renditions, format)]
+
+
+def _page_file_name(page_number: int, page_count: int, format: str) -> str:
+    """生成页面图片文件名，位数随总页数增加以保证按名称排序即按页码排序"""
+    width = max(3, len(str(page_count)))
+    return f"page_{page_number:0{width}d}.{format.lower()}"
+
+
 class PDFConverter:
     """PDF格式转换工具类"""
     
-    def __init__(self):
+    def __init__(self, render_cache: Optional[RenderCache] = None,
+                 text_cache: Optional[TextCache] = None):
+        """
+        Args:
+            render_cache: 渲染结果缓存，None表示不使用缓存
+            text_cache: 文本提取缓存，None表示不使用缓存
+        """
         self.logger = logging.getLogger(__name__)
+        self.render_cache = render_cache
+        self.text_cache = text_cache
+        self.last_compress_report = []
+    
+    def iter_page_images(self, input_file: str, format: str = 'PNG', dpi: int = 300,
+                         page_range: Optional[PageRange] = None, raw: bool = False,
+                         workers: int = 1, max_pixels: Optional[int] = None,
+                         oversize: str = 'tile') -> Iterator[Tuple[int, Union[bytes, dict]]]:
+        """
+        逐页渲染PDF并产出内存中的图片数据
+        
+        每次只保留少量页面的数据，适合直接在内存中处理渲染结果的场景。
+        出错时抛出异常，由调用方处理。
+        
+        Args:
+            input_file: 输入PDF文件路径
+            format: 图片格式 (PNG, JPEG, TIFF)
+            dpi: 分辨率
+            page_range: 页码列表（从1开始）或页码范围表达式（如 "1-10:2,last"），None表示所有页面
+            raw: 为True时产出原始像素缓冲区字典
+                 (width, height, channels, samples)，不做编码
+            workers: 渲染进程数，大于1时多进程渲染，仍按页码顺序产出
+            max_pixels: 单页像素预算（RGB每像素3字节），None表示不限制
+            oversize: 超出预算时的处理方式，'tile'分块渲染（仅PNG），
+                      'downscale'降低分辨率
+            
+        Yields:
+            (页码, 图片数据): 页码从1开始，图片数据为编码后的字节或原始像素字典
+        """
+        yield from self._iter_pages(input_file, format, dpi, page_range, raw,
+                                    workers, max_pixels, oversize)
     
     def pdf_to_images(self, input_file: str, output_dir: str, format: str = 'PNG', 
-                     dpi: int = 300, page_range: Optional[List[int]] = None) -> bool:
+                     dpi: int = 300, page_range: Optional[PageRange] = None,
+                     workers: int = 1, max_pixels: Optional[int] = None,
+                     oversize: str = 'tile', archive: Optional[ArchiveTarget] = None) -> bool:
         """
         将PDF转换为图片
         
+        给定 archive 时各页图片渲染后立即作为条目写入一个ZIP/TAR归档，
+        不创建单独的文件，内存中只保留渲染窗口内的少量页面。
+        
         Args:
             input_file: 输入PDF文件路径
             output_dir: 输出目录
             format: 图片格式 (PNG, JPEG, TIFF)
             dpi: 分辨率
-            page_range: 页码范围，None表示所有页面
+            page_range: 页码列表（从1开始）或页码范围表达式（如 "1-10:2,last"），None表示所有页面
+            workers: 渲染进程数，大于1时每个进程打开各自的文档并渲染一段页面
+            max_pixels: 单页像素预算，超出时分块渲染或降低分辨率，None表示不限制
+            oversize: 超出预算时的处理方式 ('tile', 'downscale')
+            archive: 归档文件路径（.zip/.tar/.tar.gz）、可写二进制流或 ArchiveSink，
+                     给定时不使用 output_dir
             
         Returns:
             bool: 是否成功
@@ -31,47 +305,266 @@ class PDFConverter:
                 self.logger.error(f"文件不存在: {input_file}")
                 return False
             
+            if archive is not None:
+                with fitz.open(input_file) as pdf_document:
+                    page_count = len(pdf_document)
+                sink, owned = open_archive(archive)
+                try:
+                    for page_number, data in self._iter_pages(input_file, format, dpi, page_range,
+                                                              workers=workers, max_pixels=max_pixels,
+                                                              oversize=oversize):
+                        sink.add(_page_file_name(page_number, page_count, format), data)
+                finally:
+                    if owned:
+                        sink.close()
+                self.logger.info(f"已写入归档: {sink.entries} 个文件，共 {sink.bytes_written} 字节")
+                return True
+            
             os.makedirs(output_dir, exist_ok=True)
             
-            # 打开PDF文件
-            pdf_document = fitz.open(input_file)
+            # 直接写入文件，分块渲染的页面逐条带落盘而不在内存中汇总
+            for page_number, output_file in self._iter_pages(input_file, format, dpi, page_range,
+                                                             workers=workers, max_pixels=max_pixels,
+                                                             oversize=oversize, output_dir=output_dir):
+                self.logger.info(f"已生成: {output_file}")
             
-            # 确定要处理的页面
-            if page_range is None:
-                pages_to_process = range(len(pdf_document))
-            else:
-                pages_to_process = [p - 1 for p in page_range if 1 <= p <= len(pdf_document)]
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"PDF转图片失败: {str(e)}")
+            return False
+    
+    def iter_page_renditions(self, input_file: str, renditions: List[dict], format: str = 'PNG',
+                             page_range: Optional[PageRange] = None,
+                             workers: int = 1) -> Iterator[Tuple[int, str, bytes]]:
+        """
+        每页只解析一次，按多种分辨率或裁剪区域渲染
+        
+        页面内容先解析为显示列表，各规格都从显示列表渲染，
+        需要缩略图、预览图和高清图等多个尺寸时可省去重复解析。
+        出错时抛出异常，由调用方处理。
+        
+        Args:
+            input_file: 输入PDF文件路径
+            renditions: 渲染规格列表，如
+                        [{'name': 'thumb', 'dpi': 36}, {'name': 'full', 'dpi': 300,
+                          'clip': (0, 0, 300, 400)}]，clip为页面坐标下的裁剪区域（可选）
+            format: 图片格式 (PNG, JPEG, TIFF)
+            page_range: 页码列表（从1开始）或页码范围表达式（如 "1-10:2,last"），None表示所有页面
+            workers: 渲染进程数，大于1时多进程渲染，仍按页码顺序产出
             
-            # 设置缩放矩阵
-            mat = fitz.Matrix(dpi / 72, dpi / 72)
+        Yields:
+            (页码, 规格名称, 图片数据)
+        """
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"文件不存在: {input_file}")
+        names = [rendition['name'] for rendition in renditions]
+        if len(set(names)) != len(names):
+            raise ValueError("渲染规格名称不能重复")
+        
+        with fitz.open(input_file) as pdf_document:
+            pages_to_process = self._resolve_pages(len(pdf_document), page_range)
             
-            for page_num in pages_to_process:
-                page = pdf_document.load_page(page_num)
-                pix = page.get_pixmap(matrix=mat)
-                
-                # 保存图片
-                output_file = os.path.join(output_dir, f"page_{page_num + 1:03d}.{format.lower()}")
-                pix.save(output_file)
-                
-                self.logger.info(f"已生成: {output_file}")
+            if workers <= 1:
+                for page_num in pages_to_process:
+                    for name, data in _render_renditions(pdf_document, page_num, renditions, format):
+                        yield page_num + 1, name, data
+                return
+        
+        shard_size = max(1, min(4, len(pages_to_process) // (workers * 4)))
+        tasks = [(pages_to_process[i:i + shard_size], renditions, format)
+                 for i in range(0, len(pages_to_process), shard_size)]
+        for results in ordered_map(_render_renditions_worker, tasks, workers,
+                                   initializer=_init_render_worker,
+                                   initargs=(input_file,)):
+            yield from results
+    
+    def pdf_to_image_renditions(self, input_file: str, output_dir: str, renditions: List[dict],
+                                format: str = 'PNG', page_range: Optional[PageRange] = None,
+                                workers: int = 1, archive: Optional[ArchiveTarget] = None) -> bool:
+        """
+        将PDF每页按多种规格转换为图片，文件名为 page_NNN_<规格名称>.<格式>
+        
+        Args:
+            input_file: 输入PDF文件路径
+            output_dir: 输出目录
+            renditions: 渲染规格列表，格式见 iter_page_renditions
+            format: 图片格式 (PNG, JPEG, TIFF)
+            page_range: 页码列表（从1开始）或页码范围表达式（如 "1-10:2,last"），None表示所有页面
+            workers: 渲染进程数
+            archive: 归档文件路径、可写二进制流或 ArchiveSink，给定时各图片写入归档，不使用 output_dir
+            
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            if not os.path.exists(input_file):
+                self.logger.error(f"文件不存在: {input_file}")
+                return False
+            
+            sink, owned = open_archive(archive) if archive is not None else (None, False)
+            if sink is None:
+                os.makedirs(output_dir, exist_ok=True)
+            
+            with fitz.open(input_file) as pdf_document:
+                page_count = len(pdf_document)
+            
+            try:
+                for page_number, name, data in self.iter_page_renditions(input_file, renditions, format,
+                                                                         page_range, workers):
+                    base, ext = os.path.splitext(_page_file_name(page_number, page_count, format))
+                    file_name = f"{base}_{name}{ext}"
+                    if sink is not None:
+                        sink.add(file_name, data)
+                        continue
+                    output_file = os.path.join(output_dir, file_name)
+                    with open(output_file, 'wb') as f:
+                        f.write(data)
+                    self.logger.info(f"已生成: {output_file}")
+            finally:
+                if owned:
+                    sink.close()
+            if sink is not None:
+                self.logger.info(f"已写入归档: {sink.entries} 个文件，共 {sink.bytes_written} 字节")
             
-            pdf_document.close()
             return True
             
         except Exception as e:
             self.logger.error(f"PDF转图片失败: {str(e)}")
             return False
     
+    def _iter_pages(self, input_file: str, format: str, dpi: int,
+                    page_range: Optional[PageRange], raw: bool = False, workers: int = 1,
+                    max_pixels: Optional[int] = None, oversize: str = 'tile',
+                    output_dir: Optional[str] = None) -> Iterator[tuple]:
+        """按页码顺序渲染页面；给定输出目录时写入文件并产出文件路径"""
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"文件不存在: {input_file}")
+        if oversize not in ('tile', 'downscale'):
+            raise ValueError(f"不支持的超限处理方式: {oversize}")
+        
+        with fitz.open(input_file) as pdf_document:
+            page_count = len(pdf_document)
+            pages_to_process = self._resolve_pages(page_count, page_range)
+        
+        # 原始像素缓冲区不做缓存
+        cache = self.render_cache if not raw else None
+        keys = {}
+        cached_pages = set()
+        if cache is not None:
+            doc_hash = cache.hash_file(input_file)
+            for page_num in pages_to_process:
+                keys[page_num] = cache.make_key(doc_hash, page_num, dpi, 'RGB', format,
+                                                max_pixels, oversize)
+            cached_pages = {p for p in pages_to_process if cache.contains(keys[p])}
+        
+        # 只渲染缓存中没有的页面，结果按页码顺序与缓存命中交替产出
+        rendered = self._render_pages(input_file, [p for p in pages_to_process if p not in cached_pages],
+                                      page_count, format, dpi, raw, workers, max_pixels,
+                                      oversize, output_dir)
+        for page_num in pages_to_process:
+            output_file = None
+            if output_dir is not None:
+                output_file = os.path.join(output_dir, _page_file_name(page_num + 1, page_count, format))
+            
+            if page_num in cached_pages:
+                if output_file is not None:
+                    result = output_file if cache.get_file(keys[page_num], output_file) else None
+                else:
+                    result = cache.get(keys[page_num])
+                if result is not None:
+                    yield page_num + 1, result
+                    continue
+                # 条目在检查之后被淘汰，当场重新渲染
+                with fitz.open(input_file) as pdf_document:
+                    result = _render_page(pdf_document, page_num, format, dpi, raw,
+                                          max_pixels, oversize, output_file)
+            else:
+                _, result = next(rendered)
+                if cache is not None:
+                    cache.record(hit=False)
+            
+            if cache is not None:
+                if output_file is not None:
+                    cache.put_file(keys[page_num], result)
+                else:
+                    cache.put(keys[page_num], result)
+            yield page_num + 1, result
+        
+        if cache is not None:
+            stats = cache.stats()
+            self.logger.info(f"渲染缓存: 命中 {stats['hits']} 次, 未命中 {stats['misses']} 次")
+    
+    def _render_pages(self, input_file: str, pages: List[int], page_count: int, format: str,
+                      dpi: int, raw: bool, workers: int, max_pixels: Optional[int],
+                      oversize: str, output_dir: Optional[str]) -> Iterator[tuple]:
+        """渲染给定页面，按顺序产出 (页码, 结果)"""
+        if not pages:
+            return
+        
+        if workers <= 1:
+            with fitz.open(input_file) as pdf_document:
+                for page_num in pages:
+                    output_file = None
+                    if output_dir is not None:
+                        output_file = os.path.join(output_dir, _page_file_name(page_num + 1, page_count, format))
+                    yield page_num + 1, _render_page(pdf_document, page_num, format, dpi, raw,
+                                                     max_pixels, oversize, output_file)
+            return
+        
+        # 分片保持较小，使在途数据量有界；每个进程只打开一次文档
+        shard_size = max(1, min(8, len(pages) // (workers * 4)))
+        shards = [pages[i:i + shard_size] for i in range(0, len(pages), shard_size)]
+        tasks = [(shard, format, dpi, raw, max_pixels, oversize, output_dir, page_count)
+                 for shard in shards]
+        for results in ordered_map(_render_shard_worker, tasks, workers,
+                                   initializer=_init_render_worker,
+                                   initargs=(input_file,)):
+            yield from results
+    
+    def _resolve_pages(self, page_count: int, page_range: Optional[PageRange]) -> List[int]:
+        """
+        将页码参数转换为0起始页码列表
+
+        页码列表中超出范围的页码被忽略；页码范围表达式中的页码超出范围时抛出 ValueError。
+        """
+        if page_range is None:
+            return list(range(page_count))
+        if isinstance(page_range, str):
+            page_range = PageSpec(page_range)
+        if isinstance(page_range, PageSpec):
+            return list(page_range.resolve(page_count))
+        return [p - 1 for p in page_range if 1 <= p <= page_count]
+    
     def images_to_pdf(self, image_files: List[str], output_file: str, 
-                     page_size: str = 'A4', orientation: str = 'portrait') -> bool:
+                     page_size: str = 'A4', orientation: str = 'portrait',
+                     profile: str = 'default', workers: int = 1,
+                     preprocess: bool = False, max_dpi: Optional[int] = None,
+                     jpeg_quality: int = 85, autocrop: bool = False,
+                     deskew: bool = False) -> bool:
         """
         将图片转换为PDF
         
+        图片逐个解码并立即写入输出文件（多帧TIFF逐帧处理），
+        峰值内存只与单帧图片有关，与图片数量和帧数无关。
+        
+        启用预处理时，图片在进程池中执行 EXIF方向校正、颜色模式规范化、
+        按 max_dpi 缩小和JPEG重新编码，结果按原顺序写入PDF；
+        已满足要求的JPEG原样嵌入，不重新编码。autocrop 和 deskew
+        会在预处理中裁掉四周空白并校正倾斜（启用任一项即启用预处理）。
+        
         Args:
             image_files: 图片文件路径列表
             output_file: 输出PDF文件路径
-            page_size: 页面大小 (A4, A3, Letter等)
+            page_size: 页面大小 (A4, A3, A5, B5, Letter, Legal)，auto表示页面与图片大小相同
             orientation: 方向 (portrait, landscape)
+            profile: bitonal 表示接近黑白的图片二值化后以CCITT G4嵌入（未启用预处理时其余图片原样写入）
+            workers: 预处理进程数
+            preprocess: 是否启用预处理
+            max_dpi: 预处理时图片的最大分辨率，None表示不缩小
+            jpeg_quality: 预处理时JPEG重新编码的质量
+            autocrop: 是否裁掉图片四周空白
+            deskew: 是否校正图片倾斜
             
         Returns:
             bool: 是否成功
@@ -87,11 +580,43 @@ class PDFConverter:
                     self.logger.error(f"图片文件不存在: {img_file}")
                     return False
             
-            # 使用img2pdf转换
+            if page_size.lower() != 'auto' and page_size.upper() not in PAGE_SIZES:
+                self.logger.error(f"不支持的页面大小: {page_size}")
+                return False
+            if orientation not in ('portrait', 'landscape'):
+                self.logger.error(f"不支持的页面方向: {orientation}")
+                return False
+            
+            preprocess = preprocess or autocrop or deskew
+            sources = iter(image_files)
+            if preprocess or profile == 'bitonal':
+                options = image_pipeline.make_options(
+                    max_dpi=max_dpi if preprocess else None, jpeg_quality=jpeg_quality,
+                    reencode=preprocess, bitonal=profile == 'bitonal', autocrop=autocrop, deskew=deskew)
+                # 每帧一个任务，多帧TIFF的各帧处理完逐个写入
+                tasks = image_pipeline.frame_tasks(image_files, options)
+                if workers <= 1:
+                    sources = (image_pipeline.prepare_image(task) for task in tasks)
+                else:
+                    sources = ordered_map(image_pipeline.prepare_image, tasks, workers)
+            
+            pages = 0
+            processed = 0
+            passthrough = 0
             with open(output_file, "wb") as f:
-                f.write(img2pdf.convert(image_files))
+                writer = PDFStreamWriter(f)
+                for source in sources:
+                    if isinstance(source, str):
+                        passthrough += 1
+                    else:
+                        processed += 1
+                    pages += write_image_pages(writer, source, page_size, orientation)
+                writer.close()
             
-            self.logger.info(f"图片转PDF成功: {output_file}")
+            if preprocess or profile == 'bitonal':
+                self.logger.info(f"图片预处理: {processed} 帧已处理，"
+                                 f"{passthrough} 张原样嵌入")
+            self.logger.info(f"图片转PDF成功: {output_file}（{pages} 页）")
             return True
             
         except Exception as e:
@@ -99,14 +624,15 @@ class PDFConverter:
             return False
     
     def pdf_to_text(self, input_file: str, output_file: str, 
-                   page_range: Optional[List[int]] = None) -> bool:
+                   page_range: Optional[PageRange] = None, workers: int = 1) -> bool:
         """
         将PDF转换为文本
         
         Args:
             input_file: 输入PDF文件路径
             output_file: 输出文本文件路径
-            page_range: 页码范围，None表示所有页面
+            page_range: 页码列表（从1开始）或页码范围表达式（如 "1-10:2,last"），None表示所有页面
+            workers: 提取进程数，大于1时按页面分片多进程提取
             
         Returns:
             bool: 是否成功
@@ -116,23 +642,15 @@ class PDFConverter:
                 self.logger.error(f"文件不存在: {input_file}")
                 return False
             
-            pdf_document = fitz.open(input_file)
-            
-            # 确定要处理的页面
-            if page_range is None:
-                pages_to_process = range(len(pdf_document))
-            else:
-                pages_to_process = [p - 1 for p in page_range if 1 <= p <= len(pdf_document)]
-            
             with open(output_file, 'w', encoding='utf-8') as text_file:
-                for page_num in pages_to_process:
-                    page = pdf_document.load_page(page_num)
-                    text = page.get_text()
-                    text_file.write(f"=== 第 {page_num + 1} 页 ===\n")
-                    text_file.write(text)
-                    text_file.write("\n\n")
+                for _, pages, error in self._iter_text_shards([input_file], page_range, workers):
+                    if error:
+                        raise RuntimeError(error)
+                    for page_number, text in pages:
+                        text_file.write(f"=== 第 {page_number} 页 ===\n")
+                        text_file.write(text)
+                        text_file.write("\n\n")
             
-            pdf_document.close()
             self.logger.info(f"PDF转文本成功: {output_file}")
             return True
             
@@ -140,42 +658,180 @@ class PDFConverter:
             self.logger.error(f"PDF转文本失败: {str(e)}")
             return False
     
+    def iter_page_texts(self, input_files: List[str], page_range: Optional[PageRange] = None,
+                        workers: int = 1) -> Iterator[Tuple[str, int, str]]:
+        """
+        逐页提取多个PDF的文本，按文件和页码顺序产出
+        
+        无法处理的文件记录错误日志后跳过。
+        
+        Args:
+            input_files: 输入PDF文件路径列表
+            page_range: 页码列表（从1开始）或页码范围表达式（如 "1-10:2,last"），None表示所有页面
+            workers: 提取进程数，大于1时按页面分片多进程提取
+            
+        Yields:
+            (文件路径, 页码, 文本)
+        """
+        for input_file, pages, error in self._iter_text_shards(input_files, page_range, workers):
+            if error:
+                self.logger.error(f"提取文本失败: {input_file}: {error}")
+                continue
+            for page_number, text in pages:
+                yield input_file, page_number, text
+    
+    def pdf_to_jsonl(self, input_files: List[str], output_file: str,
+                     page_range: Optional[PageRange] = None, workers: int = 1) -> bool:
+        """
+        批量提取PDF文本，写入每页一条记录的JSONL文件
+        
+        每条记录格式: {"file": 文件路径, "page": 页码, "text": 文本, "chars": 字符数}。
+        页面按分片分配到多个进程，结果按文件和页码顺序流式写出，内存占用有界。
+        单个文件失败时记录日志并继续处理其余文件。
+        
+        Args:
+            input_files: 输入PDF文件路径列表
+            output_file: 输出JSONL文件路径
+            page_range: 页码列表（从1开始）或页码范围表达式（如 "1-10:2,last"），None表示所有页面
+            workers: 提取进程数
+            
+        Returns:
+            bool: 全部文件是否都处理成功
+        """
+        try:
+            failed_files = set()
+            page_total = 0
+            with open(output_file, 'w', encoding='utf-8') as jsonl_file:
+                for input_file, pages, error in self._iter_text_shards(input_files, page_range, workers):
+                    if error:
+                        if input_file not in failed_files:
+                            self.logger.error(f"提取文本失败: {input_file}: {error}")
+                        failed_files.add(input_file)
+                        continue
+                    for page_number, text in pages:
+                        record = {'file': input_file, 'page': page_number,
+                                  'text': text, 'chars': len(text)}
+                        jsonl_file.write(json.dumps(record, ensure_ascii=False))
+                        jsonl_file.write("\n")
+                    page_total += len(pages)
+            
+            self.logger.info(f"PDF转JSONL完成: {output_file}，共 {page_total} 页，"
+                             f"失败文件 {len(failed_files)} 个")
+            return not failed_files
+            
+        except Exception as e:
+            self.logger.error(f"PDF转JSONL失败: {str(e)}")
+            return False
+    
+    def _iter_text_shards(self, input_files: List[str], page_range: Optional[PageRange],
+                          workers: int, shard_size: int = 32) -> Iterator[tuple]:
+        """按顺序产出各页面分片的文本提取结果 (文件路径, [(页码, 文本), ...], 错误信息)"""
+        cache = self.text_cache
+        cache_path = cache.db_path if cache is not None else None
+        tasks = ((input_file, pages, cache_path)
+                 for input_file, pages in self._text_tasks(input_files, page_range, shard_size))
+        # 串行提取使用自己的提取器，不与同一进程中的其它提取共享状态
+        extractor = _TextExtractor() if workers <= 1 else None
+        if extractor is not None:
+            results = map(extractor.extract, tasks)
+        else:
+            results = ordered_map(_extract_text_worker, tasks, workers, initializer=_init_text_worker)
+        
+        if cache is not None:
+            cache.reset_report()
+        try:
+            for input_file, pages, error in results:
+                if cache is not None and pages:
+                    # 新提取的页面写回缓存
+                    cache.put_many((page_hash, text) for _, text, page_hash, reused in pages
+                                   if not reused)
+                    reused_count = sum(1 for page in pages if page[3])
+                    cache.record(reused=reused_count, recomputed=len(pages) - reused_count)
+                yield input_file, [(page_number, text) for page_number, text, _, _ in pages], error
+        finally:
+            # 串行模式在主进程中打开了文档和缓存连接，结束时关闭
+            if extractor is not None:
+                extractor.close()
+        
+        if cache is not None:
+            report = cache.report()
+            self.logger.info(f"文本缓存: 复用 {report['reused']} 页, "
+                             f"重新提取 {report['recomputed']} 页")
+    
+    def _text_tasks(self, input_files: List[str], page_range: Optional[PageRange],
+                    shard_size: int) -> Iterator[tuple]:
+        """逐个文件惰性生成文本提取任务 (文件路径, 页面分片)"""
+        # 页码范围表达式只解析一次，格式错误时直接抛出
+        if isinstance(page_range, str):
+            page_range = PageSpec(page_range)
+        for input_file in input_files:
+            try:
+                with fitz.open(input_file) as pdf_document:
+                    page_count = len(pdf_document)
+            except Exception:
+                # 交给工作进程重新打开并报告错误，保持结果顺序
+                yield input_file, []
+                continue
+            pages = self._resolve_pages(page_count, page_range)
+            for i in range(0, len(pages), shard_size):
+                yield input_file, pages[i:i + shard_size]
+    
     def compress_pdf(self, input_file: str, output_file: str, 
-                    quality: int = 85, image_quality: int = 70) -> bool:
+                    quality: int = 85, image_quality: int = 70,
+                    target_dpi: Optional[int] = 150, codec: str = 'JPEG',
+                    workers: int = 1, deduplicate: bool = True,
+                    target_size: Optional[int] = None, profile: str = 'default') -> bool:
         """
         压缩PDF文件
         
+        先对图片做降采样和重新编码（只在结果更小时替换），
+        再清理无用对象并压缩数据流。每个图片的处理结果保存在
+        self.last_compress_report 中。
+        
+        指定 target_size 时忽略 image_quality 和 target_dpi，
+        在 image_optimizer.QUALITY_LADDER 中搜索能满足大小限制的
+        损失最小的设置（试算按 profile 估计，bitonal 的黑白图片按CCITT G4计算）。
+        
+        profile 为 bitonal 时，接近黑白的图片（扫描文档）按Otsu阈值二值化
+        并用CCITT G4编码，分辨率至少保留 image_optimizer.BITONAL_MIN_DPI；
+        其余图片仍按 codec 处理。
+        
         Args:
             input_file: 输入PDF文件路径
             output_file: 输出PDF文件路径
-            quality: 压缩质量 (0-100)
+            quality: 已不使用，仅为兼容旧调用保留；图片质量由 image_quality 控制
             image_quality: 图片压缩质量 (0-100)
+            target_dpi: 图片目标分辨率，超过的图片按页面显示尺寸降采样，None表示不降采样
+            codec: 图片编码方式 (JPEG, JPX, FLATE)
+            workers: 图片处理进程数，目标大小模式下同时试算的设置数
+            deduplicate: 是否合并各页重复的图片、字体等对象
+            target_size: 输出文件大小上限（字节），None表示不限制
+            profile: 压缩配置 (default, bitonal)
             
         Returns:
-            bool: 是否成功
+            bool: 是否成功（目标大小模式下无法满足限制时返回False）
         """
+        self.last_compress_report = []
         try:
             if not os.path.exists(input_file):
                 self.logger.error(f"文件不存在: {input_file}")
                 return False
             
-            pdf_document = fitz.open(input_file)
-            
-            # 创建新的PDF文档
-            new_doc = fitz.open()
+            codec = codec.upper()
+            if codec not in image_optimizer.CODECS:
+                self.logger.error(f"不支持的图片编码方式: {codec}")
+                return False
             
-            for page_num in range(len(pdf_document)):
-                page = pdf_document.load_page(page_num)
-                new_page = new_doc.new_page(width=page.rect.width, height=page.rect.height)
-                
-                # 复制页面内容
-                new_page.show_pdf_page(page.rect, pdf_document, page_num)
+            if profile not in image_optimizer.PROFILES:
+                self.logger.error(f"不支持的压缩配置: {profile}")
+                return False
             
-            # 保存压缩后的PDF
-            new_doc.save(output_file, garbage=4, deflate=True, clean=True)
-            new_doc.close()
-            pdf_document.close()
+            if target_size:
+                return self._compress_to_target(input_file, output_file, target_size,
+                                                codec, workers, deduplicate, profile)
             
+            self._compress_once(input_file, output_file, target_dpi, codec,
+                                image_quality, workers, deduplicate, profile=profile)
             self.logger.info(f"PDF压缩成功: {output_file}")
             return True
             
@@ -183,6 +839,189 @@ class PDFConverter:
             self.logger.error(f"PDF压缩失败: {str(e)}")
             return False
     
+    def _compress_once(self, input_file: str, output_file: str, target_dpi: Optional[int],
+                       codec: str, image_quality: int, workers: int, deduplicate: bool,
+                       optimize_images: bool = True, profile: str = 'default') -> int:
+        """按一组设置压缩一次，返回输出文件大小"""
+        pdf_document = fitz.open(input_file)
+        try:
+            if optimize_images:
+                self.last_compress_report = self._optimize_images(
+                    pdf_document, input_file, target_dpi, codec, image_quality, workers, profile)
+                saved = sum(entry['saved_bytes'] for entry in self.last_compress_report)
+                replaced = sum(1 for entry in self.last_compress_report if entry['action'] == 'replaced')
+                self.logger.info(f"图片优化: 共 {len(self.last_compress_report)} 个图片，"
+                                 f"替换 {replaced} 个，节省 {saved} 字节")
+            
+            if deduplicate:
+                pdf_dedup.deduplicate_objects(pdf_document)
+            
+            # 保存压缩后的PDF
+            pdf_document.save(output_file, garbage=4, deflate=True, clean=True)
+        finally:
+            pdf_document.close()
+        return os.path.getsize(output_file)
+    
+    def _compress_to_target(self, input_file: str, output_file: str, target_size: int,
+                            codec: str, workers: int, deduplicate: bool, profile: str) -> bool:
+        """目标大小模式：搜索满足大小限制且损失最小的图片设置"""
+        ladder = image_optimizer.QUALITY_LADDER
+        # 先做无损清理，已满足限制时不损失画质；之后的试算都基于这个中间文件
+        base_file = output_file + '.base.tmp'
+        try:
+            size = self._compress_once(input_file, base_file, None, codec, 0, workers,
+                                       deduplicate, optimize_images=False)
+            if size <= target_size:
+                os.replace(base_file, output_file)
+                self.logger.info(f"无损压缩已满足目标大小: {size} <= {target_size} 字节")
+                return True
+            
+            start = self._search_quality_ladder(base_file, size, target_size, codec, workers, profile)
+            if start is None:
+                os.replace(base_file, output_file)
+                self.logger.error(f"无法压缩到目标大小 {target_size} 字节：没有可重新编码的图片，"
+                                  f"已输出无损压缩结果 {size} 字节")
+                return False
+            
+            # 估算可能偏小：实际写出后校验，超出时逐级改用更低的设置
+            for index in range(start, len(ladder)):
+                target_dpi, image_quality = ladder[index]
+                size = self._compress_once(base_file, output_file, target_dpi, codec,
+                                           image_quality, workers, False, profile=profile)
+                if size <= target_size:
+                    self.logger.info(f"PDF压缩成功: {output_file}（{size} 字节，"
+                                     f"DPI {target_dpi or '原始'}，质量 {image_quality}）")
+                    return True
+                self.logger.info(f"设置 DPI {target_dpi or '原始'}/质量 {image_quality} "
+                                 f"实际大小 {size} 字节，超出目标，尝试下一级")
+            
+            self.logger.error(f"无法压缩到目标大小 {target_size} 字节，已输出最小结果 {size} 字节")
+            return False
+        finally:
+            if os.path.exists(base_file):
+                os.remove(base_file)
+    
+    def _search_quality_ladder(self, base_file: str, base_size: int, target_size: int,
+                               codec: str, workers: int, profile: str = 'default') -> Optional[int]:
+        """
+        多路二分搜索质量阶梯，返回估算能满足目标大小的最小阶梯序号
+        
+        每轮在候选区间内均匀选取 workers 个设置并行试算；估算大小为
+        非图片部分大小加上各图片重新编码后的大小。工作进程在整个搜索期间
+        保持打开的文档和解码后的图片，各轮试算不重复解析和解码；
+        解码缓存的总量不随进程数增加。试算与最终写出使用同一 profile。
+        
+        Returns:
+            Optional[int]: 阶梯序号，没有设置能满足时返回最后一级；
+                文件中没有可重新编码的图片时返回None，调用方直接输出无损压缩结果
+        """
+        ladder = image_optimizer.QUALITY_LADDER
+        with fitz.open(base_file) as pdf_document:
+            images = image_optimizer.collect_images(pdf_document)
+        # 只有可处理的图片大小会随设置变化，其余部分按中间文件计算
+        variable = [info for info in images if not image_optimizer.skip_reason(info)]
+        fixed_bytes = base_size - sum(info['original_bytes'] for info in variable)
+        if not variable:
+            return None
+        
+        low, high = 0, len(ladder) - 1
+        executor = None
+        pdf_document = None
+        try:
+            if workers > 1:
+                executor = ProcessPoolExecutor(max_workers=workers,
+                                               initializer=image_optimizer.init_optimizer_worker,
+                                               initargs=(base_file, workers))
+            else:
+                pdf_document = fitz.open(base_file)
+                image_optimizer.clear_decoded_cache()
+            
+            # 不变式：high 一定可行（或是最后一级），low 之前的都不可行
+            while low < high:
+                count = min(max(1, workers), high - low)
+                probes = sorted({low + (high - low) * (i + 1) // (count + 1) for i in range(count)})
+                tasks = [(variable,) + tuple(ladder[index]) + (codec, profile) for index in probes]
+                if executor is not None:
+                    sizes = list(executor.map(image_optimizer.estimate_worker, tasks))
+                else:
+                    sizes = [image_optimizer.estimate_image_bytes(pdf_document, *task) for task in tasks]
+                
+                next_low, next_high = low, high
+                for index, image_bytes in zip(probes, sizes):
+                    estimate = fixed_bytes + image_bytes
+                    self.logger.info(f"试算 DPI {ladder[index][0] or '原始'}/质量 {ladder[index][1]}: "
+                                     f"约 {estimate} 字节")
+                    if estimate <= target_size:
+                        next_high = min(next_high, index)
+                    else:
+                        next_low = max(next_low, index + 1)
+                low, high = next_low, max(next_low, next_high)
+            return high
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            if pdf_document is not None:
+                pdf_document.close()
+                image_optimizer.clear_decoded_cache()
+    
+    def _optimize_images(self, pdf_document: fitz.Document, input_file: str,
+                         target_dpi: Optional[int], codec: str, image_quality: int,
+                         workers: int, profile: str = 'default') -> List[dict]:
+        """对文档中的图片降采样并重新编码，原地替换变小的图片，返回逐图片报告"""
+        report = []
+        tasks = []
+        images = {}
+        for info in image_optimizer.collect_images(pdf_document):
+            entry = {
+                'xref': info['xref'],
+                'page': info['page'] + 1,
+                'width': info['width'],
+                'height': info['height'],
+                'dpi': round(image_optimizer.effective_dpi(info)),
+                'original_bytes': info['original_bytes'],
+                'new_bytes': info['original_bytes'],
+                'saved_bytes': 0,
+                'action': 'kept',
+                'reason': ''
+            }
+            report.append(entry)
+            reason = image_optimizer.skip_reason(info)
+            if reason:
+                entry.update(action='skipped', reason=reason)
+                continue
+            width, height = image_optimizer.target_size(info, target_dpi)
+            entry['new_width'], entry['new_height'] = width, height
+            images[info['xref']] = (info, entry)
+            bitonal_size = None
+            if profile == 'bitonal':
+                bitonal_size = image_optimizer.bitonal_target_size(info, target_dpi)
+            tasks.append((info['xref'], width, height, codec, image_quality,
+                          info['original_bytes'], bitonal_size))
+        
+        if workers <= 1:
+            results = (image_optimizer.optimize_image(pdf_document, task) for task in tasks)
+        else:
+            results = ordered_map(image_optimizer.optimize_image_worker, tasks, workers,
+                                  initializer=image_optimizer.init_optimizer_worker,
+                                  initargs=(input_file,))
+        
+        for xref, data, error, ccitt in results:
+            info, entry = images[xref]
+            if error:
+                entry.update(action='skipped', reason=error)
+            elif data is None:
+                entry['reason'] = '重新编码后未变小'
+            elif ccitt:
+                width, height, black_is_1 = ccitt
+                image_optimizer.replace_with_ccitt(pdf_document, xref, data, width, height, black_is_1)
+                entry.update(action='replaced', new_bytes=len(data), new_width=width, new_height=height,
+                             saved_bytes=info['original_bytes'] - len(data), reason='CCITT G4')
+            else:
+                pdf_document.load_page(info['page']).replace_image(xref, stream=data)
+                entry.update(action='replaced', new_bytes=len(data),
+                             saved_bytes=info['original_bytes'] - len(data))
+        return report
+    
     def get_pdf_info(self, input_file: str) -> Optional[dict]:
         """
         获取PDF文件详细信息
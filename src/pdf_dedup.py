@@ -0,0 +1,143 @@
+import hashlib
+import os
+import re
+from typing import Dict
+import logging
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+# 对象定义中的间接引用，如 "12 0 R"
+_REFERENCE_PATTERN = re.compile(r'(\d+) 0 R')
+_LENGTH_PATTERN = re.compile(r'/Length \d+')
+
+# 可以安全共享的非流对象类型
+_SHAREABLE_TYPES = ('/Font', '/FontDescriptor', '/ExtGState', '/Encoding')
+_SHAREABLE_ARRAYS = ('[/ICCBased', '[/Indexed', '[/Separation', '[/DeviceN', '[/CalRGB', '[/CalGray', '[/Lab')
+
+
+def deduplicate_objects(pdf_document: fitz.Document, max_rounds: int = 8) -> Dict[str, int]:
+    """
+    合并内容相同的对象，把引用改写为同一个共享对象
+
+    流对象（图片、字体文件等）按流数据摘要和字典比较；字体、字体描述符、
+    图形状态、颜色空间和页面资源字典按改写引用后的定义比较，
+    因此字体文件合并后引用它们的字体对象也能在下一轮合并。
+    每轮对全部对象扫描一次，成本与对象数量成线性关系。
+    被合并掉的对象不再被引用，保存时需使用 garbage>=1 才会真正移除。
+
+    Args:
+        pdf_document: 已打开的PDF文档（原地修改）
+        max_rounds: 最多迭代轮数
+
+    Returns:
+        dict: {'duplicates': 合并的对象数, 'saved_bytes': 估计节省的字节数}
+    """
+    # 页面内容流不参与合并，避免之后编辑某页时影响其他页
+    page_contents = set()
+    resource_dicts = set()
+    for page in pdf_document:
+        page_contents.update(page.get_contents())
+        resources = pdf_document.xref_get_key(page.xref, 'Resources')
+        if resources[0] == 'xref':
+            resource_dicts.add(int(resources[1].split()[0]))
+
+    candidates = {}
+    for xref in range(1, pdf_document.xref_length()):
+        try:
+            definition = pdf_document.xref_object(xref, compressed=True)
+        except Exception:
+            continue
+        if pdf_document.xref_is_stream(xref):
+            if xref in page_contents or '/Type/XRef' in definition or '/Type/ObjStm' in definition:
+                continue
+            raw = pdf_document.xref_stream_raw(xref) or b''
+            digest = hashlib.sha256(raw).digest()
+            size = len(raw) + len(definition)
+        elif (xref in resource_dicts or definition.startswith(_SHAREABLE_ARRAYS)
+              or pdf_document.xref_get_key(xref, 'Type')[1] in _SHAREABLE_TYPES):
+            digest = None
+            size = len(definition)
+        else:
+            continue
+        candidates[xref] = (_LENGTH_PATTERN.sub('', definition), digest, size)
+
+    mapping = {}
+
+    def resolve(xref: int) -> int:
+        while xref in mapping:
+            xref = mapping[xref]
+        return xref
+
+    def rewrite(text: str) -> str:
+        return _REFERENCE_PATTERN.sub(lambda m: f"{resolve(int(m.group(1)))} 0 R", text)
+
+    for _ in range(max_rounds):
+        groups = {}
+        merged = False
+        for xref, (definition, digest, _) in candidates.items():
+            if xref in mapping:
+                continue
+            key = (rewrite(definition), digest)
+            canonical = groups.setdefault(key, xref)
+            if canonical != xref:
+                mapping[xref] = canonical
+                merged = True
+        if not merged:
+            break
+
+    if not mapping:
+        return {'duplicates': 0, 'saved_bytes': 0}
+
+    # 改写所有指向重复对象的引用
+    for xref in range(1, pdf_document.xref_length()):
+        if xref in mapping:
+            continue
+        try:
+            definition = pdf_document.xref_object(xref, compressed=True)
+        except Exception:
+            continue
+        if not any(int(m.group(1)) in mapping for m in _REFERENCE_PATTERN.finditer(definition)):
+            continue
+        if pdf_document.xref_is_stream(xref):
+            # 整体替换定义会丢掉流数据，只改写含引用的键
+            for key in pdf_document.xref_get_keys(xref):
+                value_type, value = pdf_document.xref_get_key(xref, key)
+                if value_type in ('xref', 'dict', 'array'):
+                    new_value = rewrite(value)
+                    if new_value != value:
+                        pdf_document.xref_set_key(xref, key, new_value)
+        else:
+            pdf_document.update_object(xref, rewrite(definition))
+
+    saved = sum(candidates[xref][2] for xref in mapping)
+    logger.info(f"对象去重: 合并 {len(mapping)} 个重复对象，约节省 {saved} 字节")
+    return {'duplicates': len(mapping), 'saved_bytes': saved}
+
+
+def deduplicate_file(input_file: str, output_file: str) -> Dict[str, int]:
+    """
+    对PDF文件执行去重并保存
+
+    Args:
+        input_file: 输入PDF文件路径
+        output_file: 输出PDF文件路径，可与输入相同
+
+    Returns:
+        dict: 同 deduplicate_objects
+    """
+    pdf_document = fitz.open(input_file)
+    tmp_file = output_file + '.tmp'
+    try:
+        result = deduplicate_objects(pdf_document)
+        # 先写临时文件，关闭输入后再替换，输出路径可与输入相同
+        pdf_document.save(tmp_file, garbage=1, deflate=True)
+    except Exception:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    finally:
+        pdf_document.close()
+    os.replace(tmp_file, output_file)
+    return result
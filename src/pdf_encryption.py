@@ -0,0 +1,348 @@
+import os
+import re
+from typing import Optional, Tuple
+
+import fitz  # PyMuPDF
+
+# 从文件末尾读取的字节数：先读 _TAIL_SIZE，找不到 startxref 时扩大到 _MAX_TAIL_SIZE
+_TAIL_SIZE = 4096
+_MAX_TAIL_SIZE = 65536
+
+# 读取尾部字典、加密字典或交叉引用表小节头时每次读取的字节数
+_READ_SIZE = 4096
+
+# 逐个跳过的交叉引用表小节数上限，超出时改为完整解析
+_MAX_SUBSECTIONS = 256
+
+# 交叉引用表中每项固定为20字节
+_XREF_ENTRY_SIZE = 20
+
+_STARTXREF_PATTERN = re.compile(rb'startxref\s+(\d+)\s+%%EOF')
+_SUBSECTION_PATTERN = re.compile(rb'\s*(\d+)\s+(\d+)[ \t]*(?:\r\n|\r|\n)')
+_XREF_ENTRY_PATTERN = re.compile(rb'(\d{10}) (\d{5}) ([nf])')
+_REFERENCE_PATTERN = re.compile(rb'\s*(\d+)\s+(\d+)\s+R')
+# /Encrypt 后不能紧跟名称字符，避免匹配 /EncryptMetadata
+_ENCRYPT_KEY_PATTERN = re.compile(rb'/Encrypt(?![A-Za-z0-9.#_-])')
+_NESTED_DICT_PATTERN = re.compile(rb'<<(?:(?!<<|>>).)*>>', re.S)
+_INLINE_DICT_PATTERN = re.compile(rb'\s*<<')
+
+# 各加密方法 (CFM) 对应的算法
+_CFM_ALGORITHMS = {'V2': 'RC4', 'AESV2': 'AES', 'AESV3': 'AES', 'None': 'None'}
+
+
+def describe_encryption(filter_name: str, version: int, revision: Optional[int],
+                        length: Optional[int], cfm: Optional[str],
+                        permissions: Optional[int]) -> dict:
+    """
+    根据加密字典的条目推出算法与密钥长度
+
+    Args:
+        filter_name: 安全处理程序 (/Filter)，如 Standard、Adobe.PubSec
+        version: 算法版本 (/V)
+        revision: 标准安全处理程序的修订号 (/R)
+        length: 密钥长度 (/Length，位)
+        cfm: 默认加密过滤器的加密方法 (/CF 中的 /CFM)
+        permissions: 权限标志 (/P)
+
+    Returns:
+        dict: 加密信息，包含 encrypted、filter、version、revision、algorithm、
+        key_length、encryption_method（如 "AES-256"）与 permissions
+    """
+    if version >= 4 and cfm:
+        algorithm = _CFM_ALGORITHMS.get(cfm, cfm)
+        key_length = 256 if cfm == 'AESV3' else (length or 128)
+    elif version == 5:
+        algorithm, key_length = 'AES', 256
+    elif version in (2, 3):
+        algorithm, key_length = 'RC4', length or 40
+    else:
+        algorithm, key_length = 'RC4', 40
+    return {
+        'encrypted': True,
+        'filter': filter_name,
+        'version': version,
+        'revision': revision,
+        'algorithm': algorithm,
+        'key_length': key_length,
+        'encryption_method': f"{algorithm}-{key_length}",
+        'permissions': permissions
+    }
+
+
+def _strip_strings(data: bytes) -> bytes:
+    """
+    把字面字符串和十六进制字符串替换为空串
+
+    加密字典中 /O、/U 等字符串是任意字节，去掉后剩下的 "<<"、">>" 只可能是字典定界符，
+    按键查找也不会误中字符串内容。
+    """
+    out = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        c = data[i]
+        if c == 0x28:  # (
+            depth = 1
+            i += 1
+            while i < n and depth:
+                c = data[i]
+                if c == 0x5c:  # 反斜杠转义
+                    i += 2
+                    continue
+                if c == 0x28:
+                    depth += 1
+                elif c == 0x29:
+                    depth -= 1
+                i += 1
+            out += b'()'
+        elif c == 0x3c and data[i + 1:i + 2] == b'<':
+            out += b'<<'
+            i += 2
+        elif c == 0x3c:
+            end = data.find(b'>', i)
+            if end < 0:
+                break
+            out += b'<>'
+            i = end + 1
+        else:
+            out.append(c)
+            i += 1
+    return bytes(out)
+
+
+def _dict_at(data: bytes, start: int) -> Optional[bytes]:
+    """返回 start 处 "<<" 开始的字典内容（不含定界符），缓冲区内不完整时返回None"""
+    depth = 0
+    i = start
+    while True:
+        opening = data.find(b'<<', i)
+        closing = data.find(b'>>', i)
+        if closing < 0:
+            return None
+        if 0 <= opening < closing:
+            depth += 1
+            i = opening + 2
+            continue
+        depth -= 1
+        i = closing + 2
+        if depth == 0:
+            return data[start + 2:closing]
+
+
+def _top_level(body: bytes) -> bytes:
+    """去掉字典内容中嵌套的字典，只留顶层条目"""
+    while True:
+        stripped = _NESTED_DICT_PATTERN.sub(b'<<>>', body)
+        if stripped == body:
+            return body
+        body = stripped
+
+
+def _int_value(body: bytes, key: bytes) -> Optional[int]:
+    """
+    读取顶层整数条目，缺失时返回None
+
+    Raises:
+        ValueError: 条目是间接引用（如 "/Length 12 0 R"），只凭尾部无法确定其值
+    """
+    # 数字后不能紧跟数字或小数点，避免回溯后把 "12 0 R" 截成 1
+    match = re.search(rb'/' + key + rb'\s+(-?\d+)(?![\d.])(\s+\d+\s+R)?', body)
+    if match is None:
+        return None
+    if match.group(2):
+        raise ValueError(f"/{key.decode('latin-1')} 是间接引用")
+    return int(match.group(1))
+
+
+def _parse_encrypt_dict(body: bytes) -> dict:
+    """从加密字典内容（已去掉字符串）中取出算法相关条目"""
+    top = _top_level(body)
+    filter_match = re.search(rb'/Filter\s*/([^\s/<>\[\]()]+)', top)
+    cfm_match = re.search(rb'/CFM\s*/([^\s/<>\[\]()]+)', body)
+    return describe_encryption(
+        filter_match.group(1).decode('latin-1') if filter_match else 'Standard',
+        _int_value(top, b'V') or 0,
+        _int_value(top, b'R'),
+        _int_value(top, b'Length'),
+        cfm_match.group(1).decode('latin-1') if cfm_match else None,
+        _int_value(top, b'P'))
+
+
+class _TailProbe:
+    """只读取文件头、尾部和最后一个交叉引用表小节的探测器"""
+
+    def __init__(self, f, file_size: int):
+        self.f = f
+        self.file_size = file_size
+        # 最后一个交叉引用表的小节 [(起始对象号, 项数, 第一项的偏移), ...]
+        self.subsections = []
+
+    def read(self, offset: int, size: int = _READ_SIZE) -> bytes:
+        """读取文件中的一段"""
+        self.f.seek(offset)
+        return self.f.read(size)
+
+    def startxref(self) -> Optional[int]:
+        """文件末尾 startxref 给出的偏移"""
+        for tail_size in (_TAIL_SIZE, _MAX_TAIL_SIZE):
+            tail = self.read(max(0, self.file_size - tail_size), tail_size)
+            matches = list(_STARTXREF_PATTERN.finditer(tail))
+            if matches:
+                return int(matches[-1].group(1))
+            if tail_size >= self.file_size:
+                break
+        return None
+
+    def trailer_offset(self, xref_offset: int) -> Optional[int]:
+        """
+        逐个跳过交叉引用表的小节，返回其后 trailer 关键字的偏移
+
+        不是传统交叉引用表（如交叉引用流）或格式不符时返回None。
+        """
+        if not 0 <= xref_offset < self.file_size or self.read(xref_offset, 4) != b'xref':
+            return None
+        position = xref_offset + 4
+        for _ in range(_MAX_SUBSECTIONS):
+            head = self.read(position, 64)
+            stripped = head.lstrip()
+            if stripped.startswith(b'trailer'):
+                return position + len(head) - len(stripped)
+            match = _SUBSECTION_PATTERN.match(head)
+            if not match:
+                return None
+            first, count = int(match.group(1)), int(match.group(2))
+            entries = position + match.end()
+            # 检查第一项的格式，不是固定20字节的表无法按位置查找
+            entry = head[match.end():match.end() + _XREF_ENTRY_SIZE]
+            if len(entry) < _XREF_ENTRY_SIZE:
+                entry = self.read(entries, _XREF_ENTRY_SIZE)
+            if count and not _XREF_ENTRY_PATTERN.match(entry):
+                return None
+            self.subsections.append((first, count, entries))
+            position = entries + count * _XREF_ENTRY_SIZE
+        return None
+
+    def object_offset(self, number: int, generation: int) -> Optional[int]:
+        """在最后一个交叉引用表中查找对象的偏移，不在该表中时返回None"""
+        for first, count, entries in self.subsections:
+            if first <= number < first + count:
+                entry = _XREF_ENTRY_PATTERN.match(
+                    self.read(entries + (number - first) * _XREF_ENTRY_SIZE, _XREF_ENTRY_SIZE))
+                if entry and entry.group(3) == b'n' and int(entry.group(2)) == generation:
+                    return int(entry.group(1))
+                return None
+        return None
+
+    def object_dict(self, number: int, generation: int) -> Optional[bytes]:
+        """读取间接对象的字典内容（已去掉字符串）"""
+        offset = self.object_offset(number, generation)
+        if offset is None:
+            return None
+        data = self.read(offset)
+        header = re.match(rb'\s*' + str(number).encode() + rb'\s+' + str(generation).encode() + rb'\s+obj\s*', data)
+        if not header or not data.startswith(b'<<', header.end()):
+            return None
+        data = _strip_strings(data[header.end():])
+        return _dict_at(data, 0)
+
+
+def probe_encryption(file_path: str) -> Optional[dict]:
+    """
+    只读取文件尾部判断加密状态
+
+    从 startxref 找到最后一个交叉引用表，跳过其中的小节找到对应的尾部字典，
+    读取 /Encrypt；加密字典是间接对象时按交叉引用表中的偏移直接读取。
+    整个过程只读几KB，不解析页面树和其它对象。交叉引用流、加密字典不在
+    最后一个交叉引用表中，或任何一步格式不符时返回None，由调用方完整解析。
+
+    Args:
+        file_path: PDF文件路径
+
+    Returns:
+        dict: 加密信息（格式见 describe_encryption，未加密时为 {'encrypted': False}），
+        无法只凭尾部判断时返回None
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        if not f.read(1024).lstrip().startswith(b'%PDF-'):
+            return None
+        probe = _TailProbe(f, file_size)
+        xref_offset = probe.startxref()
+        if xref_offset is None:
+            return None
+        trailer_offset = probe.trailer_offset(xref_offset)
+        if trailer_offset is None:
+            return None
+
+        data = probe.read(trailer_offset)
+        start = data.find(b'<<')
+        if start < 0:
+            return None
+        data = _strip_strings(data[start:])
+        trailer = _dict_at(data, 0)
+        if trailer is None:
+            return None
+
+        match = _ENCRYPT_KEY_PATTERN.search(trailer)
+        if not match:
+            return {'encrypted': False}
+        reference = _REFERENCE_PATTERN.match(trailer, match.end())
+        if reference:
+            encrypt = probe.object_dict(int(reference.group(1)), int(reference.group(2)))
+        else:
+            # 直接写在尾部字典中的加密字典
+            inline = _INLINE_DICT_PATTERN.match(trailer, match.end())
+            encrypt = _dict_at(trailer, inline.end() - 2) if inline else None
+        if encrypt is None:
+            return None
+        try:
+            return _parse_encrypt_dict(encrypt)
+        except ValueError:
+            # 条目是间接引用，交给完整解析
+            return None
+
+
+def parse_encryption(file_path: str) -> dict:
+    """
+    用 PyMuPDF 完整打开文件，从尾部字典读取加密信息
+
+    不需要密码；AES-256 等加密也不依赖额外的加密库。
+
+    Returns:
+        dict: 格式与 probe_encryption 相同
+    """
+    with fitz.open(file_path) as pdf_document:
+        if not pdf_document.is_pdf:
+            raise ValueError("不是PDF文件")
+        if pdf_document.xref_get_key(-1, 'Encrypt')[0] == 'null':
+            return {'encrypted': False}
+
+        def value(key: str) -> Optional[str]:
+            kind, text = pdf_document.xref_get_key(-1, f'Encrypt/{key}')
+            if kind == 'xref':
+                # 间接引用的条目读取被引用对象的值
+                return pdf_document.xref_object(int(text.split()[0]), compressed=True).strip()
+            return None if kind == 'null' else text
+
+        def int_value(key: str) -> Optional[int]:
+            text = value(key)
+            return int(text) if text and text.lstrip('-').isdigit() else None
+
+        stream_filter = (value('StmF') or '/StdCF')[1:]
+        cfm = value(f'CF/{stream_filter}/CFM')
+        return describe_encryption((value('Filter') or '/Standard')[1:], int_value('V') or 0,
+                                   int_value('R'), int_value('Length'),
+                                   cfm[1:] if cfm else None, int_value('P'))
+
+
+def read_encryption(file_path: str) -> Tuple[dict, str]:
+    """
+    读取加密信息：先探测文件尾部，无法判断时完整解析
+
+    Returns:
+        (加密信息, 读取方式 'tail' 或 'full')
+    """
+    info = probe_encryption(file_path)
+    if info is not None:
+        return info, 'tail'
+    return parse_encryption(file_path), 'full'
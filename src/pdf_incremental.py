@@ -0,0 +1,252 @@
+import difflib
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import fitz  # PyMuPDF
+
+from page_selection import PageRanges
+from pdf_backends import PyMuPDFBackend, shift_toc
+
+# 清单文件格式版本，格式变化时旧清单作废并完整重建
+MANIFEST_VERSION = 3
+
+# 计算文件哈希时每次读取的字节数
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# 增量保存累积的废弃数据（按被替换输入的文件大小估算）超过输出大小的该比例时压缩重写
+COMPACT_RATIO = 0.5
+
+
+def file_sha256(file_path: str) -> str:
+    """分块计算文件的SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_path(output_file: str) -> str:
+    """返回输出文件对应的清单文件路径"""
+    return output_file + '.manifest.json'
+
+
+class IncrementalMerger:
+    """
+    增量合并
+
+    在输出文件旁记录清单（各输入的内容哈希、所选页面、在输出中的页数及书签）。
+    每次写出时按各输入在输出中的起始页重建书签，沿用的输入使用清单中记录的书签。
+    再次合并时按清单比较新旧输入序列，只删除变化输入对应的页面、
+    导入变化的输入，并以增量方式追加保存，未变化的部分不会被重新解析或写出；
+    重建时间与变化量有关，与输出总大小无关。
+
+    大小与修改时间均未变化的输入直接沿用清单中的哈希，不重新读取。
+    增量保存会在文件末尾累积被替换的旧对象，估算的废弃数据超过
+    输出大小的 COMPACT_RATIO 时完整重写一次以回收空间。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def merge(self, sources: List[Tuple[str, Optional[List[int]]]], output_file: str) -> Dict:
+        """
+        增量合并
+
+        Args:
+            sources: [(文件路径, 页面索引序列或None), ...]
+            output_file: 输出PDF文件路径
+
+        Returns:
+            dict: 合并统计，包含 mode (full/incremental/unchanged/compact)、pages、
+            reused（沿用的输入数）、imported（重新导入的输入数）、removed（删除的旧输入数）
+        """
+        previous = self._load_manifest(output_file)
+        entries = self._describe_sources(sources, previous)
+        if previous is None:
+            return self._full_merge(entries, output_file)
+
+        old_keys = [self._key(entry) for entry in previous['inputs']]
+        new_keys = [self._key(entry) for entry in entries]
+        matcher = difflib.SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+        opcodes = []
+        reused = 0
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != 'equal':
+                opcodes.append((tag, i1, i2, j1, j2))
+                continue
+            # 未变化的输入沿用旧的页数和书签
+            for old, entry in zip(previous['inputs'][i1:i2], entries[j1:j2]):
+                entry['count'] = old['count']
+                entry['toc'] = old['toc']
+            reused += i2 - i1
+
+        if not opcodes:
+            self._write_manifest(output_file, entries, previous['dead_bytes'])
+            return {'mode': 'unchanged', 'pages': sum(entry['count'] for entry in entries),
+                    'reused': reused, 'imported': 0, 'removed': 0}
+
+        # 旧输入在输出中的起始页
+        starts = [0]
+        for entry in previous['inputs']:
+            starts.append(starts[-1] + entry['count'])
+
+        imported = removed = 0
+        dead_bytes = previous['dead_bytes']
+        with fitz.open(output_file) as output:
+            can_update = output.can_save_incrementally()
+        if not can_update:
+            return self._full_merge(entries, output_file)
+
+        with fitz.open(output_file) as output:
+            # 从后往前应用修改，前面区段的起始页保持不变
+            for tag, i1, i2, j1, j2 in reversed(opcodes):
+                position = starts[i1]
+                if i2 > i1:
+                    output.delete_pages(from_page=position, to_page=starts[i2] - 1)
+                    dead_bytes += sum(entry['file_size'] for entry in previous['inputs'][i1:i2])
+                    removed += i2 - i1
+                for entry in entries[j1:j2]:
+                    entry['count'] = self._insert(output, entry, position)
+                    position += entry['count']
+                    imported += 1
+            self._set_toc(output, entries)
+
+            if dead_bytes > COMPACT_RATIO * os.path.getsize(output_file):
+                mode = 'compact'
+                temp_file = output_file + '.tmp'
+                output.save(temp_file, garbage=3, deflate=False)
+                dead_bytes = 0
+            else:
+                mode = 'incremental'
+                output.saveIncr()
+            pages = len(output)
+
+        if mode == 'compact':
+            os.replace(temp_file, output_file)
+        self._write_manifest(output_file, entries, dead_bytes)
+        return {'mode': mode, 'pages': pages, 'reused': reused, 'imported': imported, 'removed': removed}
+
+    def _full_merge(self, entries: List[Dict], output_file: str) -> Dict:
+        """完整合并并写出清单"""
+        with fitz.open() as output:
+            for entry in entries:
+                entry['count'] = self._insert(output, entry, len(output))
+            self._set_toc(output, entries)
+            output.save(output_file, **PyMuPDFBackend.SAVE_OPTIONS)
+            pages = len(output)
+        self._write_manifest(output_file, entries, 0)
+        return {'mode': 'full', 'pages': pages, 'reused': 0, 'imported': len(entries), 'removed': 0}
+
+    def _insert(self, output: fitz.Document, entry: Dict, position: int) -> int:
+        """在 position 处插入一个输入的所选页面并记下其书签，返回插入的页数"""
+        before = len(output)
+        with fitz.open(entry['file']) as pdf_document:
+            pages = None
+            if entry['pages'] is None:
+                output.insert_pdf(pdf_document, start_at=position)
+            else:
+                pages = PageRanges(range(*triple) for triple in entry['pages'])
+                for start, end in pages.runs():
+                    output.insert_pdf(pdf_document, from_page=start, to_page=end,
+                                      start_at=position + len(output) - before)
+            # 书签页码相对于该输入在输出中的第一页
+            entry['toc'] = [self._encode_toc_item(item)
+                            for item in shift_toc(pdf_document.get_toc(simple=False), pages, 0)]
+        return len(output) - before
+
+    def _set_toc(self, output: fitz.Document, entries: List[Dict]):
+        """按各输入在输出中的起始页拼接书签并写入输出"""
+        toc = []
+        start = 0
+        for entry in entries:
+            for level, title, page, destination in entry['toc']:
+                if 'to' in destination:
+                    destination = dict(destination, to=fitz.Point(destination['to']))
+                toc.append([level, title, start + page, destination])
+            start += entry['count']
+        if toc or output.get_toc():
+            output.set_toc(toc)
+
+    @staticmethod
+    def _encode_toc_item(item: list) -> list:
+        """把书签项转为可写入清单的形式（目标坐标记为 [x, y]）"""
+        level, title, page, destination = item
+        if 'to' in destination:
+            destination = dict(destination, to=list(destination['to']))
+        return [level, title, page, destination]
+
+    def _describe_sources(self, sources: List[Tuple[str, Optional[List[int]]]],
+                          previous: Optional[Dict]) -> List[Dict]:
+        """生成各输入的清单条目，大小和修改时间未变的文件沿用旧哈希"""
+        known = {}
+        if previous is not None:
+            for entry in previous['inputs']:
+                known[entry['file']] = entry
+
+        entries = []
+        for file_path, pages in sources:
+            stat = os.stat(file_path)
+            old = known.get(os.path.abspath(file_path))
+            if old is not None and old['file_size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+                sha256 = old['sha256']
+            else:
+                sha256 = file_sha256(file_path)
+            entries.append({
+                'file': os.path.abspath(file_path),
+                'file_size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': sha256,
+                'pages': self._encode_pages(pages),
+                'count': 0,
+                'toc': []
+            })
+        return entries
+
+    def _encode_pages(self, pages) -> Optional[List[List[int]]]:
+        """页面选择记为 [[起始, 结束, 步长], ...]，大小只与范围个数有关"""
+        if pages is None:
+            return None
+        return [[r.start, r.stop, r.step] for r in PageRanges.from_pages(pages).ranges]
+
+    def _key(self, entry: Dict) -> tuple:
+        """比较输入时使用的键：内容哈希加所选页面"""
+        pages = entry['pages']
+        return entry['sha256'], tuple(map(tuple, pages)) if pages is not None else None
+
+    def _load_manifest(self, output_file: str) -> Optional[Dict]:
+        """读取清单；清单缺失、版本不符或输出文件已被改动时返回None"""
+        path = manifest_path(output_file)
+        if not os.path.exists(output_file) or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"清单文件无法读取，将完整重建: {str(e)}")
+            return None
+        stat = os.stat(output_file)
+        if (manifest.get('version') != MANIFEST_VERSION
+                or manifest.get('output_size') != stat.st_size
+                or manifest.get('output_mtime_ns') != stat.st_mtime_ns):
+            self.logger.info("输出文件与清单不一致，将完整重建")
+            return None
+        return manifest
+
+    def _write_manifest(self, output_file: str, entries: List[Dict], dead_bytes: int):
+        """写出清单（先写临时文件再替换）"""
+        stat = os.stat(output_file)
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'output_size': stat.st_size,
+            'output_mtime_ns': stat.st_mtime_ns,
+            'dead_bytes': dead_bytes,
+            'inputs': entries
+        }
+        path = manifest_path(output_file)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(path + '.tmp', path)
@@ -1,98 +1,221 @@
 import os
-from PyPDF2 import PdfMerger, PdfReader, PdfWriter
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+import fitz  # PyMuPDF
+from PyPDF2 import PdfReader
 from typing import List, Optional
 import logging
 
+import pdf_dedup
+from page_selection import PageSpec
+from parallel_utils import default_workers
+from pdf_backends import get_backend
+from pdf_incremental import IncrementalMerger, file_sha256
+
 class PDFMerger:
     """PDF合并工具类"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # 最近一次增量合并的统计
+        self.last_merge_report = None
     
-    def merge_pdfs(self, input_files: List[str], output_file: str) -> bool:
+    def merge_pdfs(self, input_files: List[str], output_file: str,
+                   deduplicate: bool = False, streaming: bool = False,
+                   backend: Optional[str] = None, validate: bool = False,
+                   incremental: bool = False) -> bool:
         """
         合并多个PDF文件
         
         Args:
             input_files: 输入PDF文件路径列表
             output_file: 输出PDF文件路径
+            deduplicate: 是否合并各输入文件之间重复的图片、字体等对象
+            streaming: 是否使用流式合并（等同于 backend='stream'，逐个输入写出并释放，
+                       内存占用与输入数量无关，不保留书签）
+            backend: 合并后端 (pymupdf, pypdf2, stream)，None表示默认后端
+            validate: 是否在写出前并行检查所有输入（损坏、需要密码的文件直接失败）
+            incremental: 是否增量合并：按输出旁的清单只重新导入变化的输入，
+                         未变化的部分原样保留（使用 PyMuPDF，忽略 backend 和 deduplicate）；
+                         各输入的书签按其在输出中的位置保留
             
         Returns:
             bool: 是否成功
         """
         try:
-            merger = PdfMerger()
-            
-            for file_path in input_files:
-                if not os.path.exists(file_path):
-                    self.logger.error(f"文件不存在: {file_path}")
-                    return False
-                
-                with open(file_path, 'rb') as file:
-                    merger.append(file)
-            
-            with open(output_file, 'wb') as output:
-                merger.write(output)
-            
-            merger.close()
-            self.logger.info(f"PDF合并成功: {output_file}")
-            return True
+            return self._merge([(file_path, None) for file_path in input_files], output_file,
+                               deduplicate, 'stream' if streaming else backend, validate, incremental)
             
         except Exception as e:
             self.logger.error(f"PDF合并失败: {str(e)}")
             return False
     
-    def merge_pdfs_with_order(self, file_order: List[tuple], output_file: str) -> bool:
+    def merge_pdfs_with_order(self, file_order: List[tuple], output_file: str,
+                              deduplicate: bool = False, streaming: bool = False,
+                              backend: Optional[str] = None, validate: bool = False,
+                              incremental: bool = False) -> bool:
         """
         按指定顺序合并PDF文件
         
         Args:
-            file_order: [(文件路径, 页码范围), ...] 页码范围格式: "1-3" 或 "1,3,5"
+            file_order: [(文件路径, 页码范围), ...] 页码范围格式: "1-3"、"1,3,5"、
+                        "10-1"、"1-10:2"、"8-last"、"odd"（见 page_selection.PageSpec）
             output_file: 输出PDF文件路径
+            deduplicate: 是否合并各输入文件之间重复的图片、字体等对象
+            streaming: 是否使用流式合并，只复制所选页面可达的对象
+            backend: 合并后端 (pymupdf, pypdf2, stream)，None表示默认后端
+            validate: 是否在写出前并行检查所有输入，并确认页码范围没有超出页数
+            incremental: 是否增量合并，只重新导入变化的输入或页码范围
             
         Returns:
             bool: 是否成功
         """
         try:
-            merger = PdfMerger()
+            # 先检查所有页码范围的语法，出错时不会打开任何文件
+            sources = [(file_path, PageSpec(page_range) if page_range else None)
+                       for file_path, page_range in file_order]
+            return self._merge(sources, output_file, deduplicate, 'stream' if streaming else backend,
+                               validate, incremental)
             
-            for file_path, page_range in file_order:
+        except Exception as e:
+            self.logger.error(f"PDF合并失败: {str(e)}")
+            return False
+    
+    def _merge(self, sources: List[tuple], output_file: str, deduplicate: bool,
+               backend: Optional[str], validate: bool = False, incremental: bool = False) -> bool:
+        """使用选定后端合并 [(文件路径, PageSpec、页面索引序列或None), ...]"""
+        for file_path, _ in sources:
+            if not os.path.exists(file_path):
+                self.logger.error(f"文件不存在: {file_path}")
+                return False
+        
+        page_counts = {}
+        if validate:
+            page_counts = self._validate_sources(sources)
+            if page_counts is None:
+                return False
+        
+        merge_backend = get_backend('pymupdf' if incremental else backend, 'merge')
+        sources = self._resolve_sources(sources, page_counts, merge_backend)
+        
+        if incremental:
+            if deduplicate:
+                self.logger.warning("增量合并不支持对象去重，已忽略 deduplicate")
+            report = IncrementalMerger().merge(sources, output_file)
+            self.last_merge_report = report
+            self.logger.info(f"PDF增量合并成功: {output_file}（{report['pages']} 页，方式 {report['mode']}，"
+                             f"沿用 {report['reused']} 个输入，重新导入 {report['imported']} 个，"
+                             f"删除 {report['removed']} 个）")
+            return True
+        
+        pages = merge_backend.merge(sources, output_file)
+        if deduplicate:
+            self._deduplicate_output(output_file)
+        self.logger.info(f"PDF合并成功: {output_file}（{pages} 页，后端 {merge_backend.name}）")
+        return True
+    
+    def inspect_inputs(self, input_files: List[str], workers: Optional[int] = None) -> Optional[List[dict]]:
+        """
+        并行检查合并输入
+        
+        用线程池同时探测所有文件（PyMuPDF 打开文件只读取交叉引用和页面树，
+        比 PdfReader 完整解析快得多；哈希计算和文件读取会释放GIL）。
+        任一文件不存在或已损坏时取消其余任务并立即返回。
+        
+        Args:
+            input_files: 输入PDF文件路径列表
+            workers: 线程数，None表示CPU核心数
+            
+        Returns:
+            List[dict]: 与输入顺序一致的文件信息列表，每项包含 file、pages、file_size、
+            encrypted、encryption、needs_password、sha256，以及 duplicate_of
+            （与前面某个输入内容完全相同时为该文件路径，否则为None）；失败时返回None
+        """
+        try:
+            for file_path in input_files:
                 if not os.path.exists(file_path):
                     self.logger.error(f"文件不存在: {file_path}")
-                    return False
-                
-                with open(file_path, 'rb') as file:
-                    if page_range:
-                        # 解析页码范围
-                        pages = self._parse_page_range(page_range)
-                        merger.append(file, pages=pages)
-                    else:
-                        merger.append(file)
+                    return None
             
-            with open(output_file, 'wb') as output:
-                merger.write(output)
+            workers = max(1, min(workers or default_workers(), len(input_files) or 1))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._inspect_file, file_path) for file_path in input_files]
+                done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+                for future in pending:
+                    future.cancel()
+                for file_path, future in zip(input_files, futures):
+                    if future in done and future.exception() is not None:
+                        self.logger.error(f"文件无法读取: {file_path}（{future.exception()}）")
+                        return None
+                results = [future.result() for future in futures]
             
-            merger.close()
-            self.logger.info(f"PDF合并成功: {output_file}")
-            return True
+            first_seen = {}
+            for info in results:
+                info['duplicate_of'] = first_seen.get(info['sha256'])
+                first_seen.setdefault(info['sha256'], info['file'])
+                if info['duplicate_of']:
+                    self.logger.warning(f"重复的输入文件: {info['file']} 与 {info['duplicate_of']} 内容相同")
+            return results
             
         except Exception as e:
-            self.logger.error(f"PDF合并失败: {str(e)}")
-            return False
+            self.logger.error(f"检查输入文件失败: {str(e)}")
+            return None
     
-    def _parse_page_range(self, page_range: str) -> List[int]:
-        """解析页码范围字符串"""
-        pages = []
-        parts = page_range.split(',')
-        
-        for part in parts:
-            if '-' in part:
-                start, end = map(int, part.split('-'))
-                pages.extend(range(start - 1, end))  # PDF页码从0开始
-            else:
-                pages.append(int(part) - 1)
+    def _inspect_file(self, file_path: str) -> dict:
+        """读取单个文件的页数、加密状态和SHA-256（在工作线程中执行）"""
+        sha256 = file_sha256(file_path)
+        with fitz.open(file_path) as pdf_document:
+            if not pdf_document.is_pdf:
+                raise ValueError("不是PDF文件")
+            pages = pdf_document.page_count
+            if pages == 0:
+                raise ValueError("文件没有页面")
+            encryption = pdf_document.metadata.get('encryption') if pdf_document.metadata else None
+            return {
+                'file': file_path,
+                'pages': pages,
+                'file_size': os.path.getsize(file_path),
+                'encrypted': bool(encryption or pdf_document.needs_pass),
+                'encryption': encryption,
+                'needs_password': bool(pdf_document.needs_pass),
+                'sha256': sha256
+            }
+    
+    def _validate_sources(self, sources: List[tuple]) -> Optional[dict]:
+        """写出前检查所有输入：文件可读、无需密码；返回 {文件路径: 页数}，失败时返回None"""
+        files = list(dict.fromkeys(file_path for file_path, _ in sources))
+        results = self.inspect_inputs(files)
+        if results is None:
+            return None
         
-        return pages
+        page_counts = {}
+        for info in results:
+            if info['needs_password']:
+                self.logger.error(f"文件需要密码: {info['file']}")
+                return None
+            page_counts[info['file']] = info['pages']
+        return page_counts
+    
+    def _resolve_sources(self, sources: List[tuple], page_counts: dict, merge_backend) -> List[tuple]:
+        """按各文件页数把 PageSpec 解析为页面选择，页码超出范围时抛出 ValueError"""
+        resolved = []
+        for file_path, pages in sources:
+            if isinstance(pages, PageSpec):
+                if file_path not in page_counts:
+                    page_counts[file_path] = merge_backend.page_count(file_path)
+                try:
+                    pages = pages.resolve(page_counts[file_path])
+                except ValueError as e:
+                    raise ValueError(f"{file_path}: {str(e)}")
+            resolved.append((file_path, pages))
+        return resolved
+    
+    def _deduplicate_output(self, output_file: str):
+        """对合并结果执行对象去重并记录节省的字节数"""
+        size_before = os.path.getsize(output_file)
+        result = pdf_dedup.deduplicate_file(output_file, output_file)
+        size_after = os.path.getsize(output_file)
+        self.logger.info(f"合并去重: 合并 {result['duplicates']} 个重复对象，"
+                         f"文件大小 {size_before} -> {size_after} 字节")
     
     def get_pdf_info(self, file_path: str) -> Optional[dict]:
         """
@@ -0,0 +1,219 @@
+import os
+import re
+from typing import List, Set, Tuple
+
+import fitz  # PyMuPDF
+
+# 按名称引用、需要裁剪的资源类别（/ProcSet 等其它条目原样保留）
+RESOURCE_CATEGORIES = ('Font', 'XObject', 'ExtGState', 'ColorSpace', 'Pattern', 'Shading', 'Properties')
+
+# 内容流中的名称记号，如 /F1、/Im0
+_NAME_PATTERN = re.compile(rb'/([^\s/\[\]()<>{}%]+)')
+
+# 对象定义中的间接引用，如 "12 0 R"
+_REFERENCE_PATTERN = re.compile(r'(\d+) (\d+) R')
+
+# 资源字典中不属于 RESOURCE_CATEGORIES、需要原样保留的条目
+_KEPT_KEYS = ('ProcSet',)
+
+# 估计大小时每个对象的语法开销（"N 0 obj"、"endobj" 与交叉引用表项），
+# 以及数据流额外的 "stream"/"endstream" 开销
+_OBJECT_OVERHEAD = 36
+_STREAM_OVERHEAD = 18
+
+
+def content_names(data: bytes) -> Set[str]:
+    """
+    提取内容流中出现的所有名称
+
+    只做一次线性扫描，不解析操作符；字符串里的"名称"也会被算进来，
+    结果是实际使用资源的超集，裁剪时只会多留，不会误删。
+    """
+    return {match.group(1).decode('latin-1') for match in _NAME_PATTERN.finditer(data)}
+
+
+def _xref_of(value: str) -> int:
+    """从 "12 0 R" 中取出对象号"""
+    return int(value.split()[0])
+
+
+def references(text: str) -> List[int]:
+    """对象定义或值文本中引用的对象号"""
+    return [int(match.group(1)) for match in _REFERENCE_PATTERN.finditer(text)]
+
+
+def object_size(pdf_document: fitz.Document, xref: int) -> Tuple[int, str]:
+    """
+    估计单个对象写出后的大小（对象定义、原始数据流长度与语法开销之和）
+
+    只读取对象定义和 /Length，不读取数据流内容。
+
+    Returns:
+        (估计字节数, 对象定义文本)
+    """
+    definition = pdf_document.xref_object(xref, compressed=True)
+    size = len(definition) + _OBJECT_OVERHEAD
+    if pdf_document.xref_is_stream(xref):
+        kind, value = pdf_document.xref_get_key(xref, 'Length')
+        size += _STREAM_OVERHEAD
+        size += int(value) if kind == 'int' else len(pdf_document.xref_stream_raw(xref) or b'')
+    return size, definition
+
+
+def used_names(pdf_document: fitz.Document, owner_xref: int, data: bytes) -> Set[str]:
+    """
+    页面内容及其引用的、没有自己资源字典的表单XObject中出现的名称
+
+    这类表单使用所在页面的资源，需要递归地把它们用到的名称也算进来。
+
+    Args:
+        pdf_document: 已打开的PDF文档
+        owner_xref: 资源字典所在的对象（页面，或继承时的上级页面树节点）
+        data: 页面内容流
+    """
+    used = content_names(data)
+    pending = list(used)
+    visited = set()
+    while pending:
+        name = pending.pop()
+        kind, value = pdf_document.xref_get_key(owner_xref, f'Resources/XObject/{name}')
+        if kind != 'xref':
+            continue
+        xref = _xref_of(value)
+        if xref in visited:
+            continue
+        visited.add(xref)
+        if (pdf_document.xref_get_key(xref, 'Subtype')[1] != '/Form'
+                or pdf_document.xref_get_key(xref, 'Resources')[0] != 'null'):
+            continue
+        names = content_names(pdf_document.xref_stream(xref) or b'') - used
+        used |= names
+        pending.extend(names)
+    return used
+
+
+def _dict_keys(pdf_document: fitz.Document, kind: str, value: str) -> Set[str]:
+    """
+    资源类别字典的键
+
+    间接对象直接读取键；直接写出的字典从文本中取名称记号（可能多出值里的名称，
+    只用于缩小查找范围，不影响结果）。
+    """
+    if kind == 'xref':
+        return set(pdf_document.xref_get_keys(_xref_of(value)))
+    return content_names(value.encode('latin-1', 'replace'))
+
+
+def prune_page_resources(pdf_document: fitz.Document, page: fitz.Page,
+                         dropped: Set[int], kept: Set[int]) -> bool:
+    """
+    把页面的资源字典裁剪为内容实际用到的条目
+
+    裁剪后的资源字典直接写在页面上，共享的资源字典对象不被修改；
+    不再被引用的字体、图片等在保存时由垃圾回收去掉。
+
+    Args:
+        pdf_document: 已打开的PDF文档
+        page: 要裁剪的页面
+        dropped: 收集被去掉的条目指向的对象号
+        kept: 收集保留的条目指向的对象号
+
+    Returns:
+        bool: 是否修改了页面
+    """
+    page_xref = page.xref
+    if pdf_document.xref_get_key(page_xref, 'Resources')[0] == 'null':
+        return False
+    used = used_names(pdf_document, page_xref, page.read_contents())
+    # 含 #xx 转义的名称无法可靠地按键查找，这类页面保持原样
+    if any('#' in name for name in used):
+        return False
+
+    parts = []
+    for category in RESOURCE_CATEGORIES:
+        kind, value = pdf_document.xref_get_key(page_xref, f'Resources/{category}')
+        if kind == 'null':
+            continue
+        keys = _dict_keys(pdf_document, kind, value)
+        entries = []
+        for name in sorted(keys):
+            kind, value = pdf_document.xref_get_key(page_xref, f'Resources/{category}/{name}')
+            if kind == 'null':
+                continue
+            if name in used:
+                entries.append(f'/{name} {value}')
+            if kind == 'xref':
+                (kept if name in used else dropped).add(_xref_of(value))
+        if entries:
+            parts.append(f"/{category}<<{''.join(entries)}>>")
+    for key in _KEPT_KEYS:
+        kind, value = pdf_document.xref_get_key(page_xref, f'Resources/{key}')
+        if kind != 'null':
+            parts.append(f'/{key} {value}')
+
+    pdf_document.xref_set_key(page_xref, 'Resources', f"<<{''.join(parts)}>>")
+    return True
+
+
+def prune_resources(pdf_document: fitz.Document) -> int:
+    """
+    裁剪文档中所有页面的资源字典
+
+    Returns:
+        int: 估计去掉的字节数（只统计被去掉的条目可达的对象，
+        开销与去掉的对象数成正比，没有可裁剪的内容时几乎为零）
+    """
+    dropped, kept = set(), set()
+    for page in pdf_document:
+        prune_page_resources(pdf_document, page, dropped, kept)
+    return _reachable_size(pdf_document, dropped - kept, kept)
+
+
+def _reachable_size(pdf_document: fitz.Document, roots: Set[int], exclude: Set[int]) -> int:
+    """估计从 roots 可达、且不经过 exclude 的对象写出后的总大小"""
+    total = 0
+    pending = list(roots)
+    visited = set(exclude)
+    while pending:
+        xref = pending.pop()
+        if xref in visited or not 0 < xref < pdf_document.xref_length():
+            continue
+        visited.add(xref)
+        size, definition = object_size(pdf_document, xref)
+        total += size
+        pending.extend(references(definition))
+    return total
+
+
+def prune_data(data: bytes) -> Tuple[bytes, int]:
+    """
+    裁剪内存中PDF的页面资源
+
+    Args:
+        data: PDF文件内容
+
+    Returns:
+        (裁剪后的文件内容, 裁剪前的大小)
+    """
+    with fitz.open(stream=data, filetype='pdf') as pdf_document:
+        prune_resources(pdf_document)
+        return pdf_document.tobytes(garbage=1, deflate=False), len(data)
+
+
+def prune_file(file_path: str) -> int:
+    """
+    裁剪已写出文件的页面资源并重新保存
+
+    Args:
+        file_path: PDF文件路径（原地替换）
+
+    Returns:
+        int: 裁剪前的文件大小
+    """
+    size_before = os.path.getsize(file_path)
+    temp_file = file_path + '.tmp'
+    with fitz.open(file_path) as pdf_document:
+        prune_resources(pdf_document)
+        pdf_document.save(temp_file, garbage=1, deflate=False)
+    os.replace(temp_file, file_path)
+    return size_before
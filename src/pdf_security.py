@@ -1,8 +1,14 @@
 import os
 from PyPDF2 import PdfReader, PdfWriter
-from typing import Optional
+from typing import Iterator, List, Optional
 import logging
 
+from parallel_utils import default_workers, ordered_map
+from pdf_encryption import read_encryption
+
+# 扫描目录时每个CPU核心的线程数：探测只读几KB，耗时主要在文件系统延迟上
+_SCAN_THREADS_PER_CPU = 4
+
 class PDFSecurity:
     """PDF安全工具类"""
     
@@ -100,6 +106,8 @@ class PDFSecurity:
         """
         检查PDF是否已加密
         
+        只读取文件尾部的 trailer 与最后一个交叉引用表，无法判断时才完整解析（见 pdf_encryption）。
+        
         Args:
             input_file: PDF文件路径
             
@@ -111,9 +119,8 @@ class PDFSecurity:
                 self.logger.error(f"文件不存在: {input_file}")
                 return False
             
-            with open(input_file, 'rb') as file:
-                reader = PdfReader(file)
-                return reader.is_encrypted
+            info, _ = read_encryption(input_file)
+            return info['encrypted']
                 
         except Exception as e:
             self.logger.error(f"检查加密状态失败: {str(e)}")
@@ -127,33 +134,78 @@ class PDFSecurity:
             input_file: PDF文件路径
             
         Returns:
-            dict: 加密信息字典
+            dict: 加密信息字典，未加密时为 {'encrypted': False}；加密时包含
+            filter、version、revision、algorithm (RC4/AES)、key_length（位）、
+            encryption_method（如 "AES-256"）与 permissions
         """
         try:
             if not os.path.exists(input_file):
                 self.logger.error(f"文件不存在: {input_file}")
                 return None
             
-            with open(input_file, 'rb') as file:
-                reader = PdfReader(file)
-                
-                if not reader.is_encrypted:
-                    return {'encrypted': False}
-                
-                # 获取加密信息
-                encryption_info = {
-                    'encrypted': True,
-                    'encryption_method': reader.encryption_method,
-                    'file_id': reader.file_id,
-                    'metadata': reader.metadata
-                }
-                
-                return encryption_info
+            info, _ = read_encryption(input_file)
+            return info
                 
         except Exception as e:
             self.logger.error(f"获取加密信息失败: {str(e)}")
             return None
     
+    def scan_directory(self, directory: str, recursive: bool = True,
+                       workers: Optional[int] = None) -> Optional[List[dict]]:
+        """
+        并行检查目录中所有PDF文件的加密状态
+        
+        文件边枚举边提交给线程池，每个文件只读取尾部几KB，
+        结果按文件路径顺序返回；单个文件读取失败不影响其它文件。
+        
+        Args:
+            directory: 目录路径
+            recursive: 是否包含子目录
+            workers: 线程数，None表示CPU核心数的 _SCAN_THREADS_PER_CPU 倍
+            
+        Returns:
+            List[dict]: 每个文件的加密信息（格式见 get_encryption_info），另含
+            file、parsed（'tail' 只读尾部，'full' 完整解析）与 error（失败原因或None）；
+            目录不存在时返回None
+        """
+        try:
+            if not os.path.isdir(directory):
+                self.logger.error(f"目录不存在: {directory}")
+                return None
+            
+            workers = workers or default_workers() * _SCAN_THREADS_PER_CPU
+            results = list(ordered_map(self._scan_file, self._iter_pdf_files(directory, recursive),
+                                       workers, use_threads=True))
+            
+            encrypted = sum(1 for info in results if info['encrypted'])
+            failed = sum(1 for info in results if info['error'])
+            full = sum(1 for info in results if info['parsed'] == 'full')
+            self.logger.info(f"扫描完成: {len(results)} 个文件，加密 {encrypted} 个，"
+                             f"失败 {failed} 个，完整解析 {full} 个")
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"扫描目录失败: {str(e)}")
+            return None
+    
+    def _iter_pdf_files(self, directory: str, recursive: bool) -> Iterator[str]:
+        """按路径顺序逐个产出目录中的PDF文件"""
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith('.pdf'):
+                    yield os.path.join(root, name)
+            if not recursive:
+                break
+    
+    def _scan_file(self, file_path: str) -> dict:
+        """检查单个文件（在工作线程中执行），出错时记录在 error 中"""
+        try:
+            info, parsed = read_encryption(file_path)
+            return {'file': file_path, **info, 'parsed': parsed, 'error': None}
+        except Exception as e:
+            return {'file': file_path, 'encrypted': None, 'parsed': None, 'error': str(e)}
+    
     def remove_password(self, input_file: str, output_file: str, password: str) -> bool:
         """
         移除PDF密码保护
@@ -0,0 +1,145 @@
+import re
+from typing import List, Optional, Sequence, Set, Tuple
+
+import fitz  # PyMuPDF
+
+from pdf_prune import RESOURCE_CATEGORIES, object_size, references, used_names
+
+# 每个输出文件的固定开销（文件头、目录、页面树、交叉引用表与尾部）
+PART_OVERHEAD = 300
+
+# 页面与页面树节点：复制页面时不会沿这些引用把其它页面带进来
+_PAGE_TYPE_PATTERN = re.compile(r'/Type\s*/Pages?\b')
+
+
+class PageSizeEstimator:
+    """
+    按页估计分割输出的大小
+
+    每页的边际大小是该页可达、而当前分块中还没有的对象大小之和，
+    共享的字体、图片在同一分块中只计一次。遍历在已计入的对象处停止，
+    估计一个分块的开销与分块中的对象数成正比。各对象的大小只读取一次。
+    """
+
+    def __init__(self, pdf_document: fitz.Document, prune: bool = True):
+        """
+        Args:
+            pdf_document: 已打开的输入文档
+            prune: 输出是否裁剪页面资源（见 pdf_prune），为True时只计入内容实际用到的资源
+        """
+        self.pdf_document = pdf_document
+        self.prune = prune
+        # 对象号 -> (估计大小, 引用的对象号, 是否为页面或页面树节点)
+        self._objects = {}
+        # 页面索引 -> 页面直接引用的对象号（分块边界处的页面会被计算两次）
+        self._roots = {}
+
+    def _object(self, xref: int) -> Optional[Tuple[int, List[int], bool]]:
+        """读取并缓存对象信息，无效对象号返回None"""
+        if xref not in self._objects:
+            if not 0 < xref < self.pdf_document.xref_length():
+                return None
+            size, definition = object_size(self.pdf_document, xref)
+            is_page = bool(_PAGE_TYPE_PATTERN.search(definition))
+            self._objects[xref] = (size, references(definition), is_page)
+        return self._objects[xref]
+
+    def _resources_owner(self, page_xref: int) -> int:
+        """资源字典所在的对象：页面本身，或被继承时的上级页面树节点"""
+        node = page_xref
+        visited = set()
+        while node and node not in visited:
+            visited.add(node)
+            if self.pdf_document.xref_get_key(node, 'Resources')[0] != 'null':
+                return node
+            kind, value = self.pdf_document.xref_get_key(node, 'Parent')
+            node = int(value.split()[0]) if kind == 'xref' else 0
+        return page_xref
+
+    def page_roots(self, page_index: int) -> List[int]:
+        """页面直接引用的对象（不含 /Parent；裁剪时资源只取用到的条目）"""
+        document = self.pdf_document
+        page = document[page_index]
+        page_xref = page.xref
+        roots = []
+        for key in document.xref_get_keys(page_xref):
+            if key not in ('Parent', 'Resources'):
+                roots.extend(references(document.xref_get_key(page_xref, key)[1]))
+
+        owner = self._resources_owner(page_xref)
+        used = used_names(document, owner, page.read_contents()) if self.prune else None
+        if used is None or any('#' in name for name in used):
+            roots.extend(references(document.xref_get_key(owner, 'Resources')[1]))
+            return roots
+        for category in RESOURCE_CATEGORIES:
+            if document.xref_get_key(owner, f'Resources/{category}')[0] == 'null':
+                continue
+            for name in used:
+                roots.extend(references(document.xref_get_key(owner, f'Resources/{category}/{name}')[1]))
+        return roots
+
+    def add_page(self, page_index: int, included: Set[int]) -> int:
+        """
+        把一页加入分块
+
+        Args:
+            page_index: 页面索引（从0开始）
+            included: 分块中已计入的对象号，会被更新
+
+        Returns:
+            int: 该页的边际大小（字节）
+        """
+        page_xref = self.pdf_document[page_index].xref
+        total = self._object(page_xref)[0]
+        included.add(page_xref)
+        if page_index not in self._roots:
+            self._roots[page_index] = self.page_roots(page_index)
+        pending = list(self._roots[page_index])
+        while pending:
+            xref = pending.pop()
+            if xref in included:
+                continue
+            info = self._object(xref)
+            if info is None:
+                continue
+            included.add(xref)
+            size, refs, is_page = info
+            if is_page:
+                continue
+            total += size
+            pending.extend(refs)
+        return total
+
+    def pack(self, pages: Sequence[int], max_bytes: float) -> List[Tuple[range, int]]:
+        """
+        按顺序把连续页面贪心地装入估计大小不超过 max_bytes 的分块
+
+        单页超过上限时独占一个分块。
+
+        Args:
+            pages: 连续递增的页面索引
+            max_bytes: 每个分块的大小上限
+
+        Returns:
+            List[Tuple[range, int]]: [(页面范围, 估计大小), ...]
+        """
+        parts = []
+        start = None
+        size = 0
+        included = set()
+        for page_index in pages:
+            marginal = self.add_page(page_index, included)
+            if start is not None and size + marginal > max_bytes:
+                parts.append((range(start, page_index), size))
+                # 新分块从这一页重新计算（共享对象需要再计一次）
+                included = set()
+                start = page_index
+                size = PART_OVERHEAD + self.add_page(page_index, included)
+                continue
+            if start is None:
+                start = page_index
+                size = PART_OVERHEAD
+            size += marginal
+        if start is not None:
+            parts.append((range(start, pages[-1] + 1), size))
+        return parts
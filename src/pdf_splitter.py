@@ -1,22 +1,72 @@
 import os
-from PyPDF2 import PdfReader, PdfWriter
-from typing import List, Optional
+import re
+from contextlib import contextmanager
+from PyPDF2 import PdfReader
+from typing import Iterator, List, Optional, Union
+import fitz  # PyMuPDF
 import logging
 
+from archive_sink import ArchiveTarget, FilteredSink, MemorySink, open_archive
+from page_selection import PageRanges, PageSpec
+from parallel_utils import ordered_map, split_into_shards
+from pdf_backends import PageGroup, ProgressCallback, get_backend
+from pdf_size import PageSizeEstimator
+
+# 输出到归档时每批最多的文件数：各批的数据在内存中交回主进程，批次小则在途数据量有界
+_ARCHIVE_SHARD_GROUPS = 32
+
+
+def _write_groups_worker(task: tuple) -> tuple:
+    """
+    在工作进程中写出一批分割文件
+
+    每个工作进程自己打开输入文件（只读，页面数据通过系统文件缓存共享）。
+    输出到归档时工作进程不能直接写归档，文件内容随结果交回主进程。
+
+    Args:
+        task: (后端名称, 输入文件路径, [(输出文件路径, 页面索引序列), ...], 是否裁剪资源,
+               是否在内存中返回文件内容)
+
+    Returns:
+        tuple: (各文件的大小报告, [(条目名称, 文件内容), ...])
+    """
+    backend_name, input_file, groups, prune, to_memory = task
+    sink = MemorySink() if to_memory else None
+    reports = get_backend(backend_name, 'split').write_pages(input_file, groups, prune=prune, sink=sink)
+    return reports, sink.entries if sink is not None else []
+
+
 class PDFSplitter:
     """PDF分割工具类"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # 最近一次分割或提取的输出大小报告 [{'file', 'size_before', 'size_after'}, ...]
+        self.last_split_report = []
     
-    def split_by_pages(self, input_file: str, output_dir: str, pages_per_file: int = 1) -> bool:
+    def split_by_pages(self, input_file: str, output_dir: str, pages_per_file: int = 1,
+                       backend: Optional[str] = None, workers: int = 1,
+                       progress_callback: Optional[ProgressCallback] = None,
+                       prune: bool = True, archive: Optional[ArchiveTarget] = None) -> bool:
         """
         按页数分割PDF文件
         
+        输出文件名只由页码决定（split_起始-结束.pdf），与进程数无关；
+        页码按总页数的位数补零，按名称排序即按页码排序。
+        各文件的大小记录在 self.last_split_report 中。
+        给定 archive 时所有输出按顺序流式写入一个ZIP/TAR归档，不创建单独的文件。
+        
         Args:
             input_file: 输入PDF文件路径
             output_dir: 输出目录
             pages_per_file: 每个文件的页数
+            backend: 分割后端 (pymupdf, pypdf2, stream)，None表示默认后端
+            workers: 工作进程数，大于1时把输出文件按顺序分成若干批，由各进程并行写出
+            progress_callback: 进度回调 (已写出的文件数, 文件总数)
+            prune: 是否把各页资源字典裁剪为内容实际用到的条目，
+                   避免输出带上只被其它页面使用的字体和图片
+            archive: 归档文件路径（.zip/.tar/.tar.gz）、可写二进制流或 ArchiveSink，
+                     给定时不使用 output_dir
             
         Returns:
             bool: 是否成功
@@ -26,24 +76,23 @@ class PDFSplitter:
                 self.logger.error(f"文件不存在: {input_file}")
                 return False
             
-            os.makedirs(output_dir, exist_ok=True)
-            
-            with open(input_file, 'rb') as file:
-                reader = PdfReader(file)
-                total_pages = len(reader.pages)
-                
+            split_backend = get_backend(backend, 'split')
+            total_pages = split_backend.page_count(input_file)
+            width = len(str(total_pages))
+            with self._open_output(output_dir, archive) as sink:
+                groups = []
                 for i in range(0, total_pages, pages_per_file):
-                    writer = PdfWriter()
                     end_page = min(i + pages_per_file, total_pages)
-                    
-                    for page_num in range(i, end_page):
-                        writer.add_page(reader.pages[page_num])
-                    
-                    output_file = os.path.join(output_dir, f"split_{i+1}-{end_page}.pdf")
-                    with open(output_file, 'wb') as output:
-                        writer.write(output)
-                    
-                    self.logger.info(f"已生成: {output_file}")
+                    output_file = self._output_path(
+                        output_dir, f"split_{i + 1:0{width}d}-{end_page:0{width}d}.pdf", sink)
+                    groups.append((output_file, range(i, end_page)))
+                
+                if workers > 1 and len(groups) > 1:
+                    reports = self._write_groups_parallel(input_file, groups, split_backend.name, workers,
+                                                          progress_callback, prune, sink)
+                else:
+                    reports = split_backend.write_pages(input_file, groups, progress_callback, prune, sink)
+            self._record_report(reports)
             
             return True
             
@@ -51,14 +100,154 @@ class PDFSplitter:
             self.logger.error(f"PDF分割失败: {str(e)}")
             return False
     
-    def split_by_page_ranges(self, input_file: str, output_dir: str, page_ranges: List[str]) -> bool:
+    def _write_groups_parallel(self, input_file: str, groups: List[PageGroup], backend_name: str,
+                               workers: int, progress_callback: Optional[ProgressCallback],
+                               prune: bool, sink=None) -> List[dict]:
+        """
+        多进程写出分割文件
+        
+        每批是连续的若干输出文件，每批完成时回报一次进度。PyMuPDF 打开文件很快，
+        批数取进程数的4倍以均衡负载；基于 PdfReader 的后端每批都要重新解析输入，
+        每个进程只处理一批。输出到归档时每批不超过 _ARCHIVE_SHARD_GROUPS 个文件，
+        主进程按顺序把各批交回的内容写入归档。
+        """
+        shard_count = workers * 4 if backend_name == 'pymupdf' else workers
+        if sink is not None:
+            shard_count = max(shard_count, -(-len(groups) // _ARCHIVE_SHARD_GROUPS))
+        shards = split_into_shards(groups, shard_count)
+        tasks = [(backend_name, input_file, shard, prune, sink is not None) for shard in shards]
+        reports = []
+        for shard_reports, entries in ordered_map(_write_groups_worker, tasks, workers):
+            for name, data in entries:
+                sink.add(name, data)
+            reports.extend(shard_reports)
+            if progress_callback:
+                progress_callback(len(reports), len(groups))
+        return reports
+    
+    def _record_report(self, reports: List[dict]):
+        """保存并记录输出大小报告"""
+        self.last_split_report = reports
+        for report in reports:
+            self.logger.info(f"已生成: {report['file']}（{report['size_after']} 字节）")
+        size_before = sum(report['size_before'] for report in reports)
+        size_after = sum(report['size_after'] for report in reports)
+        if size_before != size_after:
+            self.logger.info(f"资源裁剪: 输出总大小 {size_before} -> {size_after} 字节")
+    
+    @contextmanager
+    def _open_output(self, output_dir: str, archive: Optional[ArchiveTarget]) -> Iterator:
+        """
+        准备输出位置
+        
+        给定归档时产出归档（由本方法打开的在结束时关闭），否则创建输出目录并产出None。
+        """
+        if archive is None:
+            os.makedirs(output_dir, exist_ok=True)
+            yield None
+            return
+        sink, owned = open_archive(archive)
+        try:
+            yield sink
+        finally:
+            if owned:
+                sink.close()
+                self.logger.info(f"已写入归档: {sink.entries} 个文件，共 {sink.bytes_written} 字节")
+    
+    def _output_path(self, output_dir: str, file_name: str, sink) -> str:
+        """输出文件路径；输出到归档时为条目名称"""
+        return file_name if sink is not None else os.path.join(output_dir, file_name)
+    
+    def split_by_size(self, input_file: str, output_dir: str, max_bytes: int,
+                      backend: Optional[str] = None, prune: bool = True,
+                      archive: Optional[ArchiveTarget] = None) -> bool:
+        """
+        按文件大小分割PDF文件
+        
+        逐页估计加入当前分块的边际大小（共享的字体、图片只计一次），
+        按顺序贪心装入不超过 max_bytes 的分块，文件名为 part_起始-结束.pdf（页码补零）。
+        写出后检查每个文件的实际大小，只把超出上限的分块按实际与估计的比例
+        收紧上限后重新分割，其它文件不会被重写。单页超过上限时独占一个文件。
+        输出到归档时超出上限的分块不写入归档，归档条目按写出顺序排列。
+        
+        Args:
+            input_file: 输入PDF文件路径
+            output_dir: 输出目录
+            max_bytes: 每个文件的大小上限（字节）
+            backend: 分割后端 (pymupdf, pypdf2, stream)，None表示默认后端
+            prune: 是否裁剪各页资源字典中未使用的条目
+            archive: 归档文件路径、可写二进制流或 ArchiveSink，给定时不使用 output_dir
+            
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            if not os.path.exists(input_file):
+                self.logger.error(f"文件不存在: {input_file}")
+                return False
+            if max_bytes <= 0:
+                self.logger.error(f"大小上限必须大于0: {max_bytes}")
+                return False
+            
+            split_backend = get_backend(backend, 'split')
+            reports = []
+            with fitz.open(input_file) as pdf_document, self._open_output(output_dir, archive) as sink:
+                estimator = PageSizeEstimator(pdf_document, prune)
+                width = len(str(len(pdf_document)))
+                pending = estimator.pack(range(len(pdf_document)), max_bytes)
+                rounds = 0
+                while pending:
+                    rounds += 1
+                    groups = [(self._output_path(
+                        output_dir, f"part_{pages.start + 1:0{width}d}-{pages.stop:0{width}d}.pdf", sink),
+                        pages) for pages, _ in pending]
+                    page_counts = {output_file: len(pages) for output_file, pages in groups}
+                    # 归档条目写出后不能删除，超出上限的分块在写入前丢弃
+                    round_sink = None if sink is None else FilteredSink(
+                        sink, lambda name, data: len(data) <= max_bytes or page_counts[name] == 1)
+                    written = split_backend.write_pages(input_file, groups, prune=prune, sink=round_sink)
+                    overshoot = []
+                    for (pages, estimate), report in zip(pending, written):
+                        if report['size_after'] <= max_bytes or len(pages) == 1:
+                            reports.append(report)
+                            continue
+                        # 按实际大小与估计的比例收紧上限，只重新分割这一块
+                        if sink is None:
+                            os.remove(report['file'])
+                        budget = max_bytes * estimate / report['size_after']
+                        overshoot.extend(estimator.pack(pages, budget))
+                    pending = overshoot
+            
+            reports.sort(key=lambda report: self._part_start(report['file']))
+            self._record_report(reports)
+            for report in reports:
+                if report['size_after'] > max_bytes:
+                    self.logger.warning(f"单页超过大小上限: {report['file']}（{report['size_after']} 字节）")
+            self.logger.info(f"按大小分割完成: {len(reports)} 个文件，写出 {rounds} 轮")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"PDF分割失败: {str(e)}")
+            return False
+    
+    def _part_start(self, file_path: str) -> int:
+        """从 part_起始-结束.pdf 中取出起始页码"""
+        return int(os.path.basename(file_path)[len('part_'):].split('-')[0])
+    
+    def split_by_page_ranges(self, input_file: str, output_dir: str, page_ranges: List[str],
+                             backend: Optional[str] = None, prune: bool = True,
+                             archive: Optional[ArchiveTarget] = None) -> bool:
         """
         按指定页码范围分割PDF文件
         
         Args:
             input_file: 输入PDF文件路径
             output_dir: 输出目录
-            page_ranges: 页码范围列表，格式: ["1-3", "4-6", "7,9,11"]
+            page_ranges: 页码范围列表，格式: ["1-3", "4-6", "7,9,11", "10-1", "1-last:2", "odd"]
+                         （见 page_selection.PageSpec）
+            backend: 分割后端 (pymupdf, pypdf2, stream)，None表示默认后端
+            prune: 是否裁剪各页资源字典中未使用的条目
+            archive: 归档文件路径、可写二进制流或 ArchiveSink，给定时不使用 output_dir
             
         Returns:
             bool: 是否成功
@@ -68,24 +257,26 @@ class PDFSplitter:
                 self.logger.error(f"文件不存在: {input_file}")
                 return False
             
-            os.makedirs(output_dir, exist_ok=True)
+            # 写出任何文件前先检查所有范围的语法和页码
+            specs = [PageSpec(page_range) for page_range in page_ranges]
+            split_backend = get_backend(backend, 'split')
+            total_pages = split_backend.page_count(input_file)
+            selections = [spec.resolve(total_pages) for spec in specs]
             
-            with open(input_file, 'rb') as file:
-                reader = PdfReader(file)
+            with self._open_output(output_dir, archive) as sink:
+                groups = []
+                width = len(str(len(page_ranges)))
+                for i, (page_range, pages) in enumerate(zip(page_ranges, selections)):
+                    if not pages:
+                        self.logger.warning(f"页码范围 {page_range} 不包含有效页面，已跳过")
+                        continue
+                    # 文件名中不能出现冒号等字符
+                    safe_range = re.sub(r'[^\w,-]', '_', page_range)
+                    output_file = self._output_path(output_dir, f"range_{i + 1:0{width}d}_{safe_range}.pdf", sink)
+                    groups.append((output_file, pages))
                 
-                for i, page_range in enumerate(page_ranges):
-                    writer = PdfWriter()
-                    pages = self._parse_page_range(page_range)
-                    
-                    for page_num in pages:
-                        if 0 <= page_num < len(reader.pages):
-                            writer.add_page(reader.pages[page_num])
-                    
-                    output_file = os.path.join(output_dir, f"range_{i+1}_{page_range}.pdf")
-                    with open(output_file, 'wb') as output:
-                        writer.write(output)
-                    
-                    self.logger.info(f"已生成: {output_file}")
+                reports = split_backend.write_pages(input_file, groups, prune=prune, sink=sink)
+            self._record_report(reports)
             
             return True
             
@@ -93,14 +284,18 @@ class PDFSplitter:
             self.logger.error(f"PDF分割失败: {str(e)}")
             return False
     
-    def extract_pages(self, input_file: str, output_file: str, page_numbers: List[int]) -> bool:
+    def extract_pages(self, input_file: str, output_file: str, page_numbers: Union[List[int], str],
+                      backend: Optional[str] = None, prune: bool = True) -> bool:
         """
         提取指定页面
         
         Args:
             input_file: 输入PDF文件路径
             output_file: 输出PDF文件路径
-            page_numbers: 要提取的页码列表（从1开始）
+            page_numbers: 要提取的页码列表（从1开始，超出范围的页码被忽略），
+                          或页码范围表达式如 "1-3,10-last"（页码超出范围时失败）
+            backend: 提取后端 (pymupdf, pypdf2, stream)，None表示默认后端
+            prune: 是否裁剪各页资源字典中未使用的条目
             
         Returns:
             bool: 是否成功
@@ -110,38 +305,28 @@ class PDFSplitter:
                 self.logger.error(f"文件不存在: {input_file}")
                 return False
             
-            with open(input_file, 'rb') as file:
-                reader = PdfReader(file)
-                writer = PdfWriter()
-                
-                for page_num in page_numbers:
-                    if 1 <= page_num <= len(reader.pages):
-                        writer.add_page(reader.pages[page_num - 1])
-                
-                with open(output_file, 'wb') as output:
-                    writer.write(output)
-                
-                self.logger.info(f"页面提取成功: {output_file}")
-                return True
+            extract_backend = get_backend(backend, 'extract')
+            total_pages = extract_backend.page_count(input_file)
+            if isinstance(page_numbers, str):
+                pages = PageSpec(page_numbers).resolve(total_pages)
+            else:
+                pages = PageRanges.from_pages(page_num - 1 for page_num in page_numbers
+                                              if 1 <= page_num <= total_pages)
+            if not pages:
+                self.logger.error("没有有效的页码")
+                return False
+            
+            self.last_split_report = extract_backend.write_pages(input_file, [(output_file, pages)],
+                                                                 prune=prune)
+            report = self.last_split_report[0]
+            self.logger.info(f"页面提取成功: {output_file}"
+                             f"（{report['size_before']} -> {report['size_after']} 字节）")
+            return True
                 
         except Exception as e:
             self.logger.error(f"页面提取失败: {str(e)}")
             return False
     
-    def _parse_page_range(self, page_range: str) -> List[int]:
-        """解析页码范围字符串"""
-        pages = []
-        parts = page_range.split(',')
-        
-        for part in parts:
-            if '-' in part:
-                start, end = map(int, part.split('-'))
-                pages.extend(range(start - 1, end))  # PDF页码从0开始
-            else:
-                pages.append(int(part) - 1)
-        
-        return pages
-    
     def get_page_count(self, input_file: str) -> Optional[int]:
         """
         获取PDF文件页数
@@ -0,0 +1,176 @@
+import gc
+import io
+from collections import deque
+from typing import BinaryIO, Iterable, List, Optional, Tuple
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+from pdf_stream_writer import PDFStreamWriter
+
+
+class StreamingMerger:
+    """
+    流式合并引擎
+
+    逐个读取输入文件，只复制所选页面可达的对象（跳过 /Parent，
+    不会把整棵页面树带进来），重新编号后立即写入输出；
+    一个输入处理完即释放，峰值内存只与最大的单个输入有关。
+    书签、命名目标和表单等文档级结构不会被复制。
+    """
+
+    def __init__(self, stream: BinaryIO):
+        """
+        Args:
+            stream: 以二进制模式打开的可写输出流
+        """
+        self.writer = PDFStreamWriter(stream)
+
+    def append(self, file_path: str, pages: Optional[List[int]] = None) -> int:
+        """
+        追加一个输入文件的页面
+
+        Args:
+            file_path: 输入PDF文件路径
+            pages: 页面索引列表（从0开始），None表示所有页面
+
+        Returns:
+            int: 追加的页数
+        """
+        with open(file_path, 'rb') as f:
+            count = self._copy_pages(PdfReader(f), file_path, pages)
+        # 读取器与页面对象互相引用，需要主动回收才能及时释放
+        gc.collect()
+        return count
+
+    def append_reader(self, reader: PdfReader, file_path: str, pages: Optional[List[int]] = None) -> int:
+        """
+        从已打开的读取器追加页面（同一输入写出多个文件时避免重复解析）
+
+        Args:
+            reader: 已打开的 PdfReader
+            file_path: 输入文件路径（用于错误信息）
+            pages: 页面索引列表（从0开始），None表示所有页面
+
+        Returns:
+            int: 追加的页数
+        """
+        return self._copy_pages(reader, file_path, pages)
+
+    def _copy_pages(self, reader: PdfReader, file_path: str, pages: Optional[List[int]]) -> int:
+        """复制所选页面及其可达对象"""
+        if reader.is_encrypted and not reader.decrypt(''):
+            raise ValueError(f"文件已加密: {file_path}")
+        page_count = len(reader.pages)
+        if pages is None:
+            pages = list(range(page_count))
+        for page_index in pages:
+            if not 0 <= page_index < page_count:
+                raise ValueError(f"页码超出范围: {page_index + 1}（共 {page_count} 页）")
+
+        copier = _ObjectCopier(self.writer)
+        page_objects = [reader.pages[page_index] for page_index in pages]
+        # 先为所选页面分配编号，页面间的链接可以指向合并后的页面
+        page_numbers = []
+        for page in page_objects:
+            reference = page.indirect_reference
+            key = (reference.idnum, reference.generation)
+            if key in copier.mapping:
+                page_numbers.append(self.writer.reserve())
+            else:
+                page_numbers.append(copier.assign(key))
+
+        for page, number in zip(page_objects, page_numbers):
+            entries = [(key, value) for key, value in page.items() if key != '/Parent']
+            body = copier.serialize_dict(entries, f"/Parent {self.writer.pages_ref} 0 R")
+            self.writer.write_object(number, body)
+            self.writer.add_page_ref(number)
+            copier.flush(reader)
+        return len(pages)
+
+    def close(self):
+        """写出页面树和交叉引用表"""
+        self.writer.close()
+
+
+class _ObjectCopier:
+    """把一个输入文件中的对象重新编号后写入输出"""
+
+    def __init__(self, writer: PDFStreamWriter):
+        self.writer = writer
+        # (对象号, 代号) -> 新编号；None表示引用未选中的页面，写为null
+        self.mapping = {}
+        self.pending = deque()
+
+    def assign(self, key: Tuple[int, int]) -> int:
+        """为对象分配新编号（不加入待写队列）"""
+        number = self.writer.reserve()
+        self.mapping[key] = number
+        return number
+
+    def reference(self, reference: IndirectObject) -> bytes:
+        """输出间接引用，首次遇到的对象加入待写队列"""
+        key = (reference.idnum, reference.generation)
+        if key not in self.mapping:
+            target = reference.get_object()
+            # 未选中的页面和页面树节点不复制
+            if isinstance(target, DictionaryObject) and target.get('/Type') in ('/Page', '/Pages'):
+                self.mapping[key] = None
+            else:
+                self.mapping[key] = self.writer.reserve()
+                self.pending.append((reference, self.mapping[key]))
+        number = self.mapping[key]
+        return b'null' if number is None else f"{number} 0 R".encode('ascii')
+
+    def flush(self, reader: PdfReader):
+        """写出队列中所有待写对象（广度优先，包括它们新引用的对象）"""
+        while self.pending:
+            reference, number = self.pending.popleft()
+            obj = reader.get_object(reference)
+            if isinstance(obj, StreamObject):
+                entries = [(key, value) for key, value in obj.items() if key != '/Length']
+                self.writer.write_stream(number, self.serialize_dict(entries).decode('latin-1'), obj._data)
+            else:
+                self.writer.write_object(number, self.serialize(obj))
+
+    def serialize_dict(self, entries: Iterable[tuple], extra: str = '') -> bytes:
+        """序列化字典条目"""
+        parts = [b'<<']
+        for key, value in entries:
+            parts.append(self.serialize(key))
+            parts.append(b' ')
+            parts.append(self.serialize(value))
+        parts.append(extra.encode('ascii'))
+        parts.append(b'>>')
+        return b''.join(parts)
+
+    def serialize(self, obj) -> bytes:
+        """序列化对象，间接引用改写为新编号"""
+        if isinstance(obj, IndirectObject):
+            return self.reference(obj)
+        if isinstance(obj, DictionaryObject):
+            return self.serialize_dict(obj.items())
+        if isinstance(obj, ArrayObject):
+            return b'[' + b' '.join(self.serialize(item) for item in obj) + b']'
+        buffer = io.BytesIO()
+        obj.write_to_stream(buffer, None)
+        return buffer.getvalue()
+
+
+def stream_merge(sources: Iterable[Tuple[str, Optional[List[int]]]], output_file: str) -> int:
+    """
+    流式合并多个PDF文件
+
+    Args:
+        sources: (文件路径, 页面索引列表或None) 迭代器
+        output_file: 输出PDF文件路径
+
+    Returns:
+        int: 合并后的总页数
+    """
+    with open(output_file, 'wb') as f:
+        merger = StreamingMerger(f)
+        for file_path, pages in sources:
+            merger.append(file_path, pages)
+        merger.close()
+        return merger.writer.page_count
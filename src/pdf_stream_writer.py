@@ -0,0 +1,347 @@
+import io
+import os
+import zlib
+from typing import BinaryIO, Iterable, Optional, Tuple, Union
+
+from PIL import Image, ImageOps, ImageSequence
+
+# 常用纸张尺寸（点，纵向）
+PAGE_SIZES = {
+    'A3': (841.89, 1190.55),
+    'A4': (595.28, 841.89),
+    'A5': (419.53, 595.28),
+    'B5': (498.90, 708.66),
+    'LETTER': (612.0, 792.0),
+    'LEGAL': (612.0, 1008.0)
+}
+
+# 图片未记录分辨率时使用的DPI
+DEFAULT_DPI = 96
+
+# 逐块压缩时每块的目标字节数
+_CHUNK_BYTES = 1024 * 1024
+
+_JPEG_COLORSPACES = {'L': '/DeviceGray', 'RGB': '/DeviceRGB', 'CMYK': '/DeviceCMYK'}
+_FLATE_MODES = {'1': ('/DeviceGray', 1), 'L': ('/DeviceGray', 8),
+                'RGB': ('/DeviceRGB', 8), 'CMYK': ('/DeviceCMYK', 8)}
+
+# EXIF方向标签，以及不含镜像的方向值对应的页面 /Rotate 角度（顺时针）
+_EXIF_ORIENTATION = 0x0112
+_EXIF_ROTATIONS = {1: 0, 3: 180, 6: 90, 8: 270}
+
+
+class PDFStreamWriter:
+    """
+    逐个对象写出PDF的流式写入器
+
+    对象写出后即从内存释放，只记录每个对象的偏移量用于生成交叉引用表，
+    因此内存占用只与单个对象的大小有关。输出流不需要支持 seek。
+    """
+
+    def __init__(self, stream: BinaryIO):
+        """
+        Args:
+            stream: 以二进制模式打开的可写输出流
+        """
+        self._stream = stream
+        self._position = 0
+        self._offsets = {}
+        self._next_number = 1
+        self._page_refs = []
+        self._write(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+        self.pages_ref = self.reserve()
+        self.catalog_ref = self.reserve()
+
+    @property
+    def page_count(self) -> int:
+        """已添加的页面数"""
+        return len(self._page_refs)
+
+    def reserve(self) -> int:
+        """预留一个对象编号，稍后再写出对象内容"""
+        number = self._next_number
+        self._next_number += 1
+        return number
+
+    def write_object(self, number: int, body: Union[str, bytes]):
+        """
+        写出一个非流对象
+
+        Args:
+            number: 对象编号（来自 reserve）
+            body: 对象内容，如 "<</Type/Font ...>>"
+        """
+        if isinstance(body, str):
+            body = body.encode('latin-1')
+        self._begin_object(number)
+        self._write(body)
+        self._write(b'\nendobj\n')
+
+    def write_stream(self, number: int, dictionary: str, data: Union[bytes, Iterable[bytes]]):
+        """
+        写出一个流对象
+
+        Args:
+            number: 对象编号
+            dictionary: 不含 /Length 的流字典，如 "<</Filter/FlateDecode>>"
+            data: 流数据；传入迭代器时逐块写出，长度写入单独的间接对象
+        """
+        if not dictionary.endswith('>>'):
+            raise ValueError(f"无效的流字典: {dictionary}")
+        if isinstance(data, bytes):
+            length_ref, length = None, str(len(data))
+        else:
+            length_ref = self.reserve()
+            length = f"{length_ref} 0 R"
+        self._begin_object(number)
+        self._write(f"{dictionary[:-2]}/Length {length}>>\nstream\n".encode('latin-1'))
+        if isinstance(data, bytes):
+            self._write(data)
+            written = len(data)
+        else:
+            written = 0
+            for chunk in data:
+                self._write(chunk)
+                written += len(chunk)
+        self._write(b'\nendstream\nendobj\n')
+        if length_ref is not None:
+            self.write_object(length_ref, str(written))
+
+    def add_page(self, width: float, height: float, content: bytes, resources: str,
+                 rotate: int = 0) -> int:
+        """
+        添加一个页面
+
+        Args:
+            width: 页面宽度（点）
+            height: 页面高度（点）
+            content: 页面内容流（未压缩）
+            resources: 资源字典
+            rotate: 显示时顺时针旋转的角度（90的倍数）
+
+        Returns:
+            int: 页面对象编号
+        """
+        content_ref = self.reserve()
+        self.write_stream(content_ref, '<</Filter/FlateDecode>>', zlib.compress(content))
+        page_ref = self.reserve()
+        rotate_entry = f"/Rotate {rotate}" if rotate else ''
+        self.write_object(page_ref, f"<</Type/Page/Parent {self.pages_ref} 0 R"
+                                    f"/MediaBox[0 0 {width:.2f} {height:.2f}]{rotate_entry}"
+                                    f"/Resources {resources}/Contents {content_ref} 0 R>>")
+        self.add_page_ref(page_ref)
+        return page_ref
+
+    def add_page_ref(self, page_ref: int):
+        """登记一个已写出的页面对象（其 /Parent 必须指向 pages_ref）"""
+        self._page_refs.append(page_ref)
+
+    def close(self, info: Optional[str] = None):
+        """
+        写出页面树、目录、交叉引用表和文件尾
+
+        Args:
+            info: 文档信息字典，如 "<</Producer(PDF-ToolBox)>>"
+        """
+        kids = ' '.join(f"{ref} 0 R" for ref in self._page_refs)
+        self.write_object(self.pages_ref, f"<</Type/Pages/Kids[{kids}]/Count {len(self._page_refs)}>>")
+        self.write_object(self.catalog_ref, f"<</Type/Catalog/Pages {self.pages_ref} 0 R>>")
+        info_ref = None
+        if info:
+            info_ref = self.reserve()
+            self.write_object(info_ref, info)
+
+        xref_offset = self._position
+        size = self._next_number
+        self._write(f"xref\n0 {size}\n0000000000 65535 f \n".encode('ascii'))
+        lines = []
+        for number in range(1, size):
+            offset = self._offsets.get(number)
+            # 预留后未写出的编号记为空闲对象
+            lines.append(f"{offset:010d} 00000 n \n" if offset is not None else "0000000000 65535 f \n")
+            if len(lines) >= 4096:
+                self._write(''.join(lines).encode('ascii'))
+                lines = []
+        self._write(''.join(lines).encode('ascii'))
+        trailer = f"<</Size {size}/Root {self.catalog_ref} 0 R"
+        if info_ref:
+            trailer += f"/Info {info_ref} 0 R"
+        self._write(f"trailer\n{trailer}>>\nstartxref\n{xref_offset}\n%%EOF\n".encode('ascii'))
+        self._stream.flush()
+
+    def _begin_object(self, number: int):
+        """记录对象偏移并写出对象头"""
+        if number in self._offsets:
+            raise ValueError(f"对象 {number} 已写出")
+        self._offsets[number] = self._position
+        self._write(f"{number} 0 obj\n".encode('ascii'))
+
+    def _write(self, data: bytes):
+        """写出数据并累计偏移量"""
+        self._stream.write(data)
+        self._position += len(data)
+
+
+def page_dimensions(image_width: float, image_height: float, page_size: str,
+                    orientation: str) -> Tuple[float, float]:
+    """
+    计算页面尺寸
+
+    Args:
+        image_width: 图片宽度（点）
+        image_height: 图片高度（点）
+        page_size: 纸张名称，auto表示与图片大小相同
+        orientation: 方向 (portrait, landscape)，auto纸张时忽略
+
+    Returns:
+        (页面宽度, 页面高度)
+    """
+    if page_size.lower() == 'auto':
+        return image_width, image_height
+    width, height = PAGE_SIZES[page_size.upper()]
+    if orientation == 'landscape':
+        width, height = height, width
+    return width, height
+
+
+def write_image_pages(writer: PDFStreamWriter, source: Union[str, bytes],
+                      page_size: str = 'A4', orientation: str = 'portrait') -> int:
+    """
+    将一个图片文件的每一帧写为一页
+
+    JPEG直接嵌入原始数据（DCTDecode），单条带的CCITT G4 TIFF直接嵌入编码数据，
+    其余图片逐块压缩为FlateDecode；多帧TIFF逐帧处理，同一时刻只解码一帧。
+    图片按比例缩放并居中放入页面。
+
+    EXIF方向：直接嵌入的JPEG通过页面 /Rotate 旋转显示（不重新编码），
+    带镜像的方向和重新编码的图片先按 EXIF 摆正像素再写入。
+
+    Args:
+        writer: 流式写入器
+        source: 图片文件路径或图片文件数据
+        page_size: 纸张名称 (A4, A3, Letter等)，auto表示页面与图片大小相同
+        orientation: 方向 (portrait, landscape)
+
+    Returns:
+        int: 写入的页数
+    """
+    with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as image:
+        pages = 0
+        for frame in ImageSequence.Iterator(image):
+            exif_orientation = frame.getexif().get(_EXIF_ORIENTATION, 1)
+            rotate = _EXIF_ROTATIONS.get(exif_orientation) if _is_passthrough_jpeg(frame, pages == 0) else None
+            if rotate is None:
+                rotate = 0
+                if exif_orientation != 1:
+                    frame = ImageOps.exif_transpose(frame)
+            image_ref = _write_image_xobject(writer, frame, source, pages == 0)
+            dpi_x, dpi_y = image_dpi(frame)
+            image_width = frame.width * 72 / dpi_x
+            image_height = frame.height * 72 / dpi_y
+            if rotate in (90, 270):
+                # 按旋转后显示的图片选择页面大小，MediaBox 仍使用未旋转的坐标
+                height, width = page_dimensions(image_height, image_width, page_size, orientation)
+            else:
+                width, height = page_dimensions(image_width, image_height, page_size, orientation)
+            scale = min(width / image_width, height / image_height)
+            draw_width, draw_height = image_width * scale, image_height * scale
+            content = (f"q {draw_width:.4f} 0 0 {draw_height:.4f} {(width - draw_width) / 2:.4f} "
+                       f"{(height - draw_height) / 2:.4f} cm /Im0 Do Q").encode('ascii')
+            writer.add_page(width, height, content, f"<</XObject<</Im0 {image_ref} 0 R>>>>", rotate)
+            pages += 1
+            # MPO（手机拍摄的JPEG）的附加帧是预览图，只取第一帧
+            if image.format == 'MPO':
+                break
+        return pages
+
+
+def image_dpi(image: Image.Image) -> Tuple[float, float]:
+    """读取图片分辨率，缺失或无效时使用默认值（未设置单位的TIFF会报告为1）"""
+    dpi = image.info.get('dpi')
+    try:
+        dpi_x, dpi_y = float(dpi[0]), float(dpi[1])
+    except (TypeError, ValueError, IndexError):
+        return DEFAULT_DPI, DEFAULT_DPI
+    if dpi_x <= 1 or dpi_y <= 1:
+        return DEFAULT_DPI, DEFAULT_DPI
+    return dpi_x, dpi_y
+
+
+def _read_source(source: Union[str, bytes], offset: int = 0, length: Optional[int] = None) -> Iterable[bytes]:
+    """分块读取图片文件的一段数据"""
+    if isinstance(source, bytes):
+        yield source[offset:None if length is None else offset + length]
+        return
+    remaining = os.path.getsize(source) - offset if length is None else length
+    with open(source, 'rb') as f:
+        f.seek(offset)
+        while remaining > 0:
+            chunk = f.read(min(_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _is_passthrough_jpeg(frame: Image.Image, first_frame: bool) -> bool:
+    """该帧是否为可直接嵌入原始数据的JPEG"""
+    return first_frame and frame.format in ('JPEG', 'MPO') and frame.mode in _JPEG_COLORSPACES
+
+
+def _write_image_xobject(writer: PDFStreamWriter, frame: Image.Image,
+                         source: Union[str, bytes], first_frame: bool) -> int:
+    """写出一帧图片的图片对象，返回对象编号"""
+    image_ref = writer.reserve()
+    header = f"<</Type/XObject/Subtype/Image/Width {frame.width}/Height {frame.height}"
+
+    if _is_passthrough_jpeg(frame, first_frame):
+        decode = ''
+        # Adobe软件写出的CMYK JPEG数据是反相的
+        if frame.mode == 'CMYK' and 'adobe' in frame.info:
+            decode = '/Decode[1 0 1 0 1 0 1 0]'
+        writer.write_stream(image_ref, f"{header}/ColorSpace{_JPEG_COLORSPACES[frame.mode]}"
+                                       f"/BitsPerComponent 8{decode}/Filter/DCTDecode>>",
+                            _read_source(source))
+        return image_ref
+
+    if (frame.format == 'TIFF' and frame.info.get('compression') == 'group4'
+            and len(frame.tag_v2.get(273, ())) == 1 and frame.tag_v2.get(266, 1) == 1):
+        black_is_1 = '/BlackIs1 true' if frame.tag_v2.get(262) == 1 else ''
+        writer.write_stream(image_ref, f"{header}/ColorSpace/DeviceGray/BitsPerComponent 1"
+                                       f"/Filter/CCITTFaxDecode/DecodeParms<</K -1/Columns {frame.width}"
+                                       f"/Rows {frame.height}{black_is_1}>>>>",
+                            _read_source(source, frame.tag_v2[273][0], frame.tag_v2[279][0]))
+        return image_ref
+
+    frame = _normalize_mode(frame)
+    colorspace, bits = _FLATE_MODES[frame.mode]
+    writer.write_stream(image_ref, f"{header}/ColorSpace{colorspace}/BitsPerComponent {bits}"
+                                   f"/Filter/FlateDecode>>", _compress_rows(frame))
+    return image_ref
+
+
+def _normalize_mode(frame: Image.Image) -> Image.Image:
+    """转换为PDF可直接表示的颜色模式，透明部分合成到白色背景上"""
+    if frame.mode in _FLATE_MODES:
+        return frame
+    if frame.mode in ('RGBA', 'LA', 'PA') or (frame.mode == 'P' and 'transparency' in frame.info):
+        rgba = frame.convert('RGBA')
+        background = Image.new('RGB', frame.size, 'white')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    if frame.mode.startswith('I'):
+        return frame.convert('I').point(lambda value: value / 256).convert('L')
+    return frame.convert('RGB')
+
+
+def _compress_rows(frame: Image.Image) -> Iterable[bytes]:
+    """按行带逐块压缩像素数据"""
+    row_bytes = (frame.width * len(frame.getbands()) * (1 if frame.mode == '1' else 8) + 7) // 8
+    band = max(1, _CHUNK_BYTES // max(1, row_bytes))
+    compressor = zlib.compressobj(6)
+    for top in range(0, frame.height, band):
+        rows = frame.crop((0, top, frame.width, min(frame.height, top + band))).tobytes()
+        chunk = compressor.compress(rows)
+        if chunk:
+            yield chunk
+    yield compressor.flush()
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from typing import Optional
+import logging
+
+
+class RenderCache:
+    """页面渲染结果的磁盘缓存，超过容量上限时按最近最少使用淘汰"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存容量上限（字节）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """计算文件内容的SHA-256摘要"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(doc_hash: str, page_index: int, dpi: int, colorspace: str,
+                 format: str, *extra) -> str:
+        """
+        生成缓存键
+
+        Args:
+            doc_hash: 输入文件内容摘要
+            page_index: 页面索引（从0开始）
+            dpi: 分辨率
+            colorspace: 颜色空间
+            format: 图片格式
+            extra: 其他影响输出的参数
+
+        Returns:
+            str: 缓存键
+        """
+        parts = [doc_hash, str(page_index), str(dpi), colorspace.upper(), format.lower()]
+        parts.extend(str(value) for value in extra)
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def contains(self, key: str) -> bool:
+        """检查缓存中是否存在该键（不计入命中统计）"""
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取缓存数据，未命中返回None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.record(hit=False)
+            return None
+        self._touch(path)
+        self.record(hit=True)
+        return data
+
+    def get_file(self, key: str, output_file: str) -> bool:
+        """将缓存数据复制到输出文件，未命中返回False"""
+        path = self._path(key)
+        try:
+            shutil.copyfile(path, output_file)
+        except OSError:
+            self.record(hit=False)
+            return False
+        self._touch(path)
+        self.record(hit=True)
+        return True
+
+    def put(self, key: str, data: bytes):
+        """写入缓存数据"""
+        self._store(key, lambda f: f.write(data))
+
+    def put_file(self, key: str, source_file: str):
+        """将已生成的文件复制进缓存"""
+        def copy(f):
+            with open(source_file, 'rb') as src:
+                shutil.copyfileobj(src, f)
+        self._store(key, copy)
+
+    def stats(self) -> dict:
+        """返回缓存统计信息"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes': self._total_bytes,
+            'max_bytes': self.max_bytes
+        }
+
+    def clear(self):
+        """清空缓存"""
+        for path, _, _ in self._scan():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._total_bytes = 0
+
+    def _path(self, key: str) -> str:
+        """缓存键对应的文件路径（两级目录避免单目录文件过多）"""
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def record(self, hit: bool):
+        """记录一次命中或未命中"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _touch(self, path: str):
+        """更新访问时间，用于LRU排序"""
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _store(self, key: str, write):
+        """先写临时文件再原子替换，避免并发读取到半个文件"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self._total_bytes += size - old_size
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+
+    def _scan(self) -> list:
+        """列出所有缓存文件 (路径, 大小, 修改时间)"""
+        entries = []
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """淘汰最久未使用的条目，一次降到上限的90%以减少扫描次数"""
+        with self._lock:
+            entries = sorted(self._scan(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * 0.9
+            for path, size, _ in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._total_bytes = total
+            self.logger.info(f"渲染缓存淘汰完成，当前占用 {total} 字节")
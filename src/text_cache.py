@@ -0,0 +1,125 @@
+import hashlib
+import re
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+import fitz  # PyMuPDF
+
+# 对象定义中的间接引用，如 "12 0 R"
+_REFERENCE_PATTERN = re.compile(r'(\d+) (\d+) R')
+
+
+def page_content_hash(pdf_document: fitz.Document, page_num: int,
+                      object_digests: Optional[Dict[int, Tuple[bytes, List[int]]]] = None) -> str:
+    """
+    计算页面内容摘要
+
+    摘要覆盖页面内容流、页面尺寸与旋转，以及资源字典可达的全部对象
+    （字体、表单等，图片数据除外，因为它不影响提取出的文本）。
+
+    各页共用的字体、表单等对象只需读取和计算一次：传入 object_digests 时，
+    每个对象的摘要和它引用的对象编号记在其中，同一文档的后续页面直接复用。
+
+    Args:
+        pdf_document: 已打开的PDF文档
+        page_num: 页面索引（从0开始）
+        object_digests: 对象摘要缓存 {对象编号: (摘要, 引用的对象编号)}，
+            只能在同一个打开的文档内复用，None表示不缓存
+
+    Returns:
+        str: 十六进制摘要
+    """
+    if object_digests is None:
+        object_digests = {}
+    page = pdf_document.load_page(page_num)
+    digest = hashlib.sha256()
+    digest.update(page.read_contents())
+    digest.update(repr((page.rotation, tuple(page.mediabox), tuple(page.cropbox))).encode('ascii'))
+
+    # 资源字典可能直接写在页面上，也可能继承自上级页面树节点
+    node = page.xref
+    resources = ('null', 'null')
+    visited_nodes = set()
+    while node and node not in visited_nodes:
+        visited_nodes.add(node)
+        resources = pdf_document.xref_get_key(node, 'Resources')
+        if resources[0] != 'null':
+            break
+        parent = pdf_document.xref_get_key(node, 'Parent')
+        node = int(parent[1].split()[0]) if parent[0] == 'xref' else 0
+    digest.update(resources[1].encode('utf-8', 'replace'))
+
+    # 遍历资源引用的对象（线性，每个对象只访问一次）
+    pending = [int(m.group(1)) for m in _REFERENCE_PATTERN.finditer(resources[1])]
+    visited = set()
+    while pending:
+        xref = pending.pop()
+        if xref in visited or xref <= 0:
+            continue
+        visited.add(xref)
+        if xref not in object_digests:
+            object_digests[xref] = _object_digest(pdf_document, xref)
+        object_digest, references = object_digests[xref]
+        digest.update(object_digest)
+        pending.extend(references)
+    return digest.hexdigest()
+
+
+def _object_digest(pdf_document: fitz.Document, xref: int) -> Tuple[bytes, List[int]]:
+    """计算单个对象（定义及非图片数据流）的摘要，并返回它引用的对象编号"""
+    definition = pdf_document.xref_object(xref, compressed=True)
+    digest = hashlib.sha256(definition.encode('utf-8', 'replace'))
+    if pdf_document.xref_is_stream(xref) and '/Image' not in definition:
+        digest.update(pdf_document.xref_stream_raw(xref) or b'')
+    return digest.digest(), [int(m.group(1)) for m in _REFERENCE_PATTERN.finditer(definition)]
+
+
+class TextCache:
+    """按页面内容摘要缓存提取出的文本（SQLite存储）"""
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: SQLite数据库文件路径
+        """
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.reused = 0
+        self.recomputed = 0
+        self._connection = sqlite3.connect(db_path)
+        # WAL模式允许工作进程在主进程写入时并发读取
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS page_text (hash TEXT PRIMARY KEY, text TEXT NOT NULL)')
+        self._connection.commit()
+
+    def get(self, page_hash: str) -> Optional[str]:
+        """按页面摘要读取文本，未命中返回None"""
+        row = self._connection.execute(
+            'SELECT text FROM page_text WHERE hash = ?', (page_hash,)).fetchone()
+        return row[0] if row else None
+
+    def put_many(self, entries: Iterable[Tuple[str, str]]):
+        """批量写入 (页面摘要, 文本)"""
+        self._connection.executemany(
+            'INSERT OR REPLACE INTO page_text (hash, text) VALUES (?, ?)', entries)
+        self._connection.commit()
+
+    def record(self, reused: int = 0, recomputed: int = 0):
+        """累计复用与重新提取的页数"""
+        self.reused += reused
+        self.recomputed += recomputed
+
+    def report(self) -> Dict[str, int]:
+        """返回复用与重新提取的页数统计"""
+        return {'reused': self.reused, 'recomputed': self.recomputed}
+
+    def reset_report(self):
+        """清零统计"""
+        self.reused = 0
+        self.recomputed = 0
+
+    def close(self):
+        """关闭数据库连接"""
+        self._connection.close()
@@ -0,0 +1,376 @@
+import json
+import os
+import re
+import struct
+import zlib
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import logging
+
+# 拉丁字母和数字按单词切分，中日韩文字按二元组切分
+_CJK_RANGES = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af'
+_WORD_PATTERN = re.compile(f'[0-9a-z]+|[{_CJK_RANGES}]+')
+_CJK_PATTERN = re.compile(f'[{_CJK_RANGES}]')
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def tokenize(text: str) -> Set[str]:
+    """将文本切分为索引词条集合"""
+    terms = set()
+    for match in _WORD_PATTERN.finditer(text.lower()):
+        token = match.group(0)
+        if _CJK_PATTERN.match(token):
+            if len(token) == 1:
+                terms.add(token)
+            else:
+                terms.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.add(token)
+    return terms
+
+
+class _Segment:
+    """
+    只读索引段，按需读取
+
+    文件布局: 魔数 | 头部长度 | 压缩的头部 | 数据区。头部记录词典分桶和文档表分块
+    在数据区中的位置；词典按词条哈希分桶，每个词条登记其倒排列表的位置和文档数。
+    查询只读取查询词所在的桶和对应的倒排列表，命中时再读取所需的文档表分块，
+    不需要解压和解析整个段。
+    """
+
+    MAGIC = b'PTIDX2\n\0'
+    _LENGTH = struct.Struct('<I')
+    TERMS_PER_BUCKET = 256
+    DOCS_PER_BLOCK = 1024
+
+    def __init__(self, path: str, header: dict, data_offset: int):
+        self.path = path
+        self.pages = header['pages']
+        self._bucket_ranges = header['buckets']
+        self._doc_blocks = header['docs']
+        self._block_starts = [first for first, _, _ in self._doc_blocks]
+        self._data_offset = data_offset
+        self._buckets = {}
+        self._docs = {}
+        self._decoded = {}
+
+    @classmethod
+    def load(cls, path: str) -> '_Segment':
+        """读取索引段头部"""
+        with open(path, 'rb') as f:
+            if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise ValueError(f"索引段格式不受支持，请删除索引目录后重建: {path}")
+            (length,) = cls._LENGTH.unpack(f.read(cls._LENGTH.size))
+            header = json.loads(zlib.decompress(f.read(length)).decode('utf-8'))
+        return cls(path, header, len(cls.MAGIC) + cls._LENGTH.size + length)
+
+    @classmethod
+    def write(cls, path: str, docs: Dict[int, Tuple[str, int]], terms: Dict[str, List[int]]):
+        """将词典、倒排列表和文档表写入磁盘"""
+        data = bytearray()
+
+        def append(payload) -> list:
+            block = zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+            data.extend(block)
+            return [len(data) - len(block), len(block)]
+
+        buckets = [{} for _ in range(max(1, -(-len(terms) // cls.TERMS_PER_BUCKET)))]
+        for term, doc_ids in terms.items():
+            doc_ids = sorted(doc_ids)
+            offset, length = append([doc_ids[0]] + [b - a for a, b in zip(doc_ids, doc_ids[1:])])
+            buckets[cls._bucket_of(term, len(buckets))][term] = [offset, length, len(doc_ids)]
+        bucket_ranges = [append(bucket) for bucket in buckets]
+
+        doc_ids = sorted(docs)
+        doc_blocks = []
+        for i in range(0, len(doc_ids), cls.DOCS_PER_BLOCK):
+            block = {doc_id: docs[doc_id] for doc_id in doc_ids[i:i + cls.DOCS_PER_BLOCK]}
+            doc_blocks.append([doc_ids[i]] + append(block))
+
+        header = zlib.compress(json.dumps({'pages': len(docs), 'buckets': bucket_ranges, 'docs': doc_blocks},
+                                          separators=(',', ':')).encode('utf-8'), 6)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(cls.MAGIC)
+            f.write(cls._LENGTH.pack(len(header)))
+            f.write(header)
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _bucket_of(term: str, count: int) -> int:
+        """词条所在的词典桶"""
+        return zlib.crc32(term.encode('utf-8')) % count
+
+    def _read(self, offset: int, length: int):
+        """读取并解析数据区中的一个压缩块"""
+        with open(self.path, 'rb') as f:
+            f.seek(self._data_offset + offset)
+            return json.loads(zlib.decompress(f.read(length)).decode('utf-8'))
+
+    def _entry(self, term: str) -> Optional[list]:
+        """词典中该词条的 [位置, 长度, 文档数]，不存在时返回None"""
+        index = self._bucket_of(term, len(self._bucket_ranges))
+        if index not in self._buckets:
+            self._buckets[index] = self._read(*self._bucket_ranges[index])
+        return self._buckets[index].get(term)
+
+    def document_frequency(self, term: str) -> int:
+        """包含该词条的文档数"""
+        entry = self._entry(term)
+        return entry[2] if entry else 0
+
+    def lookup(self, term: str) -> Set[int]:
+        """返回包含该词条的文档编号集合"""
+        if term not in self._decoded:
+            entry = self._entry(term)
+            self._decoded[term] = set(accumulate(self._read(entry[0], entry[1]))) if entry else set()
+        return self._decoded[term]
+
+    def doc(self, doc_id: int) -> Tuple[str, int]:
+        """返回文档编号对应的 (文件路径, 页码)"""
+        index = bisect_right(self._block_starts, doc_id) - 1
+        if index not in self._docs:
+            _, offset, length = self._doc_blocks[index]
+            self._docs[index] = {int(key): (file_path, page) for key, (file_path, page)
+                                 in self._read(offset, length).items()}
+        return self._docs[index][doc_id]
+
+    def terms(self) -> Iterator[str]:
+        """遍历段中的全部词条（读取整个词典）"""
+        for index in range(len(self._bucket_ranges)):
+            if index not in self._buckets:
+                self._buckets[index] = self._read(*self._bucket_ranges[index])
+            yield from self._buckets[index]
+
+    def doc_ids(self) -> Iterator[int]:
+        """遍历段中的全部文档编号（读取整个文档表）"""
+        for index, first in enumerate(self._block_starts):
+            self.doc(first)
+            yield from self._docs[index]
+
+
+class TextIndex:
+    """基于页面文本的本地全文倒排索引，支持增量添加、更新、删除和段合并"""
+
+    def __init__(self, index_dir: str, segment_pages: int = 5000):
+        """
+        Args:
+            index_dir: 索引目录
+            segment_pages: 每个索引段最多包含的页面数
+        """
+        self.logger = logging.getLogger(__name__)
+        self.index_dir = index_dir
+        self.segment_pages = segment_pages
+        os.makedirs(index_dir, exist_ok=True)
+        self._manifest = self._load_manifest()
+        self._segments = {}
+        self._deleted = None
+
+    def update_files(self, input_files: List[str], converter, workers: int = 1) -> dict:
+        """
+        将PDF文件加入索引；已索引且未修改的文件跳过，已修改的文件重新索引
+
+        Args:
+            input_files: PDF文件路径列表
+            converter: 用于提取页面文本的 PDFConverter 实例
+            workers: 文本提取进程数
+
+        Returns:
+            dict: 统计信息 (added, updated, skipped, pages)
+        """
+        to_index = []
+        stats = {'added': 0, 'updated': 0, 'skipped': 0, 'pages': 0}
+        for input_file in input_files:
+            key = os.path.abspath(input_file)
+            entry = self._manifest['files'].get(key)
+            signature = self._file_signature(input_file)
+            if entry is not None and entry['signature'] == signature:
+                stats['skipped'] += 1
+                continue
+            if entry is not None:
+                self._delete_entry(key)
+                stats['updated'] += 1
+            else:
+                stats['added'] += 1
+            to_index.append(input_file)
+
+        records = ((os.path.abspath(file_path), page, text) for file_path, page, text
+                   in converter.iter_page_texts(to_index, workers=workers))
+        stats['pages'] = self.add_pages(records)
+        for input_file in to_index:
+            # 提取失败的文件不登记，下次会重试
+            entry = self._manifest['files'].get(os.path.abspath(input_file))
+            if entry is not None:
+                entry['signature'] = self._file_signature(input_file)
+        self._save_manifest()
+        return stats
+
+    def add_pages(self, records: Iterable[Tuple[str, int, str]]) -> int:
+        """
+        将页面文本写入新的索引段，每 segment_pages 页落盘一个段
+
+        Args:
+            records: (文件路径, 页码, 文本) 迭代器
+
+        Returns:
+            int: 写入的页面数
+        """
+        docs = {}
+        terms = {}
+        total = 0
+        for file_path, page, text in records:
+            doc_id = self._manifest['next_doc']
+            self._manifest['next_doc'] += 1
+            docs[doc_id] = (file_path, page)
+            self._manifest['files'].setdefault(file_path, {'docs': [], 'signature': None})
+            self._manifest['files'][file_path]['docs'].append(doc_id)
+            for term in tokenize(text):
+                terms.setdefault(term, []).append(doc_id)
+            total += 1
+            if len(docs) >= self.segment_pages:
+                self._flush_segment(docs, terms)
+                docs, terms = {}, {}
+        if docs:
+            self._flush_segment(docs, terms)
+        self._save_manifest()
+        return total
+
+    def remove_files(self, input_files: List[str]) -> int:
+        """
+        从索引中删除文件（标记删除，段合并时真正清除）
+
+        Returns:
+            int: 删除的文件数
+        """
+        removed = 0
+        for input_file in input_files:
+            key = os.path.abspath(input_file)
+            if key in self._manifest['files']:
+                self._delete_entry(key)
+                removed += 1
+        self._save_manifest()
+        return removed
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        查询同时包含所有词条的页面
+
+        Args:
+            query: 查询字符串
+            limit: 最多返回的结果数，None表示不限制
+
+        Returns:
+            List[Tuple[str, int]]: 按文件和页码排序的 (文件路径, 页码) 列表
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        deleted = self._deleted_set()
+        hits = []
+        for name in self._manifest['segments']:
+            segment = self._segment(name)
+            matched = None
+            # 先取最短的倒排列表，尽早缩小候选集
+            for term in sorted(terms, key=segment.document_frequency):
+                doc_ids = segment.lookup(term)
+                matched = doc_ids if matched is None else matched & doc_ids
+                if not matched:
+                    break
+            if matched:
+                hits.extend(segment.doc(doc_id) for doc_id in matched if doc_id not in deleted)
+        hits.sort()
+        return hits[:limit] if limit is not None else hits
+
+    def compact(self) -> int:
+        """
+        将所有段合并为一个段并清除已删除的页面
+
+        Returns:
+            int: 合并后的页面数
+        """
+        deleted = self._deleted_set()
+        docs = {}
+        terms = {}
+        old_segments = list(self._manifest['segments'])
+        for name in old_segments:
+            segment = self._segment(name)
+            live = {doc_id: segment.doc(doc_id) for doc_id in segment.doc_ids() if doc_id not in deleted}
+            docs.update(live)
+            for term in segment.terms():
+                doc_ids = [doc_id for doc_id in segment.lookup(term) if doc_id in live]
+                if doc_ids:
+                    terms.setdefault(term, []).extend(doc_ids)
+
+        self._manifest['segments'] = []
+        self._manifest['deleted'] = []
+        self._deleted = None
+        if docs:
+            self._flush_segment(docs, terms)
+        self._save_manifest()
+        for name in old_segments:
+            self._segments.pop(name, None)
+            os.remove(os.path.join(self.index_dir, name))
+        self.logger.info(f"索引合并完成: {len(old_segments)} 个段合并为 {len(self._manifest['segments'])} 个")
+        return len(docs)
+
+    def stats(self) -> dict:
+        """返回索引统计信息"""
+        pages = sum(len(entry['docs']) for entry in self._manifest['files'].values())
+        return {
+            'files': len(self._manifest['files']),
+            'pages': pages,
+            'segments': len(self._manifest['segments']),
+            'deleted': len(self._manifest['deleted'])
+        }
+
+    def _file_signature(self, input_file: str) -> list:
+        """用文件大小和修改时间判断文件是否变化"""
+        stat = os.stat(input_file)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _delete_entry(self, key: str):
+        """标记删除某个文件的全部页面"""
+        entry = self._manifest['files'].pop(key)
+        self._manifest['deleted'].extend(entry['docs'])
+        if self._deleted is not None:
+            self._deleted.update(entry['docs'])
+
+    def _deleted_set(self) -> Set[int]:
+        """已标记删除的页面编号集合（首次使用时由清单构建并缓存）"""
+        if self._deleted is None:
+            self._deleted = set(self._manifest['deleted'])
+        return self._deleted
+
+    def _segment(self, name: str) -> _Segment:
+        """读取并缓存索引段"""
+        if name not in self._segments:
+            self._segments[name] = _Segment.load(os.path.join(self.index_dir, name))
+        return self._segments[name]
+
+    def _flush_segment(self, docs: Dict[int, Tuple[str, int]], terms: Dict[str, List[int]]):
+        """写入一个新的索引段并登记到清单"""
+        name = f"seg_{self._manifest['next_segment']:06d}.seg"
+        self._manifest['next_segment'] += 1
+        _Segment.write(os.path.join(self.index_dir, name), docs, terms)
+        self._manifest['segments'].append(name)
+        self.logger.info(f"已写入索引段: {name}（{len(docs)} 页）")
+
+    def _load_manifest(self) -> dict:
+        """读取索引清单，不存在时创建空清单"""
+        path = os.path.join(self.index_dir, MANIFEST_NAME)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'next_segment': 1, 'next_doc': 1, 'segments': [], 'files': {}, 'deleted': []}
+
+    def _save_manifest(self):
+        """原子写入索引清单"""
+        path = os.path.join(self.index_dir, MANIFEST_NAME)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共设置
+把src目录加入导入路径，与 benchmarks/common.py 相同
+"""
+
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(current_dir), 'src'))
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+归档输出测试
+"""
+
+import io
+import os
+import tarfile
+import zipfile
+
+import fitz  # PyMuPDF
+import pytest
+
+from archive_sink import ArchiveSink, FilteredSink, MemorySink, archive_format, open_archive
+from pdf_converter import PDFConverter
+from pdf_splitter import PDFSplitter
+
+
+class _Pipe(io.RawIOBase):
+    """只能顺序写入、不能定位的输出流（模拟管道或套接字）"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        raise OSError("不能定位")
+
+    def seek(self, *args):
+        raise OSError("不能定位")
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+def _make_pdf(path, pages):
+    """生成每页写有页码的PDF"""
+    with fitz.open() as pdf_document:
+        for page_num in range(pages):
+            pdf_document.new_page(width=200, height=200).insert_text((20, 40), f"page {page_num + 1}")
+        pdf_document.save(path)
+    return path
+
+
+def _read_entries(data, format):
+    """读取归档中的条目 [(名称, 内容), ...]"""
+    if format == 'zip':
+        with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+            return [(name, zip_file.read(name)) for name in zip_file.namelist()]
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar_file:
+        return [(member.name, tar_file.extractfile(member).read()) for member in tar_file.getmembers()]
+
+
+def test_archive_format():
+    """按扩展名判断归档格式"""
+    assert archive_format('out.ZIP') == 'zip'
+    assert archive_format('out.tar') == 'tar'
+    assert archive_format('out.tar.gz') == 'tar.gz'
+    assert archive_format('out.tgz') == 'tar.gz'
+    assert archive_format('out.pdf') is None
+
+
+@pytest.mark.parametrize('name, format', [('out.zip', 'zip'), ('out.tar', 'tar'), ('out.tgz', 'tar.gz')])
+def test_write_to_path(tmp_path, name, format):
+    """按扩展名选择格式，条目按写入顺序排列"""
+    path = str(tmp_path / name)
+    with ArchiveSink(path) as sink:
+        sink.add('b.txt', b'second')
+        sink.add('a.txt', b'first')
+    assert sink.format == format
+    assert (sink.entries, sink.bytes_written) == (2, 11)
+    with open(path, 'rb') as f:
+        assert _read_entries(f.read(), format) == [('b.txt', b'second'), ('a.txt', b'first')]
+
+
+@pytest.mark.parametrize('format', ['zip', 'tar', 'tar.gz'])
+def test_write_to_unseekable_stream(format):
+    """不能定位的流也能写出完整的归档，流不会被关闭"""
+    pipe = _Pipe()
+    with ArchiveSink(pipe, format) as sink:
+        sink.add('1.pdf', b'%PDF-1' * 1000)
+        sink.add('2.pdf', b'%PDF-2')
+    assert not pipe.closed
+    assert _read_entries(pipe.buffer.getvalue(), format) == [('1.pdf', b'%PDF-1' * 1000), ('2.pdf', b'%PDF-2')]
+
+
+def test_stream_defaults_to_zip():
+    """目标为流且未指定格式时写ZIP"""
+    buffer = io.BytesIO()
+    with ArchiveSink(buffer) as sink:
+        sink.add('a.txt', b'a')
+    assert sink.format == 'zip'
+    assert zipfile.is_zipfile(io.BytesIO(buffer.getvalue()))
+
+
+def test_invalid_use(tmp_path):
+    """不支持的格式、重复的条目名称和关闭后写入都报错"""
+    with pytest.raises(ValueError):
+        ArchiveSink(io.BytesIO(), 'rar')
+    sink = ArchiveSink(io.BytesIO())
+    sink.add('a.txt', b'a')
+    with pytest.raises(ValueError):
+        sink.add('a.txt', b'b')
+    sink.close()
+    with pytest.raises(ValueError, match='归档已关闭'):
+        sink.add('b.txt', b'b')
+
+
+def test_error_removes_partial_archive(tmp_path):
+    """出错退出时删除不完整的归档文件"""
+    path = str(tmp_path / 'out.zip')
+    with pytest.raises(RuntimeError):
+        with ArchiveSink(path) as sink:
+            sink.add('a.txt', b'a')
+            raise RuntimeError
+    assert not os.path.exists(path)
+
+
+def test_memory_and_filtered_sinks():
+    """内存归档按顺序收集条目，过滤归档只转交被接受的条目"""
+    memory = MemorySink()
+    sink = FilteredSink(memory, lambda name, data: len(data) <= 2)
+    for name, data in [('a', b'1'), ('b', b'123'), ('c', b'12')]:
+        sink.add(name, data)
+    assert memory.entries == [('a', b'1'), ('c', b'12')]
+
+
+def test_open_archive(tmp_path):
+    """已打开的归档原样返回且不由调用方关闭，路径和流新建归档"""
+    sink = ArchiveSink(io.BytesIO())
+    assert open_archive(sink) == (sink, False)
+    opened, owned = open_archive(str(tmp_path / 'out.tar'))
+    assert owned and opened.format == 'tar'
+    opened.close()
+    sink.close()
+
+
+def test_split_and_render_into_one_stream(tmp_path):
+    """分割和转图片的输出可以写进同一个不能定位的流"""
+    input_file = _make_pdf(str(tmp_path / 'in.pdf'), 3)
+    pipe = _Pipe()
+    with ArchiveSink(pipe, 'tar') as sink:
+        assert PDFSplitter().split_by_pages(input_file, '', pages_per_file=2, archive=sink)
+        assert PDFConverter().pdf_to_images(input_file, '', dpi=36, archive=sink)
+
+    entries = _read_entries(pipe.buffer.getvalue(), 'tar')
+    names = [name for name, _ in entries]
+    assert names[:2] == ['split_1-2.pdf', 'split_3-3.pdf']
+    assert len(names) == 5 and all(name.endswith('.png') for name in names[2:])
+    with fitz.open(stream=entries[1][1], filetype='pdf') as pdf_document:
+        assert pdf_document[0].get_text().strip() == 'page 3'
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+PDF压缩测试
+"""
+
+import io
+import os
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+import image_optimizer
+from pdf_converter import PDFConverter
+
+
+def _make_scan_pdf(path):
+    """生成一页带噪点的黑白扫描图片（Flate编码）"""
+    rng = np.random.default_rng(0)
+    pixels = np.full((1600, 1200), 255, np.int16)
+    for _ in range(3000):
+        y, x = rng.integers(0, 1590), rng.integers(0, 1180)
+        pixels[y:y + 8, x:x + int(rng.integers(5, 20))] = 0
+    pixels = np.clip(pixels + rng.integers(-20, 20, pixels.shape), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'PNG')
+    with fitz.open() as pdf_document:
+        page = pdf_document.new_page(width=576, height=768)
+        page.insert_image(page.rect, stream=buffer.getvalue())
+        pdf_document.save(path)
+    return path
+
+
+def test_target_size_search_uses_profile(tmp_path):
+    """bitonal 配置按CCITT G4试算，不会因JPEG估算偏大而选择损失更大的设置"""
+    input_file = _make_scan_pdf(str(tmp_path / 'scan.pdf'))
+    size = os.path.getsize(input_file)
+    converter = PDFConverter()
+    assert converter._search_quality_ladder(input_file, size, 120000, 'JPEG', 1) > 0
+    assert converter._search_quality_ladder(input_file, size, 120000, 'JPEG', 1, 'bitonal') == 0
+
+    output_file = str(tmp_path / 'out.pdf')
+    assert converter.compress_pdf(input_file, output_file, target_size=120000, profile='bitonal')
+    assert os.path.getsize(output_file) <= 120000
+
+
+def test_decoded_cache_is_shared_between_workers(tmp_path, monkeypatch):
+    """各工作进程的解码缓存上限按进程数平分"""
+    input_file = _make_scan_pdf(str(tmp_path / 'scan.pdf'))
+    # 记下原值，测试结束后恢复模块状态
+    monkeypatch.setattr(image_optimizer, '_worker_document', None)
+    monkeypatch.setattr(image_optimizer, '_decoded_cache_limit', image_optimizer.DECODED_CACHE_BYTES)
+
+    image_optimizer.init_optimizer_worker(input_file, 8)
+    image_optimizer._worker_document.close()
+    assert image_optimizer._decoded_cache_limit == image_optimizer.DECODED_CACHE_BYTES // 8
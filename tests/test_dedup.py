@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+对象去重测试
+"""
+
+import os
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from pdf_dedup import deduplicate_file, deduplicate_objects
+
+
+def _make_source(tmp_path):
+    """生成一页带图片和文字的PDF"""
+    image_file = str(tmp_path / 'image.png')
+    Image.new('RGB', (64, 64), (200, 30, 30)).save(image_file)
+    path = str(tmp_path / 'source.pdf')
+    with fitz.open() as pdf_document:
+        page = pdf_document.new_page()
+        page.insert_image(fitz.Rect(72, 72, 272, 272), filename=image_file)
+        page.insert_text((72, 400), 'dedup')
+        pdf_document.save(path)
+    return path
+
+
+def _make_copies(tmp_path, copies=3):
+    """把同一个单页文件插入多次，每份都带有自己的图片和字体对象"""
+    source = _make_source(tmp_path)
+    path = str(tmp_path / 'copies.pdf')
+    with fitz.open() as pdf_document:
+        for _ in range(copies):
+            with fitz.open(source) as source_document:
+                pdf_document.insert_pdf(source_document)
+        pdf_document.save(path)
+    return path
+
+
+def _shared_xrefs(pdf_document):
+    """各页引用的图片和字体对象号"""
+    images = {image[0] for page in pdf_document for image in page.get_images()}
+    fonts = {font[0] for page in pdf_document for font in page.get_fonts()}
+    return images, fonts
+
+
+def test_duplicates_are_shared(tmp_path):
+    """各页相同的图片和字体合并为同一个对象，页面内容不变"""
+    path = _make_copies(tmp_path)
+    with fitz.open(path) as pdf_document:
+        images, fonts = _shared_xrefs(pdf_document)
+        assert len(images) == 3 and len(fonts) == 3
+        contents = [page.get_contents() for page in pdf_document]
+
+        result = deduplicate_objects(pdf_document)
+        assert result['duplicates'] >= 4
+        assert result['saved_bytes'] > 0
+        assert _shared_xrefs(pdf_document) == ({min(images)}, {min(fonts)})
+        # 页面内容流不参与合并
+        assert [page.get_contents() for page in pdf_document] == contents
+        assert [page.get_text().strip() for page in pdf_document] == ['dedup'] * 3
+
+
+def test_no_duplicates(tmp_path):
+    """没有重复对象时不修改文档"""
+    source = _make_source(tmp_path)
+    with fitz.open(source) as pdf_document:
+        assert deduplicate_objects(pdf_document) == {'duplicates': 0, 'saved_bytes': 0}
+
+
+def test_deduplicate_file_in_place(tmp_path):
+    """输出路径与输入相同时原地替换，合并掉的对象不再写出"""
+    path = _make_copies(tmp_path)
+    size = os.path.getsize(path)
+
+    result = deduplicate_file(path, path)
+    assert result['duplicates'] > 0
+    assert os.path.getsize(path) < size
+    assert not os.path.exists(path + '.tmp')
+    with fitz.open(path) as pdf_document:
+        images, fonts = _shared_xrefs(pdf_document)
+        assert len(images) == 1 and len(fonts) == 1
+        assert pdf_document.page_count == 3
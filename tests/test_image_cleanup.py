@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+扫描图片清理测试
+"""
+
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from image_cleanup import clean_image
+
+
+def _page():
+    """未旋转的页面：几行文字和一条略有偏差的手画横线"""
+    image = Image.new('L', (1240, 1754), 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=28)
+    for i in range(3):
+        draw.text((150, 200 + i * 45), f"Invoice total amount due {i}", fill=0, font=font)
+    draw.line([(150, 900), (1100, 903)], fill=0, width=3)
+    return image
+
+
+def test_unrotated_page_is_unchanged():
+    """未旋转的页面在摆正后保持原样，不因估计误差被轻微旋转"""
+    image = _page()
+    cleaned = clean_image(image, autocrop=False, deskew=True)
+    assert cleaned.size == image.size
+    assert ImageChops.difference(cleaned, image).getbbox() is None
+
+
+def test_skewed_page_is_rotated():
+    """明显倾斜的页面仍会被摆正"""
+    image = _page().rotate(3, resample=Image.BICUBIC, expand=True, fillcolor=255)
+    cleaned = clean_image(image, autocrop=False, deskew=True)
+    assert cleaned.size != image.size
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+图片转PDF测试
+"""
+
+import io
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+import image_pipeline
+from pdf_converter import PDFConverter
+
+
+def _save_rotated(path, format):
+    """保存一张 200x100、EXIF方向为6（需顺时针旋转90度显示）的图片，左半边为红色"""
+    image = Image.new('RGB', (200, 100), 'white')
+    image.paste((255, 0, 0), (0, 0, 100, 100))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    image.save(path, format=format, exif=exif.tobytes(), dpi=(72, 72))
+
+
+def _top_half_is_red(page):
+    """显示后的页面上半部分为红色（原图左半边旋转到了上方）"""
+    pix = page.get_pixmap(matrix=fitz.Matrix(0.5, 0.5))
+    r, g, b = pix.pixel(pix.width // 2, pix.height // 4)
+    return r > 200 and g < 80 and b < 80
+
+
+def test_passthrough_jpeg_uses_exif_rotation(tmp_path):
+    """直接嵌入的JPEG按EXIF方向设置 /Rotate，显示为纵向"""
+    image_file = str(tmp_path / 'rotated.jpg')
+    output_file = str(tmp_path / 'out.pdf')
+    _save_rotated(image_file, 'JPEG')
+
+    assert PDFConverter().images_to_pdf([image_file], output_file, page_size='auto')
+    with fitz.open(output_file) as pdf_document:
+        page = pdf_document[0]
+        assert page.rotation == 90
+        assert round(page.rect.width) == 100 and round(page.rect.height) == 200
+        assert _top_half_is_red(page)
+
+
+def test_passthrough_jpeg_fits_portrait_page(tmp_path):
+    """旋转后的图片放入A4纵向页面，显示的页面仍为纵向"""
+    image_file = str(tmp_path / 'rotated.jpg')
+    output_file = str(tmp_path / 'out.pdf')
+    _save_rotated(image_file, 'JPEG')
+
+    assert PDFConverter().images_to_pdf([image_file], output_file, page_size='A4')
+    with fitz.open(output_file) as pdf_document:
+        page = pdf_document[0]
+        assert page.rect.width < page.rect.height
+        assert _top_half_is_red(page)
+
+
+def test_reencoded_image_is_transposed(tmp_path):
+    """重新编码的图片先按EXIF摆正像素，页面不旋转"""
+    image_file = str(tmp_path / 'rotated.png')
+    output_file = str(tmp_path / 'out.pdf')
+    _save_rotated(image_file, 'PNG')
+
+    assert PDFConverter().images_to_pdf([image_file], output_file, page_size='auto')
+    with fitz.open(output_file) as pdf_document:
+        page = pdf_document[0]
+        assert page.rotation == 0
+        assert round(page.rect.width) == 100 and round(page.rect.height) == 200
+        assert _top_half_is_red(page)
+
+
+def test_multiframe_tiff_is_prepared_frame_by_frame(tmp_path):
+    """预处理时多帧TIFF每帧一个任务，按帧顺序逐页写入"""
+    image_file = str(tmp_path / 'frames.tif')
+    colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+    frames = [Image.new('RGB', (100, 100), color) for color in colors]
+    frames[0].save(image_file, save_all=True, append_images=frames[1:], dpi=(72, 72))
+
+    options = image_pipeline.make_options(max_dpi=300)
+    tasks = list(image_pipeline.frame_tasks([image_file], options))
+    assert [index for _, index, _ in tasks] == [0, 1, 2]
+    assert all(isinstance(image_pipeline.prepare_image(task), bytes) for task in tasks)
+
+    for workers in (1, 2):
+        output_file = str(tmp_path / f'out_{workers}.pdf')
+        assert PDFConverter().images_to_pdf([image_file], output_file, page_size='auto',
+                                            preprocess=True, workers=workers)
+        with fitz.open(output_file) as pdf_document:
+            assert len(pdf_document) == 3
+            for page, color in zip(pdf_document, colors):
+                pix = page.get_pixmap(matrix=fitz.Matrix(0.2, 0.2))
+                assert all(abs(a - b) < 40 for a, b in zip(pix.pixel(5, 5), color))
+
+
+def _photo(size=(120, 80)):
+    """彩色噪点图片（不接近黑白）"""
+    width, height = size
+    return Image.fromarray(np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8))
+
+
+def _scan(size=(120, 80)):
+    """白底黑字的扫描页（接近黑白）"""
+    image = Image.new('L', size, 255)
+    image.paste(0, (10, 10, 100, 20))
+    return image
+
+
+def test_mpo_is_passed_through(tmp_path):
+    """手机拍摄的MPO（带预览帧）满足要求时原样嵌入"""
+    image_file = str(tmp_path / 'photo.mpo')
+    photo = _photo()
+    photo.save(image_file, 'MPO', save_all=True, append_images=[photo.resize((40, 30))])
+
+    options = image_pipeline.make_options(max_dpi=300)
+    tasks = list(image_pipeline.frame_tasks([image_file], options))
+    assert len(tasks) == 1
+    assert image_pipeline.prepare_image(tasks[0]) == image_file
+
+
+def test_bitonal_profile_only_converts_bitonal_frames(tmp_path):
+    """只启用二值化时，不接近黑白的图片原样写入，不重新编码为JPEG"""
+    options = image_pipeline.make_options(reencode=False, bitonal=True)
+    photo_png = str(tmp_path / 'photo.png')
+    photo_jpg = str(tmp_path / 'photo.jpg')
+    scan_png = str(tmp_path / 'scan.png')
+    frames_tif = str(tmp_path / 'frames.tif')
+    _photo().save(photo_png)
+    _photo().save(photo_jpg, quality=90)
+    _scan().save(scan_png)
+    _photo().save(frames_tif, save_all=True, append_images=[_scan().convert('RGB')])
+
+    assert image_pipeline.prepare_image((photo_png, 0, options)) == photo_png
+    assert image_pipeline.prepare_image((photo_jpg, 0, options)) == photo_jpg
+    with Image.open(io.BytesIO(image_pipeline.prepare_image((scan_png, 0, options)))) as converted:
+        assert converted.mode == '1'
+    # 多帧文件中无需处理的帧无损取出
+    with Image.open(io.BytesIO(image_pipeline.prepare_image((frames_tif, 0, options)))) as frame:
+        assert np.array_equal(np.asarray(frame), np.asarray(_photo()))
+    with Image.open(io.BytesIO(image_pipeline.prepare_image((frames_tif, 1, options)))) as frame:
+        assert frame.mode == '1'
+
+    output_file = str(tmp_path / 'out.pdf')
+    assert PDFConverter().images_to_pdf([photo_png, photo_jpg, scan_png], output_file, profile='bitonal')
+    with fitz.open(output_file) as pdf_document:
+        filters = [pdf_document.xref_get_key(page.get_images()[0][0], 'Filter')[1] for page in pdf_document]
+    assert filters == ['/FlateDecode', '/DCTDecode', '/CCITTFaxDecode']
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+PDF合并测试
+"""
+
+import fitz  # PyMuPDF
+
+from pdf_merger import PDFMerger
+
+
+def _make_pdf_with_toc(path):
+    """生成4页、带两级书签的PDF"""
+    with fitz.open() as pdf_document:
+        for _ in range(4):
+            pdf_document.new_page()
+        pdf_document.set_toc([[1, 'A', 1], [2, 'A1', 2], [1, 'B', 3], [2, 'B1', 4]])
+        pdf_document.save(path)
+    return path
+
+
+def test_merge_keeps_bookmarks(tmp_path):
+    """合并后保留每个输入的书签，页码按输入在输出中的位置偏移"""
+    source = _make_pdf_with_toc(str(tmp_path / 'toc.pdf'))
+    output_file = str(tmp_path / 'merged.pdf')
+
+    assert PDFMerger().merge_pdfs([source, source], output_file)
+    with fitz.open(output_file) as pdf_document:
+        assert pdf_document.get_toc() == [
+            [1, 'A', 1], [2, 'A1', 2], [1, 'B', 3], [2, 'B1', 4],
+            [1, 'A', 5], [2, 'A1', 6], [1, 'B', 7], [2, 'B1', 8],
+        ]
+
+
+def test_merge_with_order_drops_unselected_bookmarks(tmp_path):
+    """只保留指向选中页面的书签，父书签被丢弃时子书签提升一级"""
+    source = _make_pdf_with_toc(str(tmp_path / 'toc.pdf'))
+    output_file = str(tmp_path / 'merged.pdf')
+
+    assert PDFMerger().merge_pdfs_with_order([(source, '2-3'), (source, '4')], output_file)
+    with fitz.open(output_file) as pdf_document:
+        assert pdf_document.get_toc() == [[1, 'A1', 1], [1, 'B', 2], [1, 'B1', 3]]
+
+
+def test_incremental_merge_keeps_bookmarks(tmp_path):
+    """增量合并重建书签，沿用的输入保留清单中记录的书签"""
+    first = _make_pdf_with_toc(str(tmp_path / 'first.pdf'))
+    second = _make_pdf_with_toc(str(tmp_path / 'second.pdf'))
+    output_file = str(tmp_path / 'merged.pdf')
+    merger = PDFMerger()
+
+    assert merger.merge_pdfs([first], output_file, incremental=True)
+    assert merger.merge_pdfs([first, second], output_file, incremental=True)
+    assert merger.last_merge_report['mode'] == 'incremental'
+    with fitz.open(output_file) as pdf_document:
+        assert pdf_document.get_toc() == [
+            [1, 'A', 1], [2, 'A1', 2], [1, 'B', 3], [2, 'B1', 4],
+            [1, 'A', 5], [2, 'A1', 6], [1, 'B', 7], [2, 'B1', 8],
+        ]
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+页码范围表达式测试
+"""
+
+import pytest
+
+from page_selection import PageRanges, PageSpec, select_pages
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ('5', [4]),
+    ('1-3,5', [0, 1, 2, 4]),
+    ('3-1', [2, 1, 0]),
+    ('8-', [7, 8, 9]),
+    ('-3', [0, 1, 2]),
+    ('last', [9]),
+    ('last-8', [9, 8, 7]),
+    ('last-1', [9, 8, 7, 6, 5, 4, 3, 2, 1, 0]),
+    ('1-10:3', [0, 3, 6, 9]),
+    ('10-1:4', [9, 5, 1]),
+    ('8-last:2', [7, 9]),
+    ('odd', [0, 2, 4, 6, 8]),
+    ('even', [1, 3, 5, 7, 9]),
+    (' 2 , 2 ,, LAST ', [1, 1, 9]),
+])
+def test_select_pages(spec, expected):
+    """各种语法按书写顺序生成从0开始的页面索引"""
+    assert list(select_pages(spec, 10)) == expected
+
+
+@pytest.mark.parametrize('spec', ['', ' , ', 'abc', '0', '1-2-3', '5:2', '1-4:0', '3 4', 'odd-2'])
+def test_invalid_spec(spec):
+    """格式错误在解析时报告，不等到按页数生成"""
+    with pytest.raises(ValueError):
+        PageSpec(spec)
+
+
+@pytest.mark.parametrize('spec', ['11', '1-11', '12-last', '11-1'])
+def test_page_out_of_range(spec):
+    """页码超出文档页数时报告"""
+    spec = PageSpec(spec)
+    with pytest.raises(ValueError):
+        spec.resolve(10)
+
+
+def test_spec_resolves_against_each_page_count():
+    """同一个表达式只解析一次，可按不同页数生成"""
+    spec = PageSpec('last-1:2')
+    assert list(spec.resolve(5)) == [4, 2, 0]
+    assert list(spec.resolve(4)) == [3, 1]
+
+
+def test_page_ranges_do_not_expand():
+    """大范围的长度、按位置取页和包含判断不展开成列表"""
+    pages = select_pages('1-1000000,5,last-999990:5', 1000000)
+    assert len(pages) == 1000000 + 1 + 3
+    assert pages[0] == 0 and pages[999999] == 999999
+    assert pages[1000000] == 4
+    assert pages[-1] == 999989
+    assert 999989 in pages and 1000000 not in pages
+    with pytest.raises(IndexError):
+        pages[len(pages)]
+
+
+def test_runs_merge_adjacent_ranges():
+    """连续递增的区段合并，带步长或倒序的范围逐页成段"""
+    assert select_pages('1-3,4-6,9', 10).runs() == [(0, 5), (8, 8)]
+    assert select_pages('3-1', 10).runs() == [(2, 2), (1, 1), (0, 0)]
+    assert select_pages('1-5:2', 10).runs() == [(0, 0), (2, 2), (4, 4)]
+
+
+def test_from_pages_compresses_runs():
+    """页面索引序列压缩为连续区段，结果与原序列相同"""
+    pages = [0, 1, 2, 5, 6, 3]
+    ranges = PageRanges.from_pages(pages)
+    assert ranges.ranges == [range(0, 3), range(5, 7), range(3, 4)]
+    assert list(ranges) == pages
+    assert ranges == PageRanges([range(0, 3), range(5, 7), range(3, 4)])
+    assert ranges[1:4] == [1, 2, 5]
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+加密状态探测测试
+"""
+
+import shutil
+
+import fitz  # PyMuPDF
+import pytest
+
+from pdf_encryption import _int_value, parse_encryption, probe_encryption, read_encryption
+
+_STRING = b'<' + b'00' * 32 + b'>'
+
+
+def _build_pdf(path, encrypt_dict, extra_objects=(), update=False):
+    """
+    手工生成使用传统交叉引用表的加密PDF，加密字典为对象4
+
+    update 为True时追加一次增量更新，新的交叉引用表只包含页面对象，
+    加密字典留在前一个交叉引用表中。
+    """
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+               b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 200] >>', encrypt_dict] + list(extra_objects)
+    trailer = (b'/Size %d /Root 1 0 R /Encrypt 4 0 R /ID [<00112233445566778899aabbccddeeff>'
+               b'<00112233445566778899aabbccddeeff>]' % (len(objects) + 1))
+    data = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(data)
+    data += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    data += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    data += b'trailer\n<< %s >>\nstartxref\n%d\n%%%%EOF\n' % (trailer, xref)
+    if update:
+        page = len(data)
+        data += b'3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 300 300] >>\nendobj\n'
+        new_xref = len(data)
+        data += b'xref\n3 1\n%010d 00000 n \n' % page
+        data += b'trailer\n<< %s /Prev %d >>\nstartxref\n%d\n%%%%EOF\n' % (trailer, xref, new_xref)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def _rc4_dict(length=b'128'):
+    """RC4 加密字典，/Length 可以是数字或间接引用"""
+    return b'<< /Filter /Standard /V 2 /R 3 /Length %s /O %s /U %s /P -4 >>' % (length, _STRING, _STRING)
+
+
+def test_int_value_rejects_indirect_references():
+    """间接引用不会被截断成数字"""
+    assert _int_value(b'/V 2 /Length 128', b'Length') == 128
+    assert _int_value(b'/P -3904 /R 3', b'P') == -3904
+    assert _int_value(b'/V 2', b'Length') is None
+    with pytest.raises(ValueError):
+        _int_value(b'/Length 12 0 R /V 2', b'Length')
+
+
+def test_probe_reads_direct_encrypt_dict(tmp_path):
+    """加密字典在最后一个交叉引用表中时只读尾部"""
+    path = _build_pdf(str(tmp_path / 'rc4.pdf'), _rc4_dict())
+    info, method = read_encryption(path)
+    assert method == 'tail'
+    assert info['encryption_method'] == 'RC4-128'
+    assert info['permissions'] == -4
+
+
+def test_indirect_values_fall_back_to_full_parse(tmp_path):
+    """/Length 是间接对象时探测放弃，完整解析读出被引用的值"""
+    path = _build_pdf(str(tmp_path / 'indirect.pdf'), _rc4_dict(b'5 0 R'), [b'128'])
+    assert probe_encryption(path) is None
+    info, method = read_encryption(path)
+    assert method == 'full'
+    assert info['encryption_method'] == 'RC4-128'
+
+
+def test_incremental_update_trailer(tmp_path):
+    """增量更新后加密字典不在最后一个交叉引用表中时改为完整解析，结果一致"""
+    path = _build_pdf(str(tmp_path / 'updated.pdf'), _rc4_dict(), update=True)
+    assert probe_encryption(path) is None
+    info, method = read_encryption(path)
+    assert method == 'full'
+    assert info['encryption_method'] == 'RC4-128'
+
+
+def test_pymupdf_files(tmp_path):
+    """未加密、AES加密及其增量更新后的文件，探测结果与完整解析相同"""
+    plain = str(tmp_path / 'plain.pdf')
+    encrypted = str(tmp_path / 'encrypted.pdf')
+    with fitz.open() as pdf_document:
+        pdf_document.new_page()
+        pdf_document.save(plain)
+        pdf_document.save(encrypted, encryption=fitz.PDF_ENCRYPT_AES_128, owner_pw='owner')
+
+    for source in (plain, encrypted):
+        updated = source.replace('.pdf', '_updated.pdf')
+        shutil.copy(source, updated)
+        with fitz.open(updated) as pdf_document:
+            pdf_document.new_page()
+            pdf_document.saveIncr()
+        for path in (source, updated):
+            assert probe_encryption(path) == parse_encryption(path)
+
+    assert probe_encryption(plain) == {'encrypted': False}
+    assert probe_encryption(encrypted)['encryption_method'] == 'AES-128'
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+页面资源裁剪测试
+"""
+
+import io
+import os
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+from pdf_prune import content_names, prune_data, prune_file, prune_resources
+from pdf_splitter import PDFSplitter
+
+
+def _make_shared_resources(path, page_count=4):
+    """
+    生成各页共享同一个资源字典的PDF
+
+    第i页只显示图片 /Im<i>，资源字典中另有一张没有任何页面使用的图片。
+    """
+    rng = np.random.default_rng(0)
+    with fitz.open() as pdf_document:
+        images = []
+        for _ in range(page_count + 1):
+            page = pdf_document.new_page()
+            buffer = io.BytesIO()
+            Image.fromarray(rng.integers(0, 256, (80, 80, 3), dtype=np.uint8)).save(buffer, 'PNG')
+            images.append(page.insert_image(fitz.Rect(72, 72, 272, 272), stream=buffer.getvalue()))
+        resources = pdf_document.get_new_xref()
+        entries = ''.join(f'/Im{i + 1} {xref} 0 R' for i, xref in enumerate(images))
+        pdf_document.update_object(resources, f'<</XObject<<{entries}>>/ProcSet[/PDF/ImageC]>>')
+        for page_num, page in enumerate(pdf_document):
+            contents = page.get_contents()
+            pdf_document.update_stream(contents[0], f'q 200 0 0 200 72 72 cm /Im{page_num + 1} Do Q'.encode())
+            pdf_document.xref_set_key(page.xref, 'Contents', f'{contents[0]} 0 R')
+            pdf_document.xref_set_key(page.xref, 'Resources', f'{resources} 0 R')
+        pdf_document.delete_page(-1)
+        pdf_document.save(path, garbage=1)
+    return path
+
+
+def _image_names(pdf_document):
+    """每页资源字典中的图片名称"""
+    return [[image[7] for image in page.get_images(full=True)] for page in pdf_document]
+
+
+def test_content_names():
+    """提取内容流中的名称记号"""
+    data = b'q /GS1 gs BT /F1 12 Tf (a /b) Tj ET /Im0 Do Q'
+    assert content_names(data) == {'GS1', 'F1', 'b', 'Im0'}
+
+
+def test_prune_keeps_used_entries(tmp_path):
+    """每页只保留内容用到的条目，/ProcSet 原样保留，共享的资源字典不被修改"""
+    path = _make_shared_resources(str(tmp_path / 'shared.pdf'))
+    with fitz.open(path) as pdf_document:
+        shared = pdf_document.xref_get_key(pdf_document[0].xref, 'Resources')[1]
+        assert _image_names(pdf_document)[0] == ['Im1', 'Im2', 'Im3', 'Im4', 'Im5']
+
+        removed = prune_resources(pdf_document)
+        # 只统计没有任何页面使用的图片
+        assert 0 < removed < 40000
+        assert _image_names(pdf_document) == [['Im1'], ['Im2'], ['Im3'], ['Im4']]
+        assert pdf_document.xref_get_key(pdf_document[0].xref, 'Resources/ProcSet')[1] == '[/PDF/ImageC]'
+        assert pdf_document.xref_object(int(shared.split()[0]), compressed=True).count(' 0 R') == 5
+
+
+def test_prune_file_and_data(tmp_path):
+    """裁剪后保存时去掉不再被引用的对象，返回裁剪前的大小"""
+    path = _make_shared_resources(str(tmp_path / 'shared.pdf'))
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    pruned, size_before = prune_data(data)
+    assert size_before == len(data)
+    assert len(pruned) < len(data)
+
+    assert prune_file(path) == len(data)
+    assert os.path.getsize(path) < len(data)
+    assert not os.path.exists(path + '.tmp')
+    with fitz.open(path) as pdf_document:
+        assert _image_names(pdf_document) == [['Im1'], ['Im2'], ['Im3'], ['Im4']]
+
+
+def test_split_chunks_carry_only_used_resources(tmp_path):
+    """分割输出只带本分块用到的图片，关闭裁剪时每个分块带上整个资源字典"""
+    path = _make_shared_resources(str(tmp_path / 'shared.pdf'))
+    sizes = {}
+    for prune in (True, False):
+        output_dir = str(tmp_path / f'out_{prune}')
+        os.makedirs(output_dir)
+        assert PDFSplitter().split_by_pages(path, output_dir, pages_per_file=1, prune=prune)
+        with fitz.open(os.path.join(output_dir, 'split_2-2.pdf')) as pdf_document:
+            assert [len(names) for names in _image_names(pdf_document)] == [1 if prune else 5]
+        sizes[prune] = os.path.getsize(os.path.join(output_dir, 'split_2-2.pdf'))
+    assert sizes[True] * 3 < sizes[False]
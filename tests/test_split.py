@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+PDF分割测试
+"""
+
+import os
+import zipfile
+
+import fitz  # PyMuPDF
+
+from pdf_splitter import PDFSplitter
+
+
+def _make_pdf(path, pages):
+    """生成每页写有页码的PDF"""
+    with fitz.open() as pdf_document:
+        for page_num in range(pages):
+            pdf_document.new_page().insert_text((72, 72), f"page {page_num + 1}")
+        pdf_document.save(path)
+    return path
+
+
+def _first_page_text(data):
+    """读取输出PDF第一页的文字"""
+    with fitz.open(stream=data, filetype='pdf') as pdf_document:
+        return pdf_document[0].get_text().strip()
+
+
+def test_split_names_sort_by_page(tmp_path):
+    """输出文件名按总页数位数补零，按名称排序即按页码排序"""
+    input_file = _make_pdf(str(tmp_path / 'in.pdf'), 12)
+    output_dir = str(tmp_path / 'out')
+    os.makedirs(output_dir)
+
+    assert PDFSplitter().split_by_pages(input_file, output_dir, pages_per_file=1)
+    names = sorted(os.listdir(output_dir))
+    assert names[:2] == ['split_01-01.pdf', 'split_02-02.pdf']
+    assert names[-1] == 'split_12-12.pdf'
+    for page, name in enumerate(names, 1):
+        with open(os.path.join(output_dir, name), 'rb') as f:
+            assert _first_page_text(f.read()) == f"page {page}"
+
+
+def test_split_archive_entries_sort_by_page(tmp_path):
+    """归档条目使用同样补零的名称"""
+    input_file = _make_pdf(str(tmp_path / 'in.pdf'), 10)
+    archive = str(tmp_path / 'out.zip')
+
+    assert PDFSplitter().split_by_pages(input_file, '', pages_per_file=3, archive=archive)
+    with zipfile.ZipFile(archive) as zip_file:
+        names = zip_file.namelist()
+    assert names == sorted(names) == ['split_01-03.pdf', 'split_04-06.pdf', 'split_07-09.pdf', 'split_10-10.pdf']
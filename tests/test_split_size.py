@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+按大小分割测试
+"""
+
+import io
+import os
+import zipfile
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+from pdf_size import PART_OVERHEAD, PageSizeEstimator
+from pdf_splitter import PDFSplitter
+
+
+def _png(rng, size):
+    """生成无法压缩的随机PNG图片"""
+    buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (size, size, 3), dtype=np.uint8)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _make_pdf(path, pages=6):
+    """生成每页带一张共享标志图片和一张独有图片的PDF"""
+    rng = np.random.default_rng(0)
+    logo = _png(rng, 60)
+    with fitz.open() as pdf_document:
+        for page_num in range(pages):
+            page = pdf_document.new_page()
+            page.insert_image(fitz.Rect(0, 0, 50, 50), stream=logo)
+            page.insert_image(fitz.Rect(72, 72, 272, 272), stream=_png(rng, 40))
+            page.insert_text((72, 400), f"page {page_num + 1}")
+        pdf_document.save(path)
+    return path
+
+
+def _page_texts(path):
+    """读取每页文字"""
+    with fitz.open(path) as pdf_document:
+        return [page.get_text().strip() for page in pdf_document]
+
+
+def test_shared_objects_counted_once(tmp_path):
+    """同一分块中共享的图片只计一次，新分块重新计入"""
+    path = _make_pdf(str(tmp_path / 'in.pdf'))
+    with fitz.open(path) as pdf_document:
+        estimator = PageSizeEstimator(pdf_document)
+        included = set()
+        first = estimator.add_page(0, included)
+        second = estimator.add_page(1, included)
+        assert first > second * 3
+        assert abs(estimator.add_page(1, set()) - first) < 10
+
+
+def test_pack(tmp_path):
+    """按顺序贪心装入分块，单页超过上限时独占一个分块"""
+    path = _make_pdf(str(tmp_path / 'in.pdf'))
+    with fitz.open(path) as pdf_document:
+        estimator = PageSizeEstimator(pdf_document)
+        included = set()
+        marginals = [estimator.add_page(page_index, included) for page_index in range(6)]
+
+        parts = estimator.pack(range(6), 1e9)
+        assert parts == [(range(0, 6), PART_OVERHEAD + sum(marginals))]
+
+        limit = PART_OVERHEAD + marginals[0] + marginals[1] + 100
+        assert [pages for pages, _ in estimator.pack(range(6), limit)] == [range(0, 2), range(2, 4), range(4, 6)]
+        assert [pages for pages, _ in estimator.pack(range(2, 5), limit)] == [range(2, 4), range(4, 5)]
+        assert [pages for pages, _ in estimator.pack(range(6), 1000)] == [range(i, i + 1) for i in range(6)]
+
+
+def test_split_by_size(tmp_path):
+    """每个输出不超过上限，按文件名排序后依次包含全部页面"""
+    path = _make_pdf(str(tmp_path / 'in.pdf'))
+    output_dir = str(tmp_path / 'out')
+    os.makedirs(output_dir)
+    splitter = PDFSplitter()
+
+    assert splitter.split_by_size(path, output_dir, 30000)
+    names = sorted(os.listdir(output_dir))
+    assert names == ['part_1-2.pdf', 'part_3-4.pdf', 'part_5-6.pdf']
+    texts = []
+    for name in names:
+        assert os.path.getsize(os.path.join(output_dir, name)) <= 30000
+        texts.extend(_page_texts(os.path.join(output_dir, name)))
+    assert texts == [f"page {page}" for page in range(1, 7)]
+    assert [os.path.basename(report['file']) for report in splitter.last_split_report] == names
+
+
+def test_overshoot_is_split_again(tmp_path):
+    """实际大小超出上限的分块收紧上限后重新分割，归档中不留下超出上限的条目"""
+    path = _make_pdf(str(tmp_path / 'in.pdf'))
+    with fitz.open(path) as pdf_document:
+        parts = PageSizeEstimator(pdf_document).pack(range(6), 25000)
+    # 估计两页一块恰好不超过上限，实际写出会略微超出
+    assert [len(pages) for pages, _ in parts] == [2, 2, 2]
+
+    output_dir = str(tmp_path / 'out')
+    os.makedirs(output_dir)
+    assert PDFSplitter().split_by_size(path, output_dir, 25000)
+    assert sorted(os.listdir(output_dir)) == [f"part_{page}-{page}.pdf" for page in range(1, 7)]
+
+    archive = str(tmp_path / 'out.zip')
+    assert PDFSplitter().split_by_size(path, '', 25000, archive=archive)
+    with zipfile.ZipFile(archive) as zip_file:
+        assert zip_file.namelist() == [f"part_{page}-{page}.pdf" for page in range(1, 7)]
+
+
+def test_invalid_limit(tmp_path):
+    """大小上限不大于0时失败"""
+    path = _make_pdf(str(tmp_path / 'in.pdf'))
+    assert not PDFSplitter().split_by_size(path, str(tmp_path), 0)
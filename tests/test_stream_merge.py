@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+流式合并测试
+"""
+
+import io
+
+import fitz  # PyMuPDF
+import pytest
+
+from pdf_merger import PDFMerger
+from pdf_stream_merge import StreamingMerger, stream_merge
+
+
+def _make_pdf(path, prefix, page_count):
+    """生成每页带文字“<前缀>-<页码>”的PDF，第1页带一个指向最后一页的链接"""
+    with fitz.open() as pdf_document:
+        for page_number in range(1, page_count + 1):
+            page = pdf_document.new_page()
+            page.insert_text((72, 72), f"{prefix}-{page_number}")
+        pdf_document[0].insert_link({'kind': fitz.LINK_GOTO, 'from': fitz.Rect(72, 100, 200, 120),
+                                     'page': page_count - 1})
+        pdf_document.save(path)
+    return path
+
+
+def _page_texts(path):
+    """读取每页文字"""
+    with fitz.open(path) as pdf_document:
+        return [page.get_text().strip() for page in pdf_document]
+
+
+def test_stream_merge_selected_pages(tmp_path):
+    """按给定顺序合并所选页面，None表示全部页面"""
+    first = _make_pdf(str(tmp_path / 'a.pdf'), 'A', 3)
+    second = _make_pdf(str(tmp_path / 'b.pdf'), 'B', 4)
+    output_file = str(tmp_path / 'merged.pdf')
+
+    assert stream_merge([(first, None), (second, [3, 0]), (first, [1])], output_file) == 6
+    assert _page_texts(output_file) == ['A-1', 'A-2', 'A-3', 'B-4', 'B-1', 'A-2']
+
+
+def test_links_follow_selected_pages(tmp_path):
+    """指向选中页面的链接改写到合并后的页面，指向未选页面的链接不带入其余页面"""
+    source = _make_pdf(str(tmp_path / 'a.pdf'), 'A', 5)
+    output_file = str(tmp_path / 'merged.pdf')
+
+    stream_merge([(source, [2, 0, 4])], output_file)
+    with fitz.open(output_file) as pdf_document:
+        assert pdf_document.page_count == 3
+        assert [link['page'] for link in pdf_document[1].get_links()] == [2]
+
+    stream_merge([(source, [0])], output_file)
+    with fitz.open(source) as source_document, fitz.open(output_file) as pdf_document:
+        assert pdf_document.page_count == 1
+        # 只复制第1页可达的对象，约为原文件的五分之一
+        assert pdf_document.xref_length() * 2 < source_document.xref_length()
+
+
+def test_same_page_twice(tmp_path):
+    """同一页面重复选择时各自写出"""
+    source = _make_pdf(str(tmp_path / 'a.pdf'), 'A', 2)
+    buffer = io.BytesIO()
+    merger = StreamingMerger(buffer)
+
+    assert merger.append(source, [1, 1]) == 2
+    merger.close()
+    with fitz.open(stream=buffer.getvalue(), filetype='pdf') as pdf_document:
+        assert [page.get_text().strip() for page in pdf_document] == ['A-2', 'A-2']
+
+
+def test_page_out_of_range(tmp_path):
+    """页码超出输入页数时报错"""
+    source = _make_pdf(str(tmp_path / 'a.pdf'), 'A', 2)
+    merger = StreamingMerger(io.BytesIO())
+
+    with pytest.raises(ValueError):
+        merger.append(source, [2])
+
+
+def test_merger_stream_backend(tmp_path):
+    """合并器的 stream 后端与默认后端输出相同的页面"""
+    first = _make_pdf(str(tmp_path / 'a.pdf'), 'A', 2)
+    second = _make_pdf(str(tmp_path / 'b.pdf'), 'B', 2)
+    output_file = str(tmp_path / 'merged.pdf')
+
+    assert PDFMerger().merge_pdfs_with_order([(first, '2'), (second, 'last-1')], output_file, streaming=True)
+    assert _page_texts(output_file) == ['A-2', 'B-2', 'B-1']
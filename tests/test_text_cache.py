@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+文本缓存测试
+"""
+
+import sqlite3
+import threading
+
+import fitz  # PyMuPDF
+import pytest
+
+import pdf_converter
+import text_cache
+from pdf_converter import PDFConverter
+from text_cache import TextCache, page_content_hash
+
+
+def _make_pdf(path, pages=5):
+    """生成各页共用同一字体的PDF"""
+    with fitz.open() as pdf_document:
+        for page_num in range(pages):
+            page = pdf_document.new_page()
+            page.insert_text((72, 72), f"page {page_num + 1}", fontname='tiro')
+        pdf_document.save(path)
+    return path
+
+
+def test_shared_objects_are_hashed_once(tmp_path, monkeypatch):
+    """共用的字体对象只计算一次摘要，结果与不缓存时相同"""
+    input_file = _make_pdf(str(tmp_path / 'in.pdf'))
+    calls = []
+    original = text_cache._object_digest
+    monkeypatch.setattr(text_cache, '_object_digest',
+                        lambda pdf_document, xref: calls.append(xref) or original(pdf_document, xref))
+
+    with fitz.open(input_file) as pdf_document:
+        expected = [page_content_hash(pdf_document, page_num) for page_num in range(5)]
+        uncached_calls = len(calls)
+        calls.clear()
+        object_digests = {}
+        hashes = [page_content_hash(pdf_document, page_num, object_digests) for page_num in range(5)]
+
+    assert hashes == expected
+    assert len(set(hashes)) == 5
+    assert len(calls) == len(set(calls)) < uncached_calls
+
+
+def test_serial_extraction_closes_cache_connection(tmp_path, monkeypatch):
+    """串行提取结束后关闭主进程中打开的缓存连接"""
+    input_file = _make_pdf(str(tmp_path / 'in.pdf'))
+    connections = []
+    connect = sqlite3.connect
+    monkeypatch.setattr(pdf_converter.sqlite3, 'connect',
+                        lambda *args: connections.append(connect(*args)) or connections[-1])
+    cache = TextCache(str(tmp_path / 'cache.db'))
+    converter = PDFConverter(text_cache=cache)
+    try:
+        for _ in range(2):
+            texts = [text for _, _, text in converter.iter_page_texts([input_file])]
+        assert texts[2].strip() == 'page 3'
+        assert cache.report() == {'reused': 5, 'recomputed': 0}
+    finally:
+        cache.close()
+    assert len(connections) == 3
+    for connection in connections[1:]:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute('SELECT 1')
+
+
+def test_concurrent_serial_extractions_are_independent(tmp_path, monkeypatch):
+    """两个线程同时串行提取时，各自的文档不会被对方替换或关闭"""
+    files = [_make_pdf(str(tmp_path / f'{name}.pdf')) for name in ('first', 'second')]
+    # 两个线程都进入第一次 get_text 后再继续，此时双方都已打开各自的文档
+    barrier = threading.Barrier(2, timeout=10)
+    waited = threading.local()
+    get_text = fitz.Page.get_text
+
+    def synchronized_get_text(page, *args, **kwargs):
+        if not getattr(waited, 'done', False):
+            waited.done = True
+            barrier.wait()
+        return get_text(page, *args, **kwargs)
+
+    monkeypatch.setattr(fitz.Page, 'get_text', synchronized_get_text)
+    converter = PDFConverter()
+    results = {}
+
+    def run(input_file):
+        results[input_file] = [(file_path, page, text.strip())
+                               for file_path, page, text in converter.iter_page_texts([input_file])]
+
+    threads = [threading.Thread(target=run, args=(input_file,)) for input_file in files]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for input_file in files:
+        assert results[input_file] == [(input_file, page, f'page {page}') for page in range(1, 6)]
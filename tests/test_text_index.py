@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+全文索引测试
+"""
+
+from text_index import TextIndex
+
+
+def _records(file_path, pages):
+    """每页包含页码词条和一个公共词条"""
+    return ((file_path, page, f"common page{page} 中文检索") for page in range(1, pages + 1))
+
+
+def test_search_reopened_index(tmp_path):
+    """重新打开的索引按需读取词典和文档表，结果与写入时一致"""
+    index = TextIndex(str(tmp_path), segment_pages=700)
+    index.add_pages(_records('a.pdf', 1500))
+
+    reopened = TextIndex(str(tmp_path))
+    assert reopened.stats()['segments'] == 3
+    assert reopened.search('page1234') == [('a.pdf', 1234)]
+    assert reopened.search('Common 检索', limit=2) == [('a.pdf', 1), ('a.pdf', 2)]
+    assert reopened.search('missing') == []
+
+
+def test_remove_and_compact(tmp_path):
+    """删除的文件立即从结果中消失，合并后仍能查询剩余页面"""
+    first, second = str(tmp_path / 'a.pdf'), str(tmp_path / 'b.pdf')
+    index = TextIndex(str(tmp_path / 'index'), segment_pages=700)
+    index.add_pages(_records(first, 800))
+    index.add_pages(_records(second, 600))
+    index.search('common')
+    index.remove_files([first])
+    assert {file_path for file_path, _ in index.search('common')} == {second}
+
+    assert index.compact() == 600
+    reopened = TextIndex(str(tmp_path / 'index'))
+    assert reopened.stats()['segments'] == 1
+    assert reopened.search('page600') == [(second, 600)]
+    assert len(reopened.search('中文')) == 600